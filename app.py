@@ -87,6 +87,21 @@ except ImportError as ie:
 except Exception as e:
     logger.error(f"✗ Error registering Shunting Visuals blueprint: {str(e)}")
 
+# ============================================================================
+# Station Registry
+# ============================================================================
+
+# Loads every station's data in the background from each process's first request;
+# pass ?station=<key> to any module
+from modules.stations import station_registry
+station_registry.init_app(app)
+logger.info(f"✓ Station registry initialized: {', '.join(station_registry.keys())}")
+
+@app.route('/api/stations')
+def stations():
+    """List the declared stations, their files and the state of their data"""
+    return jsonify(station_registry.status())
+
 # ============================================================================
 # Main Routes
 # ============================================================================
@@ -3,19 +3,15 @@ CSV Data Export Module for Circuit and Switch Analysis
 
 This module provides functionality to prepare and export circuit and switch
 analysis data to CSV format with proper filtering and data source labeling.
+The data comes from the query plan of the analysis (see
+query_plan_circuit_switch_analysis), so an export after a plot reuses the
+intervals the plot selected.
 """
 
 import logging
 import pandas as pd
 
-from .filter_data_circuit_switch_analysis import (
-    validate_circuit,
-    filter_circuit_data,
-    filter_short_duration_circuits,
-    get_matching_switches,
-    filter_switch_data,
-    filter_short_duration_switches
-)
+from .filter_data_circuit_switch_analysis import format_for_csv
 
 logger = logging.getLogger(__name__)
 
@@ -48,20 +44,17 @@ def prepare_data_for_csv(data):
     return data[valid_columns]
 
 
-def prepare_csv_data(circuit_name, additional_circuits, circuit_df, switch_df, 
-                     from_time, to_time, min_duration, max_duration):
+def _combine_switches(switch_dict):
+    """Concatenates per-switch DataFrames, None if there are none."""
+    return pd.concat(switch_dict.values()) if switch_dict else None
+
+
+def prepare_csv_data(plan):
     """
     Prepare comprehensive data for CSV export from all data sources.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuit identifiers
-        circuit_df: DataFrame containing circuit data
-        switch_df: DataFrame containing switch data
-        from_time: Start time for filtering
-        to_time: End time for filtering
-        min_duration: Minimum duration threshold (seconds)
-        max_duration: Maximum duration threshold for short events (seconds)
+        plan: QueryPlan of the analysis
         
     Returns:
         Dictionary containing filtered data from all sources
@@ -73,31 +66,21 @@ def prepare_csv_data(circuit_name, additional_circuits, circuit_df, switch_df,
         'short_duration_circuit': None,
         'short_duration_switch': None
     }
+    primary = plan.primary
     
-    if circuit_name and validate_circuit(circuit_name, circuit_df):
-        result['primary_circuit'] = filter_circuit_data(
-            circuit_name, circuit_df, from_time, to_time, min_duration, for_csv=True
-        )
-        result['short_duration_circuit'] = filter_short_duration_circuits(
-            circuit_name, circuit_df, from_time, to_time, max_duration, for_csv=True
+    if primary.valid:
+        result['primary_circuit'] = format_for_csv(primary.regular, 'circuit')
+        result['short_duration_circuit'] = format_for_csv(
+            primary.short, 'circuit', event_type='Short_Duration'
         )
     
-    if additional_circuits:
-        for add_circuit in additional_circuits:
-            if add_circuit != circuit_name and validate_circuit(add_circuit, circuit_df):
-                result['additional_circuits'][add_circuit] = filter_circuit_data(
-                    add_circuit, circuit_df, from_time, to_time, min_duration, for_csv=True
-                )
+    for query in plan.additional:
+        result['additional_circuits'][query.name] = format_for_csv(query.regular, 'circuit')
     
-    if circuit_name:
-        matching_switches = get_matching_switches(circuit_name, switch_df)
-        if matching_switches is not None:
-            result['primary_switch'] = filter_switch_data(
-                matching_switches, from_time, to_time, min_duration, for_csv=True
-            )
-            result['short_duration_switch'] = filter_short_duration_switches(
-                matching_switches, from_time, to_time, max_duration, for_csv=True
-            )
+    result['primary_switch'] = format_for_csv(_combine_switches(primary.switches), 'switch')
+    result['short_duration_switch'] = format_for_csv(
+        _combine_switches(primary.short_switches), 'switch', event_type='Short_Duration'
+    )
     
     return result
 
@@ -179,189 +162,109 @@ def _add_source_label(df, source_label, circuit_name=None):
     return df_copy
 
 
-def _collect_data_from_circuits(circuit_name, additional_circuits, circuit_df, 
-                                 from_time, to_time, threshold, filter_func, 
-                                 source_prefix, is_short_duration=False):
+def _collect_data_from_circuits(plan, is_short_duration=False):
     """
-    Generic function to collect data from primary and additional circuits.
+    Collect circuit data from primary and additional circuits.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: Circuit DataFrame
-        from_time: Start time filter
-        to_time: End time filter
-        threshold: Duration threshold (min or max)
-        filter_func: Function to apply filtering
-        source_prefix: Prefix for data source label
+        plan: QueryPlan of the analysis
         is_short_duration: Whether this is for short duration events
         
     Returns:
         Combined DataFrame from all circuits
     """
     dataframes = []
+    suffix = " Short Duration" if is_short_duration else ""
+    event_type = 'Short_Duration' if is_short_duration else None
     
-    if circuit_name and validate_circuit(circuit_name, circuit_df):
-        primary_data = filter_func(
-            circuit_name, circuit_df, from_time, to_time, threshold, for_csv=True
-        )
+    queries = ([plan.primary] if plan.primary.valid else []) + plan.additional
+    for query in queries:
+        data = format_for_csv(query.short if is_short_duration else query.regular, 'circuit', event_type)
         
-        labeled_df = _add_source_label(
-            primary_data,
-            f'Primary Circuit{" Short Duration" if is_short_duration else ""}'
-        )
+        if query.name == plan.circuit_name:
+            label = f'Primary Circuit{suffix}'
+        else:
+            label = f'Additional Circuit{suffix}: {query.name}'
+        labeled_df = _add_source_label(data, label)
         if labeled_df is not None:
             dataframes.append(labeled_df)
     
-    if additional_circuits:
-        for add_circuit in additional_circuits:
-            if add_circuit != circuit_name and validate_circuit(add_circuit, circuit_df):
-                add_data = filter_func(
-                    add_circuit, circuit_df, from_time, to_time, threshold, for_csv=True
-                )
-                
-                label = f'{source_prefix}: {add_circuit}'
-                labeled_df = _add_source_label(add_data, label)
-                if labeled_df is not None:
-                    dataframes.append(labeled_df)
-    
     return pd.concat(dataframes, ignore_index=True, sort=False) if dataframes else pd.DataFrame()
 
 
-def _collect_switch_data_from_circuits(circuit_name, additional_circuits, circuit_df, 
-                                       switch_df, from_time, to_time, threshold, 
-                                       filter_func, is_short_duration=False):
+def _collect_switch_data_from_circuits(plan, is_short_duration=False):
     """
-    Generic function to collect switch data from circuits.
+    Collect switch data associated with the circuits of the analysis.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: Circuit DataFrame
-        switch_df: Switch DataFrame
-        from_time: Start time filter
-        to_time: End time filter
-        threshold: Duration threshold
-        filter_func: Function to apply filtering
+        plan: QueryPlan of the analysis
         is_short_duration: Whether this is for short duration events
         
     Returns:
         Combined DataFrame from all circuit switches
     """
     dataframes = []
-    circuits_to_process = [(circuit_name, 'Primary Circuit')]
+    event_type = 'Short_Duration' if is_short_duration else None
     
-    if additional_circuits:
-        circuits_to_process.extend(
-            [(circuit, 'Additional Circuit') for circuit in additional_circuits 
-             if circuit != circuit_name and validate_circuit(circuit, circuit_df)]
-        )
-    
-    for circuit, source_type in circuits_to_process:
-        matching_switches = get_matching_switches(circuit, switch_df)
+    for query in [plan.primary] + plan.additional:
+        switch_dict = query.short_switches if is_short_duration else query.switches
+        switch_data = format_for_csv(_combine_switches(switch_dict), 'switch', event_type)
         
-        if matching_switches is not None:
-            switch_data = filter_func(
-                matching_switches, from_time, to_time, threshold, for_csv=True
-            )
-            
-            label = f'{source_type}: {circuit}'
-            labeled_df = _add_source_label(switch_data, label, circuit_name=circuit)
-            if labeled_df is not None:
-                dataframes.append(labeled_df)
+        source_type = 'Primary Circuit' if query.name == plan.circuit_name else 'Additional Circuit'
+        labeled_df = _add_source_label(switch_data, f'{source_type}: {query.name}', circuit_name=query.name)
+        if labeled_df is not None:
+            dataframes.append(labeled_df)
     
     return pd.concat(dataframes, ignore_index=True, sort=False) if dataframes else pd.DataFrame()
 
 
-def collect_circuit_data(circuit_name, additional_circuits, circuit_df, 
-                        from_time, to_time, min_duration_seconds):
+def collect_circuit_data(plan):
     """
     Collect regular circuit data from primary and additional circuits.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: DataFrame containing circuit data
-        from_time: Start time for filtering
-        to_time: End time for filtering
-        min_duration_seconds: Minimum duration threshold
+        plan: QueryPlan of the analysis
         
     Returns:
         Combined DataFrame with all circuit data
     """
-    return _collect_data_from_circuits(
-        circuit_name, additional_circuits, circuit_df,
-        from_time, to_time, min_duration_seconds,
-        filter_circuit_data, 'Additional Circuit'
-    )
+    return _collect_data_from_circuits(plan)
 
 
-def collect_short_duration_circuit_data(circuit_name, additional_circuits, circuit_df, 
-                                       from_time, to_time, max_duration_seconds):
+def collect_short_duration_circuit_data(plan):
     """
     Collect short duration circuit event data.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: DataFrame containing circuit data
-        from_time: Start time for filtering
-        to_time: End time for filtering
-        max_duration_seconds: Maximum duration threshold for short events
+        plan: QueryPlan of the analysis
         
     Returns:
         Combined DataFrame with short duration circuit events
     """
-    return _collect_data_from_circuits(
-        circuit_name, additional_circuits, circuit_df,
-        from_time, to_time, max_duration_seconds,
-        filter_short_duration_circuits, 'Additional Circuit Short Duration',
-        is_short_duration=True
-    )
+    return _collect_data_from_circuits(plan, is_short_duration=True)
 
 
-def collect_switch_data(circuit_name, additional_circuits, circuit_df, switch_df, 
-                       from_time, to_time, min_duration_seconds):
+def collect_switch_data(plan):
     """
     Collect switch data associated with circuits.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: DataFrame containing circuit data
-        switch_df: DataFrame containing switch data
-        from_time: Start time for filtering
-        to_time: End time for filtering
-        min_duration_seconds: Minimum duration threshold
+        plan: QueryPlan of the analysis
         
     Returns:
         Combined DataFrame with all switch data
     """
-    return _collect_switch_data_from_circuits(
-        circuit_name, additional_circuits, circuit_df, switch_df,
-        from_time, to_time, min_duration_seconds, filter_switch_data
-    )
+    return _collect_switch_data_from_circuits(plan)
 
 
-def collect_short_duration_switch_data(circuit_name, additional_circuits, circuit_df, 
-                                      switch_df, from_time, to_time, max_duration_seconds):
+def collect_short_duration_switch_data(plan):
     """
     Collect short duration switch event data.
     
     Args:
-        circuit_name: Primary circuit identifier
-        additional_circuits: List of additional circuits
-        circuit_df: DataFrame containing circuit data
-        switch_df: DataFrame containing switch data
-        from_time: Start time for filtering
-        to_time: End time for filtering
-        max_duration_seconds: Maximum duration threshold for short events
+        plan: QueryPlan of the analysis
         
     Returns:
         Combined DataFrame with short duration switch events
     """
-    return _collect_switch_data_from_circuits(
-        circuit_name, additional_circuits, circuit_df, switch_df,
-        from_time, to_time, max_duration_seconds, filter_short_duration_switches,
-        is_short_duration=True
-    )
+    return _collect_switch_data_from_circuits(plan, is_short_duration=True)
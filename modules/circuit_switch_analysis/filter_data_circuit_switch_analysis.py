@@ -5,10 +5,11 @@ This module provides functions to filter, validate, and process circuit and swit
 data based on time ranges, durations, and matching criteria.
 """
 
-import re
 import logging
 import pandas as pd
 
+from .index_data_circuit_switch_analysis import ensure_switch_columns, get_circuit_index, get_switch_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,7 +33,10 @@ def validate_circuit(circuit_name, circuit_df):
             logger.error("Circuit_name column not found in circuit_df")
             return False
             
-        return circuit_name in circuit_df["Circuit_name"].values
+        circuit_index = get_circuit_index(circuit_df)
+        if circuit_index is None:
+            return circuit_name in circuit_df["Circuit_name"].values
+        return circuit_name in circuit_index
     except Exception as e:
         logger.error(f"Error in validate_circuit: {str(e)}")
         return False
@@ -68,6 +72,27 @@ def _get_csv_columns(filtered_data, interval_type='circuit'):
     return [col for col in base_columns if col in filtered_data.columns]
 
 
+def format_for_csv(data, interval_type='circuit', event_type=None):
+    """
+    Selects the CSV export columns of filtered data.
+    
+    Args:
+        data: Filtered circuit or switch DataFrame
+        interval_type: Type of data ('circuit' or 'switch')
+        event_type: Value of an added Event_Type column (optional)
+        
+    Returns:
+        DataFrame copy with the export columns, or data itself if it is None or empty
+    """
+    if data is None or data.empty:
+        return data
+    
+    result = data[_get_csv_columns(data, interval_type)].copy()
+    if event_type:
+        result['Event_Type'] = event_type
+    return result
+
+
 def filter_circuit_data(circuit_name, circuit_df, from_time, to_time, min_duration, for_csv=False):
     """
     Filters circuit data based on time range and minimum duration.
@@ -95,16 +120,12 @@ def filter_circuit_data(circuit_name, circuit_df, from_time, to_time, min_durati
             logger.error(f"Missing required columns in circuit_df: {missing_columns}")
             return pd.DataFrame()
             
-        filtered_data = circuit_df[
-            (circuit_df['Circuit_name'] == circuit_name) &
-            (circuit_df['Start_Time_c'] >= from_time) &
-            (circuit_df['End_Time_c'] <= to_time) &
-            (circuit_df['Duration_sec_c'] >= min_duration)
-        ]
+        filtered_data = get_circuit_index(circuit_df).select(
+            circuit_name, from_time, to_time, min_duration=min_duration
+        )
         
-        if for_csv and not filtered_data.empty:
-            available_cols = _get_csv_columns(filtered_data, 'circuit')
-            return filtered_data[available_cols].copy()
+        if for_csv:
+            return format_for_csv(filtered_data, 'circuit')
         
         return filtered_data
     except Exception as e:
@@ -128,18 +149,12 @@ def filter_short_duration_circuits(circuit_name, circuit_df, from_time, to_time,
         Filtered DataFrame with short duration events
     """
     try:
-        filtered_data = circuit_df[
-            (circuit_df['Circuit_name'] == circuit_name) &
-            (circuit_df['Start_Time_c'] >= from_time) &
-            (circuit_df['End_Time_c'] <= to_time) &
-            (circuit_df['Duration_sec_c'] <= max_duration)
-        ]
+        filtered_data = get_circuit_index(circuit_df).select(
+            circuit_name, from_time, to_time, max_duration=max_duration
+        )
         
-        if for_csv and not filtered_data.empty:
-            available_cols = _get_csv_columns(filtered_data, 'circuit')
-            result = filtered_data[available_cols].copy()
-            result['Event_Type'] = 'Short_Duration'
-            return result
+        if for_csv:
+            return format_for_csv(filtered_data, 'circuit', event_type='Short_Duration')
         
         return filtered_data
     except Exception as e:
@@ -149,7 +164,11 @@ def filter_short_duration_circuits(circuit_name, circuit_df, from_time, to_time,
 
 def get_matching_switches(circuit_name, switch_df):
     """
-    Finds switches matching a circuit based on numeric substring extraction.
+    Finds switches associated with a circuit.
+    
+    Associations come from the switch index built at load time (numeric
+    substring of the names plus declared circuit/switch pairs); switch_df
+    itself is never modified.
     
     Args:
         circuit_name: Circuit identifier to match
@@ -162,72 +181,44 @@ def get_matching_switches(circuit_name, switch_df):
         logger.error(f"Invalid circuit_name: {circuit_name}")
         return None
         
-    if switch_df is None or switch_df.empty or 'Switch_name' not in switch_df.columns:
+    switch_index = get_switch_index(switch_df)
+    if switch_index is None:
         logger.error("Invalid switch DataFrame")
         return None
     
-    circuit_numeric = re.findall(r'\d+', circuit_name)
-    if not circuit_numeric:
-        logger.warning(f"No numeric part found in circuit name: {circuit_name}")
-        return None
-
-    circuit_numeric = circuit_numeric[0]
-    logger.debug(f"Looking for switches matching circuit number: {circuit_numeric}")
-
-    def extract_numeric(switch_name):
-        if not isinstance(switch_name, str):
-            return None
-        numbers = re.findall(r'\d+', switch_name)
-        return numbers[0] if numbers else None
-
-    switch_df['Numeric_Switch'] = switch_df['Switch_name'].apply(extract_numeric)
-    matching_switches = switch_df[switch_df['Numeric_Switch'] == circuit_numeric]
-
-    if matching_switches.empty:
+    switch_names = switch_index.switches_for(circuit_name)
+    if not switch_names:
         logger.info(f"No matching switches found for circuit: {circuit_name}")
         return None
-        
+    
+    matching_switches = switch_index.frame_for(switch_names)
     logger.info(f"Found {len(matching_switches)} matching switches for circuit: {circuit_name}")
     return matching_switches
 
 
-def _ensure_switch_columns(switch_df):
+def select_switch_intervals(circuit_name, switch_df, from_time, to_time, min_duration=None, max_duration=None):
     """
-    Ensures required time and duration columns exist in switch DataFrame.
+    Selects the intervals of every switch associated with a circuit.
     
     Args:
+        circuit_name: Circuit identifier
         switch_df: DataFrame containing switch data
+        from_time: Start time for filtering
+        to_time: End time for filtering
+        min_duration: Minimum duration threshold in seconds (optional)
+        max_duration: Maximum duration threshold in seconds (optional)
         
     Returns:
-        Tuple of (success: bool, modified_df or None)
+        Dictionary of switch name to DataFrame of matching intervals (empty if none)
     """
-    df = switch_df.copy()
-    
-    if 'Start_Time_s' not in df.columns:
-        if 'Up_timestamp' in df.columns:
-            df['Start_Time_s'] = df['Up_timestamp']
-        else:
-            logger.error("Missing Start_Time_s or Up_timestamp column in switch data")
-            return False, None
-            
-    if 'End_Time_s' not in df.columns:
-        if 'Down_timestamp' in df.columns:
-            df['End_Time_s'] = df['Down_timestamp']
-        else:
-            logger.error("Missing End_Time_s or Down_timestamp column in switch data")
-            return False, None
-    
-    if not pd.api.types.is_datetime64_any_dtype(df['Start_Time_s']):
-        df['Start_Time_s'] = pd.to_datetime(df['Start_Time_s'], errors='coerce')
-        
-    if not pd.api.types.is_datetime64_any_dtype(df['End_Time_s']):
-        df['End_Time_s'] = pd.to_datetime(df['End_Time_s'], errors='coerce')
-            
-    if 'Duration_sec_s' not in df.columns:
-        logger.warning("Missing Duration_sec_s column - calculating from timestamps")
-        df['Duration_sec_s'] = (df['End_Time_s'] - df['Start_Time_s']).dt.total_seconds()
-    
-    return True, df
+    try:
+        switch_index = get_switch_index(switch_df)
+        if switch_index is None:
+            return {}
+        return switch_index.select_for_circuit(circuit_name, from_time, to_time, min_duration, max_duration)
+    except Exception as e:
+        logger.error(f"Error in select_switch_intervals: {str(e)}")
+        return {}
 
 
 def filter_switch_data(matching_switches, from_time, to_time, min_duration, for_csv=False):
@@ -248,7 +239,7 @@ def filter_switch_data(matching_switches, from_time, to_time, min_duration, for_
         if matching_switches is None:
             return None
 
-        success, prepared_df = _ensure_switch_columns(matching_switches)
+        success, prepared_df = ensure_switch_columns(matching_switches)
         if not success:
             return None
 
@@ -263,8 +254,7 @@ def filter_switch_data(matching_switches, from_time, to_time, min_duration, for_
             return None
         
         if for_csv:
-            available_cols = _get_csv_columns(filtered_data, 'switch')
-            return filtered_data[available_cols].copy()
+            return format_for_csv(filtered_data, 'switch')
             
         return filtered_data
     except Exception as e:
@@ -294,7 +284,7 @@ def filter_short_duration_switches(matching_switches, from_time, to_time, max_du
         logger.info(f"Filtering short duration switches with max_duration={max_duration}s")
         logger.info(f"Initial switch data size: {len(matching_switches)} rows")
         
-        success, prepared_df = _ensure_switch_columns(matching_switches)
+        success, prepared_df = ensure_switch_columns(matching_switches)
         if not success:
             return None
         
@@ -310,10 +300,7 @@ def filter_short_duration_switches(matching_switches, from_time, to_time, max_du
             return None
         
         if for_csv:
-            available_cols = _get_csv_columns(filtered_data, 'switch')
-            result = filtered_data[available_cols].copy()
-            result['Event_Type'] = 'Short_Duration'
-            return result
+            return format_for_csv(filtered_data, 'switch', event_type='Short_Duration')
 
         return filtered_data
     except Exception as e:
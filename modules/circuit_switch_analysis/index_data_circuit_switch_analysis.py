@@ -0,0 +1,398 @@
+"""
+Interval Index Module for Circuit and Switch Analysis
+
+This module builds, once per loaded dataset, indexes of the circuit and switch
+intervals grouped by name and sorted by start time. Each circuit or switch owns
+a contiguous slice of the sorted arrays, so a time-range query is two binary
+searches plus a duration mask over the few rows inside the window instead of
+full-length boolean masks over the whole DataFrame.
+
+The switch index also holds the circuit to switch associations, resolved once
+from the numeric key of the names, the circuit intervals' switch_name column and
+the topology's switch_controlled_by column.
+"""
+
+import logging
+import re
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_INDEX_COLUMNS = ['Circuit_name', 'Start_Time_c', 'End_Time_c', 'Duration_sec_c']
+
+# Values of the association columns that name no switch
+NO_SWITCH_VALUES = {'', 'no switch', 'none', 'nan', 'null'}
+
+# Indexes of the live DataFrames, keyed by (kind, id()) and dropped with the frame
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def numeric_key(name):
+    """
+    Returns the first run of digits in a circuit or switch name.
+
+    Args:
+        name: Circuit or switch name
+
+    Returns:
+        Digit string (e.g. '101' for '101ATPR' and '101_NWKR') or None
+    """
+    if not isinstance(name, str):
+        return None
+    match = re.search(r'\d+', name)
+    return match.group(0) if match else None
+
+
+def ensure_switch_columns(switch_df):
+    """
+    Ensures required time and duration columns exist in switch DataFrame.
+
+    Args:
+        switch_df: DataFrame containing switch data
+
+    Returns:
+        Tuple of (success: bool, modified_df or None)
+    """
+    df = switch_df.copy()
+
+    if 'Start_Time_s' not in df.columns:
+        if 'Up_timestamp' in df.columns:
+            df['Start_Time_s'] = df['Up_timestamp']
+        else:
+            logger.error("Missing Start_Time_s or Up_timestamp column in switch data")
+            return False, None
+
+    if 'End_Time_s' not in df.columns:
+        if 'Down_timestamp' in df.columns:
+            df['End_Time_s'] = df['Down_timestamp']
+        else:
+            logger.error("Missing End_Time_s or Down_timestamp column in switch data")
+            return False, None
+
+    if not pd.api.types.is_datetime64_any_dtype(df['Start_Time_s']):
+        df['Start_Time_s'] = pd.to_datetime(df['Start_Time_s'], errors='coerce')
+
+    if not pd.api.types.is_datetime64_any_dtype(df['End_Time_s']):
+        df['End_Time_s'] = pd.to_datetime(df['End_Time_s'], errors='coerce')
+
+    if 'Duration_sec_s' not in df.columns:
+        logger.warning("Missing Duration_sec_s column - calculating from timestamps")
+        df['Duration_sec_s'] = (df['End_Time_s'] - df['Start_Time_s']).dt.total_seconds()
+
+    return True, df
+
+
+# ========================== SORTED INTERVAL INDEX ==========================
+
+class SortedIntervalIndex:
+    """Intervals sorted by (name, start time) with one contiguous slice per name"""
+
+    def __init__(self, df, name_col, start_col, end_col, duration_col):
+        self.frame = df.sort_values([name_col, start_col], kind='stable')
+
+        self.start = pd.to_datetime(self.frame[start_col], errors='coerce').to_numpy('datetime64[ns]')
+        self.end = pd.to_datetime(self.frame[end_col], errors='coerce').to_numpy('datetime64[ns]')
+        self.duration = pd.to_numeric(self.frame[duration_col], errors='coerce').to_numpy(dtype=float)
+
+        names = self.frame[name_col].to_numpy()
+        boundaries = np.flatnonzero(names[1:] != names[:-1]) + 1
+        starts = np.concatenate(([0], boundaries)) if len(names) else np.array([], dtype=int)
+        stops = np.concatenate((boundaries, [len(names)])) if len(names) else np.array([], dtype=int)
+        self.slices = {names[a]: slice(a, b) for a, b in zip(starts.tolist(), stops.tolist())}
+
+        # A name whose intervals all end after they start can stop its search at to_time
+        inverted = self.end < self.start
+        self.ordered = {name: not inverted[rows].any() for name, rows in self.slices.items()}
+
+    def __contains__(self, name):
+        return name in self.slices
+
+    def __len__(self):
+        return len(self.frame)
+
+    def window(self, name, from_time, to_time):
+        """
+        Finds the intervals of a name that start and end within a time range.
+
+        Args:
+            name: Circuit or switch name
+            from_time: Start time for filtering (start >= from_time)
+            to_time: End time for filtering (end <= to_time)
+
+        Returns:
+            Array of positions into the sorted frame, in start time order
+        """
+        rows = self.slices.get(name)
+        if rows is None:
+            return np.array([], dtype=np.int64)
+
+        from_time = np.datetime64(pd.Timestamp(from_time), 'ns')
+        to_time = np.datetime64(pd.Timestamp(to_time), 'ns')
+
+        start = self.start[rows]
+        lo = int(np.searchsorted(start, from_time, side='left'))
+        hi = int(np.searchsorted(start, to_time, side='right')) if self.ordered[name] else len(start)
+
+        within = self.end[rows][lo:hi] <= to_time
+        return rows.start + lo + np.flatnonzero(within)
+
+    def select(self, name, from_time, to_time, min_duration=None, max_duration=None):
+        """
+        Returns the intervals of a name within a time range and duration bounds.
+
+        Args:
+            name: Circuit or switch name
+            from_time: Start time for filtering
+            to_time: End time for filtering
+            min_duration: Minimum duration threshold in seconds (optional)
+            max_duration: Maximum duration threshold in seconds (optional)
+
+        Returns:
+            DataFrame of matching intervals, in start time order
+        """
+        positions = self.window(name, from_time, to_time)
+        return self.take(positions, min_duration, max_duration)
+
+    def take(self, positions, min_duration=None, max_duration=None):
+        """
+        Returns the rows at positions of the sorted frame that meet the duration bounds.
+
+        Args:
+            positions: Positions from window()
+            min_duration: Minimum duration threshold in seconds (optional)
+            max_duration: Maximum duration threshold in seconds (optional)
+
+        Returns:
+            DataFrame of the selected rows
+        """
+        if min_duration is not None or max_duration is not None:
+            duration = self.duration[positions]
+            keep = np.ones(len(positions), dtype=bool)
+            if min_duration is not None:
+                keep &= duration >= min_duration
+            if max_duration is not None:
+                keep &= duration <= max_duration
+            positions = positions[keep]
+        return self.frame.iloc[positions]
+
+
+class CircuitIntervalIndex(SortedIntervalIndex):
+    """Circuit intervals sorted by (Circuit_name, Start_Time_c)"""
+
+    def __init__(self, circuit_df):
+        super().__init__(circuit_df, 'Circuit_name', 'Start_Time_c', 'End_Time_c', 'Duration_sec_c')
+
+
+# ========================== SWITCH ASSOCIATION INDEX ==========================
+
+def _split_switch_references(values):
+    """Yields the switch references of an association column, skipping 'No switch' values."""
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for reference in value.split(','):
+            reference = reference.strip()
+            if reference.lower() not in NO_SWITCH_VALUES:
+                yield reference
+
+
+def _association_pairs(circuit_df=None, edges_df=None):
+    """
+    Collects the (circuit, switch reference) pairs declared by the data.
+
+    Args:
+        circuit_df: Circuit intervals with a switch_name column (optional)
+        edges_df: Topology edges with track_circuit_id and switch_controlled_by columns (optional)
+
+    Returns:
+        Set of (circuit name, switch reference) tuples
+    """
+    pairs = set()
+    sources = [
+        (circuit_df, 'Circuit_name', 'switch_name'),
+        (edges_df, 'track_circuit_id', 'switch_controlled_by')
+    ]
+    for df, circuit_col, switch_col in sources:
+        if df is None or circuit_col not in df.columns or switch_col not in df.columns:
+            continue
+        declared = df[[circuit_col, switch_col]].dropna().drop_duplicates()
+        for circuit, value in declared.itertuples(index=False, name=None):
+            for reference in _split_switch_references([value]):
+                pairs.add((str(circuit).strip(), reference))
+    return pairs
+
+
+class SwitchAssociationIndex(SortedIntervalIndex):
+    """Switch intervals sorted by (Switch_name, Start_Time_s) plus the switches of every circuit"""
+
+    def __init__(self, switch_df, circuit_df=None, edges_df=None):
+        success, prepared = ensure_switch_columns(switch_df)
+        if not success:
+            raise ValueError("Switch data lacks start and end time columns")
+        super().__init__(prepared, 'Switch_name', 'Start_Time_s', 'End_Time_s', 'Duration_sec_s')
+
+        # Switches in order of first appearance, grouped by numeric key
+        self.switch_names = [name for name in pd.unique(switch_df['Switch_name']) if isinstance(name, str)]
+        self.by_key = {}
+        for name in self.switch_names:
+            self.by_key.setdefault(numeric_key(name), []).append(name)
+
+        # Declared associations: a reference names a switch or a switch number
+        declared = {}
+        known = set(self.switch_names)
+        for circuit, reference in _association_pairs(circuit_df, edges_df):
+            matches = [reference] if reference in known else self.by_key.get(numeric_key(reference), [])
+            declared.setdefault(circuit, set()).update(matches)
+        self.declared = declared
+
+        circuits = set(declared)
+        if circuit_df is not None and 'Circuit_name' in circuit_df.columns:
+            circuits.update(name for name in pd.unique(circuit_df['Circuit_name']) if isinstance(name, str))
+        self.associations = {circuit: self._resolve(circuit) for circuit in circuits}
+
+    def _resolve(self, circuit_name):
+        """Combines the numeric-key rule with the declared switches, in switch order."""
+        matches = set(self.by_key.get(numeric_key(circuit_name), [])) if numeric_key(circuit_name) else set()
+        matches |= self.declared.get(circuit_name, set())
+        return [name for name in self.switch_names if name in matches]
+
+    def switches_for(self, circuit_name):
+        """
+        Returns the switches associated with a circuit.
+
+        Args:
+            circuit_name: Circuit identifier
+
+        Returns:
+            List of switch names in order of first appearance in the switch data
+        """
+        switches = self.associations.get(circuit_name)
+        if switches is None:
+            switches = self._resolve(circuit_name)
+        return switches
+
+    def frame_for(self, switch_names):
+        """
+        Returns all intervals of the given switches.
+
+        Args:
+            switch_names: Switch names
+
+        Returns:
+            DataFrame of the switches' intervals, grouped by switch and in start time order
+        """
+        positions = [np.arange(self.slices[name].start, self.slices[name].stop)
+                     for name in switch_names if name in self.slices]
+        if not positions:
+            return self.frame.iloc[[]]
+        return self.frame.iloc[np.concatenate(positions)]
+
+    def select_for_circuit(self, circuit_name, from_time, to_time, min_duration=None, max_duration=None):
+        """
+        Returns the intervals of every switch of a circuit within a time range and duration bounds.
+
+        Args:
+            circuit_name: Circuit identifier
+            from_time: Start time for filtering
+            to_time: End time for filtering
+            min_duration: Minimum duration threshold in seconds (optional)
+            max_duration: Maximum duration threshold in seconds (optional)
+
+        Returns:
+            Dictionary of switch name to DataFrame, only switches with matching intervals
+        """
+        result = {}
+        for switch_name in self.switches_for(circuit_name):
+            data = self.select(switch_name, from_time, to_time, min_duration, max_duration)
+            if not data.empty:
+                result[switch_name] = data
+        return result
+
+
+# ========================== INDEX CACHE ==========================
+
+def _cached_index(kind, df, build):
+    """
+    Returns the index of a DataFrame, building it on first use.
+
+    The index lives as long as the DataFrame, so frames loaded once per station
+    or upload are indexed once. Frames must not be modified after indexing.
+    """
+    key = (kind, id(df))
+    with _indexes_lock:
+        entry = _indexes.get(key)
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+
+    index = build()
+    with _indexes_lock:
+        _indexes[key] = (weakref.ref(df), index)
+    weakref.finalize(df, _indexes.pop, key, None)
+    return index
+
+
+def get_circuit_index(circuit_df):
+    """
+    Returns the interval index of a circuit DataFrame, building it on first use.
+
+    Args:
+        circuit_df: Circuit DataFrame with CIRCUIT_INDEX_COLUMNS
+
+    Returns:
+        CircuitIntervalIndex or None if the frame lacks the required columns
+    """
+    if circuit_df is None or any(col not in circuit_df.columns for col in CIRCUIT_INDEX_COLUMNS):
+        return None
+    return _cached_index('circuit', circuit_df, lambda: CircuitIntervalIndex(circuit_df))
+
+
+def get_switch_index(switch_df, circuit_df=None, edges_df=None):
+    """
+    Returns the interval and association index of a switch DataFrame, building it on first use.
+
+    The association sources only take effect when the index is built, so
+    loaders build it with all of them right after loading; later callers just
+    pass the switch DataFrame.
+
+    Args:
+        switch_df: Switch DataFrame with a Switch_name column
+        circuit_df: Circuit intervals whose switch_name column declares associations (optional)
+        edges_df: Topology edges whose switch_controlled_by column declares associations (optional)
+
+    Returns:
+        SwitchAssociationIndex or None if the frame has no usable switch data
+    """
+    if switch_df is None or switch_df.empty or 'Switch_name' not in switch_df.columns:
+        return None
+    try:
+        return _cached_index('switch', switch_df, lambda: SwitchAssociationIndex(switch_df, circuit_df, edges_df))
+    except ValueError as e:
+        logger.error(f"Cannot index switch data: {str(e)}")
+        return None
+
+
+def read_topology_edges(edges_path):
+    """
+    Reads the circuit to switch columns of a topology edges file.
+
+    Args:
+        edges_path: Path to edges.csv (optional)
+
+    Returns:
+        DataFrame with track_circuit_id and switch_controlled_by, or None if unavailable
+    """
+    if not edges_path:
+        return None
+    try:
+        edges_df = pd.read_csv(edges_path, dtype=str)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read topology edges {edges_path}: {str(e)}")
+        return None
+    if 'track_circuit_id' not in edges_df.columns or 'switch_controlled_by' not in edges_df.columns:
+        return None
+    return edges_df[['track_circuit_id', 'switch_controlled_by']]
@@ -9,59 +9,45 @@ import logging
 import os
 import pandas as pd
 
+from modules.stations import CIRCUIT_INTERVALS, SWITCH_INTERVALS, TOPOLOGY_EDGES, Station, station_registry
+from .index_data_circuit_switch_analysis import get_circuit_index, get_switch_index, read_topology_edges
+
 logger = logging.getLogger(__name__)
 
-PROJECT_ROOT = os.environ.get(
-    "PROJECT_ROOT",
-    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-)
+# Station whose files are analysed when a request names none
+DEFAULT_STATION = os.environ.get("CIRCUIT_SWITCH_STATION", 'gandhipuram')
 
+# Format of the combined "<date> <time>" strings of the interval files
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-def _get_candidate_data_directories():
-    """
-    Returns list of directories to search for default CSV data files.
-    
-    Returns:
-        List of unique directory paths to search
-    """
-    candidates = [
-        os.environ.get("PHASE1_DATA_DIR"),
-        os.path.join(PROJECT_ROOT, "uploads"),
-        os.path.join(PROJECT_ROOT, "data"),
-        os.path.join(PROJECT_ROOT, "Data"),
-    ]
+# Years the datalog writes for an interval bound it never saw (1000-01-01, 9999-01-01, 9999-12-31)
+SENTINEL_YEARS = ('1000', '9999')
 
-    return [path for path in candidates if path and path not in candidates[:candidates.index(path)]]
 
-
-def _resolve_data_path(env_var_name, default_filename):
+def _parse_timestamps(values):
     """
-    Resolves data file path using environment variables and known directories.
+    Parses timestamp strings, masking the sentinel dates as missing.
+    
+    Values in TIMESTAMP_FORMAT are parsed in one vectorized pass. Sentinel
+    dates fall outside the datetime64 range and come out as NaT; only the
+    remaining failures are retried with per-element format inference.
     
     Args:
-        env_var_name: Environment variable name to check for explicit path
-        default_filename: Default filename to search for
+        values: Series of timestamp strings (or timestamps)
         
     Returns:
-        Resolved file path (may not exist if not found)
+        Series of datetime64 values, NaT where missing, sentinel or unparseable
     """
-    explicit_path = os.environ.get(env_var_name)
-    if explicit_path:
-        return explicit_path
-
-    for directory in _get_candidate_data_directories():
-        candidate = os.path.join(directory, default_filename)
-        if os.path.exists(candidate):
-            return candidate
-
-        if os.path.isdir(directory):
-            for entry in os.listdir(directory):
-                if entry.lower() == default_filename.lower():
-                    return os.path.join(directory, entry)
-
-    candidate_dirs = _get_candidate_data_directories()
-    fallback_dir = candidate_dirs[0] if candidate_dirs else PROJECT_ROOT
-    return os.path.join(fallback_dir, default_filename)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors='coerce')
+    
+    failed = values[parsed.isna() & values.notna()].astype(str).str.strip()
+    failed = failed[~failed.str[:4].isin(SENTINEL_YEARS)]
+    if not failed.empty:
+        parsed[failed.index] = pd.to_datetime(failed, format='mixed', errors='coerce')
+    return parsed
 
 
 def _process_timestamps(df, timestamp_prefix, date_col, time_col):
@@ -90,10 +76,7 @@ def _process_timestamps(df, timestamp_prefix, date_col, time_col):
     
     logger.info(f"Detected separate date/time columns for {timestamp_prefix}")
     if date_col in df.columns and time_col in df.columns:
-        df[timestamp_col] = pd.to_datetime(
-            df[date_col] + ' ' + df[time_col], 
-            errors='coerce'
-        )
+        df[timestamp_col] = _parse_timestamps(df[date_col] + ' ' + df[time_col])
     return False
 
 
@@ -106,7 +89,7 @@ def _ensure_datetime_type(df, column_name):
         column_name: Column name to check and convert
     """
     if column_name in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column_name]):
-        df[column_name] = pd.to_datetime(df[column_name], errors='coerce')
+        df[column_name] = _parse_timestamps(df[column_name])
 
 
 def _handle_missing_timestamps(df, start_col, end_col, down_timestamp, up_timestamp, is_circuit):
@@ -122,16 +105,15 @@ def _handle_missing_timestamps(df, start_col, end_col, down_timestamp, up_timest
         is_circuit: Boolean indicating if processing circuit data
     """
     now = pd.Timestamp.now()
+    default_start = now - pd.Timedelta(hours=1) if not is_circuit else now
     
-    for idx, row in df.iterrows():
-        if pd.isnull(row[start_col]):
-            default_start = now - pd.Timedelta(hours=1) if not is_circuit else now
-            df.at[idx, start_col] = default_start
-            df.at[idx, down_timestamp if is_circuit else up_timestamp] = default_start
-        
-        if pd.isnull(row[end_col]):
-            df.at[idx, end_col] = now
-            df.at[idx, up_timestamp if is_circuit else down_timestamp] = now
+    missing_start = df[start_col].isna()
+    missing_end = df[end_col].isna()
+    
+    for column in (start_col, down_timestamp if is_circuit else up_timestamp):
+        df[column] = df[column].where(~missing_start, default_start)
+    for column in (end_col, up_timestamp if is_circuit else down_timestamp):
+        df[column] = df[column].where(~missing_end, now)
 
 
 def _calculate_durations(df, start_col, end_col, duration_col):
@@ -144,14 +126,7 @@ def _calculate_durations(df, start_col, end_col, duration_col):
         end_col: End time column name
         duration_col: Duration column name to populate
     """
-    df[duration_col] = 0
-    
-    for idx, row in df.iterrows():
-        try:
-            df.at[idx, duration_col] = (row[end_col] - row[start_col]).total_seconds()
-        except Exception as e:
-            logger.warning(f"Error calculating duration for row {idx}: {str(e)}")
-            df.at[idx, duration_col] = 0
+    df[duration_col] = (df[end_col] - df[start_col]).dt.total_seconds().fillna(0.0)
 
 
 def _process_dataframe(df, is_circuit=True):
@@ -231,10 +206,7 @@ def _load_csv_file(file_path, file_type, is_circuit=True):
     empty_df = empty_circuit_df if is_circuit else empty_switch_df
     
     if not os.path.exists(file_path):
-        logger.error(
-            f"Error: {file_type.capitalize()} data file not found at {file_path} "
-            f"(searched directories: {_get_candidate_data_directories()})"
-        )
+        logger.error(f"Error: {file_type.capitalize()} data file not found at {file_path}")
         return empty_df
     
     try:
@@ -246,32 +218,25 @@ def _load_csv_file(file_path, file_type, is_circuit=True):
         return empty_df
 
 
-def load_data_from_database(circuit_path=None, switch_path=None):
+def load_data_from_database(circuit_path=None, switch_path=None, station=None):
     """
     Loads circuit and switch data from CSV files.
     
-    Supports both default internal files and custom uploaded files with automatic
-    path resolution through environment variables and search directories.
+    Supports both the files declared by a station and custom uploaded files;
+    a file that is not given falls back to the station's file.
     
     Args:
         circuit_path: Path to custom circuit data CSV file (optional)
         switch_path: Path to custom switch data CSV file (optional)
+        station: Station providing the default files (DEFAULT_STATION if None)
         
     Returns:
         Tuple of (circuit_df, switch_df) DataFrames
     """
     try:
-        default_circuit_csv_path = _resolve_data_path(
-            "PHASE1_CIRCUIT_DATA_PATH",
-            "gandhipuram_circuit_interval.csv"
-        )
-        default_switch_csv_path = _resolve_data_path(
-            "PHASE1_SWITCH_DATA_PATH",
-            "switch_intervals.csv"
-        )
-        
-        circuit_csv_path = circuit_path or default_circuit_csv_path
-        switch_csv_path = switch_path or default_switch_csv_path
+        station = station or station_registry.get(DEFAULT_STATION)
+        circuit_csv_path = circuit_path or station.path(CIRCUIT_INTERVALS) or ''
+        switch_csv_path = switch_path or station.path(SWITCH_INTERVALS) or ''
         
         logger.info(f"Loading circuit data from: {circuit_csv_path}")
         logger.info(f"Loading switch data from: {switch_csv_path}")
@@ -285,3 +250,56 @@ def load_data_from_database(circuit_path=None, switch_path=None):
         logger.error(f"ERROR loading data from CSV files: {str(e)}")
         empty_circuit_df, empty_switch_df = _get_empty_dataframes()
         return empty_circuit_df, empty_switch_df
+
+
+def get_unique_circuits(circuit_df):
+    """
+    Returns the sorted circuit names of a circuit DataFrame.
+    
+    Args:
+        circuit_df: Circuit DataFrame
+        
+    Returns:
+        Sorted list of unique circuit names
+    """
+    if circuit_df is None or len(circuit_df) == 0:
+        return []
+    return sorted(circuit_df['Circuit_name'].unique().tolist())
+
+
+def index_analysis_data(circuit_df, switch_df, station=None):
+    """
+    Builds the circuit interval index and the switch association index of a dataset.
+    
+    Switch associations use the numeric key of the names, the circuit
+    intervals' switch_name column and, if the station has a topology, the
+    switch_controlled_by column of its edges.
+    
+    Args:
+        circuit_df: Circuit DataFrame
+        switch_df: Switch DataFrame
+        station: Station whose topology declares circuit/switch pairs (optional)
+    """
+    get_circuit_index(circuit_df)
+    edges_df = read_topology_edges(station.path(TOPOLOGY_EDGES)) if station is not None and station.has(TOPOLOGY_EDGES) else None
+    get_switch_index(switch_df, circuit_df=circuit_df, edges_df=edges_df)
+
+
+def load_station_data(station: Station):
+    """
+    Loads and indexes a station's circuit and switch data for the registry.
+    
+    Args:
+        station: Station declaring circuit and switch interval files
+        
+    Returns:
+        Tuple of (circuit_df, switch_df, unique_circuits)
+    """
+    circuit_df, switch_df = load_data_from_database(station=station)
+    index_analysis_data(circuit_df, switch_df, station)
+    return circuit_df, switch_df, get_unique_circuits(circuit_df)
+
+
+station_registry.register_loader(
+    'circuit_switch_analysis', load_station_data, roles=(CIRCUIT_INTERVALS, SWITCH_INTERVALS)
+)
@@ -6,6 +6,7 @@ data analysis, including standard plots, multi-item plots, and short duration ev
 """
 
 import logging
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
@@ -151,6 +152,7 @@ def _update_standard_layout(fig, title, item_count, item_type="Items"):
         yaxis=_create_standard_yaxis(item_count, item_type),
         showlegend=True,
         hovermode='closest',
+        barmode='overlay',
         height=max(400, 150 * item_count) if item_count else 400,
         margin=dict(l=150, r=30, t=70, b=50),
         autosize=True,
@@ -165,43 +167,49 @@ def _update_standard_layout(fig, title, item_count, item_type="Items"):
 
 # ========================== HOVER TEXT GENERATION ==========================
 
-def _create_hover_text(data_type, name, row, additional_fields=None):
+def _format_values(values):
+    """Formats a column as strings, timestamps showing microseconds only when present."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype(str)
+    text = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+    microseconds = values.dt.microsecond.fillna(0).astype(int)
+    return text.where(microseconds == 0, text + '.' + microseconds.astype(str).str.zfill(6))
+
+
+def _hover_field(values, label):
+    """Returns '<br>label: value' for each row, empty where the value is missing."""
+    return (f"<br>{label}: " + _format_values(values)).where(values.notna(), '')
+
+
+def _create_hover_texts(data_type, name, data, short_duration=False):
     """
-    Creates standardized hover text for plot interactions.
+    Creates standardized hover text for every interval of a circuit or switch.
     
     Args:
         data_type: Type of data ('circuit' or 'switch')
         name: Name of the circuit or switch
-        row: DataFrame row containing the data
-        additional_fields: Optional dict with additional metadata
+        data: DataFrame of the item's intervals
+        short_duration: Whether the duration is labelled as a short duration
         
     Returns:
-        Formatted hover text string
+        List of formatted hover text strings, one per row
     """
     if data_type == 'circuit':
-        hover_text = (
-            f"Circuit: {name}<br>"
-            f"Start: {row['Start_Time_c']}<br>"
-            f"End: {row['End_Time_c']}"
-        )
+        hover_text = (f"Circuit: {name}<br>Start: " + _format_values(data['Start_Time_c']) +
+                      "<br>End: " + _format_values(data['End_Time_c']))
     else:
-        hover_text = (
-            f"Switch: {name}<br>"
-            f"Start: {row['Start_Time_s']}<br>"
-            f"End: {row['End_Time_s']}"
-        )
+        hover_text = (f"Switch: {name}<br>Start: " + _format_values(data['Start_Time_s']) +
+                      "<br>End: " + _format_values(data['End_Time_s']))
     
-    if 'Duration' in row and not pd.isnull(row['Duration']):
-        duration_label = "Short Duration:" if (additional_fields and 
-                                               additional_fields.get('short_duration')) else "Duration:"
-        hover_text += f"<br>{duration_label} {row['Duration']}"
+    if 'Duration' in data.columns:
+        hover_text += _hover_field(data['Duration'], "Short Duration" if short_duration else "Duration")
     
     timestamp_cols = _get_timestamp_columns(data_type)
     for col_name, col_key in timestamp_cols.items():
-        if col_key in row and not pd.isnull(row[col_key]):
-            hover_text += f"<br>{col_name}: {row[col_key]}"
+        if col_key in data.columns:
+            hover_text += _hover_field(data[col_key], col_name)
     
-    return hover_text
+    return hover_text.tolist()
 
 
 def _get_timestamp_columns(data_type):
@@ -224,71 +232,31 @@ def _get_timestamp_columns(data_type):
 
 # ========================== COMMON PLOTTING UTILITIES ==========================
 
-def _get_safe_duration(row, duration_col, max_duration):
+def _calculate_opacities(data, duration_col, time_cols, max_duration):
     """
-    Safely retrieves duration value with fallback calculation.
+    Calculates the opacity of every interval from its duration relative to the maximum.
     
-    Args:
-        row: DataFrame row
-        duration_col: Name of duration column
-        max_duration: Maximum duration for fallback
-        
-    Returns:
-        Duration in seconds as float
-    """
-    try:
-        duration_sec = row.get(duration_col, 0)
-        if pd.isnull(duration_sec) or not isinstance(duration_sec, (int, float)):
-            if duration_col.endswith('_c'):
-                time_diff = row['End_Time_c'] - row['Start_Time_c']
-            else:
-                time_diff = row['End_Time_s'] - row['Start_Time_s']
-            return time_diff.total_seconds()
-        return duration_sec
-    except Exception as e:
-        logger.warning(f"Error calculating duration: {str(e)}")
-        return max_duration
-
-
-def _calculate_opacity(duration_sec, max_duration):
-    """
-    Calculates opacity value based on duration relative to maximum.
+    Missing durations fall back to the difference of the interval's timestamps.
     
     Args:
-        duration_sec: Duration in seconds
+        data: DataFrame of intervals
+        duration_col: Name of duration column
+        time_cols: Tuple of (start column, end column)
         max_duration: Maximum duration threshold
         
     Returns:
-        Opacity value between 0.4 and 1.0
+        List of opacity values between 0.4 and 1.0
     """
-    try:
-        if duration_sec <= 0:
-            return 1.0
-        ratio = min(1.0, duration_sec / max_duration)
-        opacity = min(1.0, max(0.4, 1.0 - ratio * 0.5))
-        return opacity if 0.0 <= opacity <= 1.0 else 0.8
-    except (ZeroDivisionError, TypeError, ValueError) as e:
-        logger.warning(f"Error calculating opacity: {str(e)}")
-        return 0.8
-
-
-def _get_safe_midpoint(start_time, end_time):
-    """
-    Safely calculates midpoint between two timestamps.
+    fallback = (data[time_cols[1]] - data[time_cols[0]]).dt.total_seconds()
+    if duration_col in data.columns:
+        duration = pd.to_numeric(data[duration_col], errors='coerce').fillna(fallback)
+    else:
+        duration = fallback
+    duration = duration.to_numpy(dtype=float)
     
-    Args:
-        start_time: Start timestamp
-        end_time: End timestamp
-        
-    Returns:
-        Midpoint timestamp or start_time if calculation fails
-    """
-    try:
-        time_diff = end_time - start_time
-        return start_time + (time_diff / 2)
-    except Exception as e:
-        logger.warning(f"Error calculating midpoint: {str(e)}")
-        return start_time
+    ratio = np.minimum(1.0, duration / max_duration)
+    opacity = np.where(duration <= 0, 1.0, np.clip(1.0 - ratio * 0.5, 0.4, 1.0))
+    return np.nan_to_num(opacity, nan=0.8).tolist()
 
 
 def _add_item_label(fig, y_position, label_text, color, event_count=None):
@@ -316,31 +284,57 @@ def _add_item_label(fig, y_position, label_text, color, event_count=None):
     )
 
 
-def _add_hover_trace(fig, x, y, name, hover_text, legendgroup, show_legend):
-    """Adds invisible trace for hover functionality."""
-    fig.add_trace(go.Scatter(
-        x=[x], y=[y],
-        mode='markers',
-        marker=dict(size=1, opacity=0),
-        name=name,
-        legendgroup=legendgroup,
-        showlegend=show_legend,
-        hovertext=hover_text,
+# ========================== TIMELINE RENDERING ==========================
+
+def _add_timeline_trace(fig, data, item_type, item_name, y_center, color, opacity=0.8,
+                        height=0.8, line=None, short_duration=False):
+    """
+    Adds all intervals of a circuit or switch as one horizontal bar trace.
+    
+    Each bar starts at the interval's start time (base) and spans its duration,
+    so the figure holds one trace per item however many intervals it has.
+    Intervals without a start or end time are skipped.
+    
+    Args:
+        fig: Plotly figure object
+        data: DataFrame of the item's intervals
+        item_type: Type of item ('circuit' or 'switch')
+        item_name: Name of the circuit or switch
+        y_center: Y-axis position of the bars' centre
+        color: Fill color of the bars
+        opacity: Opacity for all bars or a list with one value per row of data
+        height: Bar thickness in y-axis units
+        line: Bar outline (default: 1.5px black)
+        short_duration: Whether hover text labels the duration as short
+        
+    Returns:
+        Number of intervals drawn
+    """
+    time_cols = ('Start_Time_c', 'End_Time_c') if item_type == 'circuit' else ('Start_Time_s', 'End_Time_s')
+    
+    drawable = (data[time_cols[0]].notna() & data[time_cols[1]].notna()).to_numpy()
+    if isinstance(opacity, list):
+        opacity = np.asarray(opacity)[drawable].tolist()
+    data = data[drawable]
+    if data.empty:
+        return 0
+    
+    start = pd.to_datetime(data[time_cols[0]])
+    end = pd.to_datetime(data[time_cols[1]])
+    
+    fig.add_trace(go.Bar(
+        base=start,
+        x=((end - start) / pd.Timedelta(milliseconds=1)).to_numpy(),
+        y=np.full(len(data), y_center),
+        width=height,
+        orientation='h',
+        marker=dict(color=color, opacity=opacity, line=line or dict(width=1.5, color="black")),
+        name=item_name,
+        legendgroup=item_name,
+        hovertext=_create_hover_texts(item_type, item_name, data, short_duration),
         hoverinfo="text"
     ))
-
-
-def _add_event_rectangle(fig, start_time, end_time, y_base, y_height, color, opacity=0.8):
-    """Adds a filled rectangle representing an event."""
-    fig.add_shape(
-        type="rect",
-        x0=start_time, x1=end_time,
-        y0=y_base + 0.1, y1=y_height - 0.1,
-        fillcolor=color,
-        opacity=opacity,
-        line=dict(width=1.5, color="black"),
-        layer="above"
-    )
+    return len(data)
 
 
 # ========================== SINGLE ITEM PLOTTING ==========================
@@ -362,21 +356,8 @@ def _plot_single_item(data, item_name, item_type='circuit', color='blue'):
         return f"<h3>No data available for the selected criteria.</h3>"
 
     fig = go.Figure()
-    time_cols = ('Start_Time_c', 'End_Time_c') if item_type == 'circuit' else ('Start_Time_s', 'End_Time_s')
-
-    for _, row in data.iterrows():
-        hover_text = _create_hover_text(item_type, item_name, row)
-        
-        fig.add_trace(go.Scatter(
-            x=[row[time_cols[0]], row[time_cols[0]], row[time_cols[1]], row[time_cols[1]]],
-            y=[0, 1, 1, 0],
-            fill='tozeroy',
-            mode='lines',
-            line=dict(width=2, color=color),
-            name=f"{row[time_cols[0]]} - {row[time_cols[1]]}",
-            hovertext=hover_text,
-            hoverinfo="text"
-        ))
+    _add_timeline_trace(fig, data, item_type, item_name, 0.5, color, opacity=0.5,
+                        height=1, line=dict(width=2, color=color))
 
     fig.update_layout(
         title=f"{item_type.capitalize()} Plot: {item_name}",
@@ -384,6 +365,7 @@ def _plot_single_item(data, item_name, item_type='circuit', color='blue'):
         yaxis=dict(title="State", range=[-0.2, 1.2], tickmode="array", tickvals=[0, 1]),
         showlegend=True,
         hovermode='closest',
+        barmode='overlay',
         height=400,
         margin=dict(l=50, r=30, t=50, b=50),
         autosize=True,
@@ -470,7 +452,6 @@ def _plot_multiple_items(item_data_dict, item_type='circuit', title=None, item_o
     fig = go.Figure()
     colors = ['#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00', '#a65628', '#f781bf', '#999999']
     
-    time_cols = ('Start_Time_c', 'End_Time_c') if item_type == 'circuit' else ('Start_Time_s', 'End_Time_s')
     item_label = item_type.capitalize() + 's'
     
     if not item_data_dict:
@@ -501,24 +482,13 @@ def _plot_multiple_items(item_data_dict, item_type='circuit', title=None, item_o
         for i, item_name in enumerate(item_order):
             color = _get_item_color(item_name, i, colors)
             data = item_data_dict[item_name]
-            y_base, y_height = i, i + 1
+            y_base = i
             
             if data is not None and not data.empty:
-                for j, row in data.iterrows():
-                    if pd.isnull(row[time_cols[0]]) or pd.isnull(row[time_cols[1]]):
-                        continue
-                    
-                    _add_event_rectangle(fig, row[time_cols[0]], row[time_cols[1]], 
-                                       y_base, y_height, color)
-                    
-                    try:
-                        mid_time = _get_safe_midpoint(row[time_cols[0]], row[time_cols[1]])
-                        hover_text = _create_hover_text(item_type, item_name, row)
-                        _add_hover_trace(fig, mid_time, y_base + 0.5, item_name, 
-                                       hover_text, item_name, j == 0)
-                    except Exception as e:
-                        logger.warning(f"Skipping problematic timestamp for {item_type} {item_name}: {str(e)}")
-                        continue
+                try:
+                    _add_timeline_trace(fig, data, item_type, item_name, y_base + 0.5, color)
+                except Exception as e:
+                    logger.warning(f"Skipping problematic timestamps for {item_type} {item_name}: {str(e)}")
             
             _add_item_label(fig, y_base + 0.5, item_name, color)
 
@@ -579,21 +549,8 @@ def _plot_short_duration_single_item(data, item_name, item_type, max_duration, c
         return "<h3>No short-duration events found within the selected criteria.</h3>"
 
     fig = go.Figure()
-    time_cols = ('Start_Time_c', 'End_Time_c') if item_type == 'circuit' else ('Start_Time_s', 'End_Time_s')
-
-    for _, row in data.iterrows():
-        hover_text = _create_hover_text(item_type, item_name, row, {'short_duration': True})
-        
-        fig.add_trace(go.Scatter(
-            x=[row[time_cols[0]], row[time_cols[0]], row[time_cols[1]], row[time_cols[1]]],
-            y=[0, 1, 1, 0],
-            fill='tozeroy',
-            mode='lines',
-            line=dict(width=2, color=color),
-            name=f"{row[time_cols[0]]} - {row[time_cols[1]]}",
-            hovertext=hover_text,
-            hoverinfo="text"
-        ))
+    _add_timeline_trace(fig, data, item_type, item_name, 0.5, color, opacity=0.5,
+                        height=1, line=dict(width=2, color=color), short_duration=True)
 
     fig.update_layout(
         title=f"Short Duration Events (≤ {pd.to_timedelta(max_duration, unit='s')}) for {item_type.capitalize()}: {item_name}",
@@ -607,6 +564,7 @@ def _plot_short_duration_single_item(data, item_name, item_type, max_duration, c
         ),
         showlegend=True,
         hovermode='closest',
+        barmode='overlay',
         height=400,
         margin=dict(l=50, r=30, t=70, b=50),
         autosize=True,
@@ -677,29 +635,17 @@ def _plot_short_duration_multiple_items(item_data_dict, item_type, max_duration,
         for i, item_name in enumerate(item_order):
             color = _get_item_color(item_name, i, colors)
             data = item_data_dict[item_name]
-            y_base, y_height = i, i + 1
+            y_base = i
             
             if data is not None and not data.empty:
                 total_events += len(data)
                 
-                for j, row in data.iterrows():
-                    if pd.isnull(row[time_cols[0]]) or pd.isnull(row[time_cols[1]]):
-                        continue
-                    
-                    duration_sec = _get_safe_duration(row, duration_col, max_duration)
-                    opacity = _calculate_opacity(duration_sec, max_duration)
-                    
-                    _add_event_rectangle(fig, row[time_cols[0]], row[time_cols[1]], 
-                                       y_base, y_height, color, opacity)
-                    
-                    try:
-                        mid_time = _get_safe_midpoint(row[time_cols[0]], row[time_cols[1]])
-                        hover_text = _create_hover_text(item_type, item_name, row, {'short_duration': True})
-                        _add_hover_trace(fig, mid_time, y_base + 0.5, item_name, 
-                                       hover_text, item_name, j == 0)
-                    except Exception as e:
-                        logger.warning(f"Skipping hover for {item_type} {item_name}: {str(e)}")
-                        continue
+                try:
+                    opacity = _calculate_opacities(data, duration_col, time_cols, max_duration)
+                    _add_timeline_trace(fig, data, item_type, item_name, y_base + 0.5, color,
+                                        opacity=opacity, short_duration=True)
+                except Exception as e:
+                    logger.warning(f"Skipping problematic timestamps for {item_type} {item_name}: {str(e)}")
             
             event_count = len(data) if data is not None and not data.empty else 0
             _add_item_label(fig, y_base + 0.5, item_name, color, event_count)
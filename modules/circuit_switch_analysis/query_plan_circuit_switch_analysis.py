@@ -0,0 +1,166 @@
+"""
+Query Plan Module for Circuit and Switch Analysis
+
+This module resolves one analysis request (selected circuits, time window and
+both duration thresholds) in a single pass per circuit. The time-window slice
+of a circuit is found once in the interval index and both the long and the
+short duration partitions are taken from it; every associated switch is
+windowed once and shared by all circuits it belongs to. The plots and the CSV
+export of the same request read from the same plan.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .index_data_circuit_switch_analysis import get_circuit_index, get_switch_index
+
+logger = logging.getLogger(__name__)
+
+# Recent plans, so the CSV export of an analysis reuses the plan of its plot
+MAX_CACHED_PLANS = 8
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+class CircuitQuery:
+    """Intervals of one circuit and its switches within the plan's time window"""
+
+    def __init__(self, name, valid, regular, short, switches, short_switches):
+        self.name = name
+        self.valid = valid
+        self.regular = regular
+        self.short = short
+        self.switches = switches
+        self.short_switches = short_switches
+
+
+class QueryPlan:
+    """Circuit and switch intervals of one analysis request, partitioned by duration"""
+
+    def __init__(self, circuit_df, switch_df, circuit_name, additional_circuits,
+                 from_time, to_time, min_duration, max_duration):
+        self.circuit_df = circuit_df
+        self.switch_df = switch_df
+        self.from_time = from_time
+        self.to_time = to_time
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+
+        self._circuit_index = get_circuit_index(circuit_df)
+        self._switch_index = get_switch_index(switch_df)
+        self._switch_windows = {}
+
+        # The primary circuit always leads; additional circuits must exist and appear once
+        self.circuit_name = circuit_name
+        self.circuit_order = [circuit_name]
+        for name in additional_circuits or []:
+            if name != circuit_name and self._is_valid(name) and name not in self.circuit_order:
+                self.circuit_order.append(name)
+
+        self.circuits = OrderedDict((name, self._query_circuit(name)) for name in self.circuit_order)
+        logger.info(f"Planned {len(self.circuits)} circuits and {len(self._switch_windows)} switches "
+                    f"for {from_time} to {to_time}")
+
+    def _is_valid(self, circuit_name):
+        """Checks that a circuit exists in the indexed data."""
+        return bool(circuit_name) and self._circuit_index is not None and circuit_name in self._circuit_index
+
+    def _query_circuit(self, circuit_name):
+        """Windows one circuit once and partitions the slice and its switches by duration."""
+        if self._is_valid(circuit_name):
+            positions = self._circuit_index.window(circuit_name, self.from_time, self.to_time)
+            regular = self._circuit_index.take(positions, min_duration=self.min_duration)
+            short = self._circuit_index.take(positions, max_duration=self.max_duration)
+        else:
+            regular = short = pd.DataFrame()
+
+        switches, short_switches = OrderedDict(), OrderedDict()
+        switch_names = self._switch_index.switches_for(circuit_name) if self._switch_index and circuit_name else []
+        for switch_name in switch_names:
+            switch_regular, switch_short = self._query_switch(switch_name)
+            if not switch_regular.empty:
+                switches[switch_name] = switch_regular
+            if not switch_short.empty:
+                short_switches[switch_name] = switch_short
+
+        return CircuitQuery(circuit_name, self._is_valid(circuit_name), regular, short, switches, short_switches)
+
+    def _query_switch(self, switch_name):
+        """Windows one switch once, shared by every circuit it is associated with."""
+        if switch_name not in self._switch_windows:
+            positions = self._switch_index.window(switch_name, self.from_time, self.to_time)
+            self._switch_windows[switch_name] = (
+                self._switch_index.take(positions, min_duration=self.min_duration),
+                self._switch_index.take(positions, max_duration=self.max_duration)
+            )
+        return self._switch_windows[switch_name]
+
+    @property
+    def primary(self):
+        """Query of the primary circuit."""
+        return self.circuits[self.circuit_name]
+
+    @property
+    def additional(self):
+        """Queries of the valid additional circuits, in selection order."""
+        return [query for name, query in self.circuits.items() if name != self.circuit_name]
+
+    def circuit_data(self):
+        """Returns circuit name to long duration intervals, in circuit order."""
+        return OrderedDict((name, query.regular) for name, query in self.circuits.items())
+
+    def short_duration_data(self):
+        """Returns circuit name to short duration intervals, circuits without any omitted."""
+        return OrderedDict((name, query.short) for name, query in self.circuits.items() if not query.short.empty)
+
+    def short_duration_switch_data(self):
+        """Returns switch name to short duration intervals over all circuits of the plan."""
+        combined = OrderedDict()
+        for query in self.circuits.values():
+            combined.update(query.short_switches)
+        return combined
+
+
+def get_query_plan(circuit_df, switch_df, circuit_name, additional_circuits,
+                   from_time, to_time, min_duration, max_duration):
+    """
+    Returns the query plan of an analysis request, reusing a recent identical plan.
+
+    Args:
+        circuit_df: Circuit DataFrame
+        switch_df: Switch DataFrame
+        circuit_name: Primary circuit name
+        additional_circuits: List of additional circuit names
+        from_time: Start timestamp
+        to_time: End timestamp
+        min_duration: Minimum duration in seconds for the regular partitions
+        max_duration: Maximum duration in seconds for the short duration partitions
+
+    Returns:
+        QueryPlan
+    """
+    key = (id(circuit_df), id(switch_df), circuit_name, tuple(additional_circuits or ()),
+           pd.Timestamp(from_time), pd.Timestamp(to_time), float(min_duration), float(max_duration))
+
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None and plan.circuit_df is circuit_df and plan.switch_df is switch_df:
+            _plans.move_to_end(key)
+            return plan
+
+    plan = QueryPlan(circuit_df, switch_df, circuit_name, additional_circuits,
+                     from_time, to_time, min_duration, max_duration)
+    with _plans_lock:
+        _plans[key] = plan
+        while len(_plans) > MAX_CACHED_PLANS:
+            _plans.popitem(last=False)
+    return plan
+
+
+def clear_query_plans():
+    """Forgets the cached plans, e.g. after the underlying data was reloaded."""
+    with _plans_lock:
+        _plans.clear()
@@ -16,10 +16,15 @@ from werkzeug.utils import secure_filename
 import traceback
 
 from . import circuit_switch_analysis_bp
-from modules.circuit_switch_analysis.load_data_circuit_switch_analysis import load_data_from_database
+from modules.circuit_switch_analysis.load_data_circuit_switch_analysis import (
+    DEFAULT_STATION, get_unique_circuits, index_analysis_data, load_data_from_database
+)
+from modules.stations import bind_station, get_request_station, station_registry
 from modules.circuit_switch_analysis.filter_data_circuit_switch_analysis import (
-    validate_circuit, filter_circuit_data, filter_short_duration_circuits,
-    get_matching_switches, filter_switch_data, filter_short_duration_switches
+    validate_circuit, filter_short_duration_circuits, get_matching_switches, filter_switch_data
+)
+from modules.circuit_switch_analysis.query_plan_circuit_switch_analysis import (
+    clear_query_plans, get_query_plan
 )
 from modules.circuit_switch_analysis.plot_circuit_switch_analysis import (
     plot_multiple_circuits, plot_multiple_short_duration_circuits,
@@ -36,155 +41,54 @@ logger = logging.getLogger(__name__)
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-circuit_df, switch_df = load_data_from_database()
-
-if circuit_df is None or switch_df is None:
-    logger.critical("Failed to load circuit or switch data.")
-    circuit_df = circuit_df or pd.DataFrame(columns=[
-        'Circuit_name', 'Down_date', 'Down_time', 'Up_date', 'Up_time', 
-        'Duration', 'Start_Time_c', 'End_Time_c', 'Duration_sec_c'
-    ])
-    switch_df = switch_df or pd.DataFrame(columns=[
-        'Switch_name', 'Up_date', 'Up_time', 'Down_date', 'Down_time', 
-        'Duration', 'Start_Time_s', 'End_Time_s', 'Duration_sec_s'
-    ])
+bind_station(circuit_switch_analysis_bp, default=DEFAULT_STATION)
 
-unique_circuits = sorted(circuit_df['Circuit_name'].unique().tolist()) if len(circuit_df) > 0 else []
+# Parsed uploads keyed by (station, file paths and modification times)
+MAX_UPLOADED_DATASETS = 4
+_uploaded_data = OrderedDict()
 
 
+def _file_version(path):
+    """Return the modification time of a file, or None if it does not exist."""
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
 
-# ========================== DATA PROCESSING HELPERS ==========================
 
-def process_regular_circuit_data(circuit_name, additional_circuits, from_time, to_time, min_duration):
-    """
-    Process regular circuit data for specified circuits and time range.
-    
-    Args:
-        circuit_name: Primary circuit name
-        additional_circuits: List of additional circuit names
-        from_time: Start timestamp
-        to_time: End timestamp
-        min_duration: Minimum duration in seconds
-        
-    Returns:
-        Tuple of (all_circuits_data, circuit_order, circuit_colors)
+def get_analysis_data():
     """
-    all_circuits_data = {}
-    circuit_order = [circuit_name]
-    colors = ['#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00', '#a65628', '#f781bf', '#999999']
-    circuit_colors = {}
+    Returns the circuit and switch data the current request works on.
     
-    for c in additional_circuits:
-        if c != circuit_name and validate_circuit(c, circuit_df) and c not in circuit_order:
-            circuit_order.append(c)
+    Uploaded files of the session win; a file that was not uploaded comes from
+    the request's station. Station data is served from the station registry,
+    which loads every station once at startup.
     
-    for i, c_name in enumerate(circuit_order):
-        filtered_data = filter_circuit_data(c_name, circuit_df, from_time, to_time, min_duration)
-        all_circuits_data[c_name] = filtered_data
-        circuit_colors[c_name] = colors[i % len(colors)]
-        
-    return all_circuits_data, circuit_order, circuit_colors
-
-
-def process_short_duration_circuit_data(circuit_order, from_time, to_time, max_duration_seconds):
-    """
-    Process short duration circuit data for specified circuits.
-    
-    Args:
-        circuit_order: List of circuit names
-        from_time: Start timestamp
-        to_time: End timestamp
-        max_duration_seconds: Maximum duration threshold in seconds
-        
     Returns:
-        Dictionary of circuit name to short duration DataFrame
+        Tuple of (circuit_df, switch_df, unique_circuits)
     """
-    all_short_duration_data = {}
+    station = get_request_station(DEFAULT_STATION)
+    if not session.get('using_uploaded_data', False):
+        return station_registry.get_data(station, 'circuit_switch_analysis')
     
-    for c_name in circuit_order:
-        short_duration_data = filter_short_duration_circuits(
-            c_name, circuit_df, from_time, to_time, max_duration_seconds
-        )
-        
-        if not short_duration_data.empty:
-            all_short_duration_data[c_name] = short_duration_data
-            logger.info(f"Added {c_name} with {len(short_duration_data)} short duration events")
+    circuit_path = session.get('circuit_file_path')
+    switch_path = session.get('switch_file_path')
+    key = (station.key, circuit_path, _file_version(circuit_path), switch_path, _file_version(switch_path))
     
-    return all_short_duration_data
-
-
-def process_switch_data(circuit_name, from_time, to_time, min_duration):
-    """
-    Process switch data for specified circuit.
-    
-    Args:
-        circuit_name: Circuit name
-        from_time: Start timestamp
-        to_time: End timestamp
-        min_duration: Minimum duration in seconds
-        
-    Returns:
-        Tuple of (filtered_switches, switch_data_dict) or (None, None)
-    """
-    matching_switches = get_matching_switches(circuit_name, switch_df)
-    
-    if matching_switches is None:
-        return None, None
-    
-    filtered_switches = filter_switch_data(matching_switches, from_time, to_time, min_duration)
-    
-    if filtered_switches is None or filtered_switches.empty:
-        return None, None
-    
-    switch_data_dict = {
-        switch: filtered_switches[filtered_switches['Switch_name'] == switch] 
-        for switch in filtered_switches['Switch_name'].unique()
-    }
-    
-    return filtered_switches, switch_data_dict
-
+    data = _uploaded_data.get(key)
+    if data is None:
+        circuit_df, switch_df = load_data_from_database(
+            circuit_path=circuit_path, switch_path=switch_path, station=station
+        )
+        index_analysis_data(circuit_df, switch_df, station)
+        data = circuit_df, switch_df, get_unique_circuits(circuit_df)
+        _uploaded_data[key] = data
+        while len(_uploaded_data) > MAX_UPLOADED_DATASETS:
+            _uploaded_data.popitem(last=False)
+    return data
 
-def process_short_duration_switch_data(circuit_name, from_time, to_time, max_duration_seconds):
-    """
-    Process short duration switch data for specified circuit.
-    
-    Args:
-        circuit_name: Circuit name
-        from_time: Start timestamp
-        to_time: End timestamp
-        max_duration_seconds: Maximum duration threshold in seconds
-        
-    Returns:
-        Dictionary of switch name to short duration DataFrame or None
-    """
-    matching_switches = get_matching_switches(circuit_name, switch_df)
-    
-    if matching_switches is None:
-        return None
-    
-    short_duration_switches = filter_short_duration_switches(
-        matching_switches, from_time, to_time, max_duration_seconds
-    )
-    
-    if short_duration_switches is None or short_duration_switches.empty:
-        return None
-    
-    short_duration_switch_dict = {}
-    
-    for switch in short_duration_switches['Switch_name'].unique():
-        switch_data = short_duration_switches[short_duration_switches['Switch_name'] == switch]
-        
-        required_cols = ['Start_Time_s', 'End_Time_s', 'Duration_sec_s']
-        if all(col in switch_data.columns for col in required_cols):
-            for col in ['Start_Time_s', 'End_Time_s']:
-                if not pd.api.types.is_datetime64_any_dtype(switch_data[col]):
-                    switch_data[col] = pd.to_datetime(switch_data[col], errors='coerce')
-            
-            if not switch_data.empty:
-                short_duration_switch_dict[switch] = switch_data
-    
-    return short_duration_switch_dict if short_duration_switch_dict else None
 
+# ========================== DATA PROCESSING HELPERS ==========================
 
 def generate_plots(all_circuits_data, circuit_order, all_short_duration_data, 
                    switch_data_dict, short_duration_switch_dict, 
@@ -280,14 +184,7 @@ def create_csv_response(df, filename_prefix):
 @circuit_switch_analysis_bp.route('')
 def index():
     """Render the main circuit analysis page."""
-    global circuit_df, switch_df, unique_circuits
-    
-    if session.get('using_uploaded_data', False):
-        circuit_df, switch_df = load_data_from_database(
-            circuit_path=session.get('circuit_file_path'),
-            switch_path=session.get('switch_file_path')
-        )
-        unique_circuits = sorted(circuit_df['Circuit_name'].unique().tolist()) if circuit_df is not None else []
+    _, _, unique_circuits = get_analysis_data()
     
     return render_template("circuit_switch_feature_global.html", 
                           unique_circuits=unique_circuits,
@@ -324,6 +221,7 @@ def plot():
     short_duration_plots = {}
     short_duration_switch_plots = {}
     error = None
+    circuit_df, switch_df, unique_circuits = get_analysis_data()
 
     if circuit_df is None or len(circuit_df) == 0:
         error = "No circuit data available. Please upload data or check your data source."
@@ -364,49 +262,22 @@ def plot():
                                 selected_details=None,
                                 error=error)
 
-        all_short_duration_switch_data = {}
-
-        all_circuits_data, circuit_order, circuit_colors = process_regular_circuit_data(
-            circuit_name, additional_circuits, from_time, to_time, min_duration
-        )
-        
-        all_short_duration_data = process_short_duration_circuit_data(
-            circuit_order, from_time, to_time, max_duration_seconds
+        plan = get_query_plan(
+            circuit_df, switch_df, circuit_name, additional_circuits,
+            from_time, to_time, min_duration, max_duration_seconds
         )
-        
-        filtered_switches, switch_data_dict = process_switch_data(
-            circuit_name, from_time, to_time, min_duration
-        )
-        
-        short_duration_switch_dict = process_short_duration_switch_data(
-            circuit_name, from_time, to_time, max_duration_seconds
-        )
-        
-        if short_duration_switch_dict:
-            all_short_duration_switch_data.update(short_duration_switch_dict)
+        circuit_order = plan.circuit_order
 
-        for add_circuit in additional_circuits:
-            if add_circuit != circuit_name and validate_circuit(add_circuit, circuit_df):
-                add_filtered_switches, add_switch_data_dict = process_switch_data(
-                    add_circuit, from_time, to_time, min_duration
+        for query in plan.additional:
+            if query.switches:
+                switch_plots[query.name] = plot_multiple_switches(
+                    query.switches, title=f"All Switches for {query.name}"
                 )
-                
-                if add_switch_data_dict:
-                    switch_plots.update({add_circuit: plot_multiple_switches(
-                        add_switch_data_dict, title=f"All Switches for {add_circuit}"
-                    )})
-                
-                add_short_duration_switch_dict = process_short_duration_switch_data(
-                    add_circuit, from_time, to_time, max_duration_seconds
-                )
-                
-                if add_short_duration_switch_dict:
-                    all_short_duration_switch_data.update(add_short_duration_switch_dict)
 
         circuit_plots, switch_plots_main, short_duration_plots, short_duration_switch_plots = generate_plots(
-            all_circuits_data, circuit_order, all_short_duration_data,
-            switch_data_dict, short_duration_switch_dict,
-            all_short_duration_switch_data, circuit_name, max_duration_seconds
+            plan.circuit_data(), circuit_order, plan.short_duration_data(),
+            plan.primary.switches, plan.primary.short_switches,
+            plan.short_duration_switch_data(), circuit_name, max_duration_seconds
         )
         
         switch_plots.update(switch_plots_main)
@@ -466,42 +337,29 @@ def download_csv():
         min_duration_seconds = pd.to_timedelta(min_duration).total_seconds() if min_duration else 0
         max_duration_seconds = pd.to_timedelta(max_duration).total_seconds() if max_duration else 60
         
-        circuit_df, switch_df = load_data_from_database(
-            circuit_path=session.get('circuit_file_path'),
-            switch_path=session.get('switch_file_path')
-        )
+        circuit_df, switch_df, _ = get_analysis_data()
         
         if circuit_df is None or circuit_df.empty:
             flash('No circuit data available.', 'warning')
             return redirect(url_for('circuit_switch_analysis.index'))
         
+        plan = get_query_plan(
+            circuit_df, switch_df, circuit_name, additional_circuits,
+            from_time, to_time, min_duration_seconds, max_duration_seconds
+        )
+        
         csv_handlers = {
-            'short_duration_switches': lambda: collect_short_duration_switch_data(
-                circuit_name, additional_circuits, circuit_df, switch_df, 
-                from_time, to_time, max_duration_seconds
-            ),
-            'circuits': lambda: collect_circuit_data(
-                circuit_name, additional_circuits, circuit_df, 
-                from_time, to_time, min_duration_seconds
-            ),
-            'switches': lambda: collect_switch_data(
-                circuit_name, additional_circuits, circuit_df, switch_df,
-                from_time, to_time, min_duration_seconds
-            ),
-            'short_duration': lambda: collect_short_duration_circuit_data(
-                circuit_name, additional_circuits, circuit_df, 
-                from_time, to_time, max_duration_seconds
-            )
+            'short_duration_switches': collect_short_duration_switch_data,
+            'circuits': collect_circuit_data,
+            'switches': collect_switch_data,
+            'short_duration': collect_short_duration_circuit_data
         }
         
         if data_type in csv_handlers:
-            combined_df = csv_handlers[data_type]()
+            combined_df = csv_handlers[data_type](plan)
             filename_prefix = data_type.replace('_', '_')
         else:
-            csv_data = prepare_csv_data(
-                circuit_name, additional_circuits, circuit_df, switch_df, 
-                from_time, to_time, min_duration_seconds, max_duration_seconds
-            )
+            csv_data = prepare_csv_data(plan)
             combined_df = combine_dataframes_for_csv(csv_data)
             filename_prefix = "railway_circuit_data"
         
@@ -523,18 +381,16 @@ def download_csv():
 @circuit_switch_analysis_bp.route('/api/circuits', methods=['GET'])
 def get_circuits():
     """API endpoint to retrieve available circuits."""
+    _, _, unique_circuits = get_analysis_data()
     return jsonify({"circuits": unique_circuits})
 
 
 @circuit_switch_analysis_bp.route('/refresh_data', methods=['GET'])
 def refresh_data():
     """Reload data from database or uploaded files."""
-    global circuit_df, switch_df, unique_circuits
-    circuit_df, switch_df = load_data_from_database(
-        circuit_path=session.get('circuit_file_path'),
-        switch_path=session.get('switch_file_path')
-    )
-    unique_circuits = sorted(circuit_df['Circuit_name'].unique().tolist()) if circuit_df is not None else []
+    station_registry.invalidate(get_request_station(DEFAULT_STATION), 'circuit_switch_analysis')
+    _uploaded_data.clear()
+    clear_query_plans()
     
     flash("Data has been refreshed", "success")
     return redirect(url_for('circuit_switch_analysis.index'))
@@ -565,7 +421,6 @@ def upload_data():
         flash("Please select at least one CSV file to upload.", "warning")
         return redirect(url_for('circuit_switch_analysis.index'))
     
-    global circuit_df, switch_df, unique_circuits
     success_messages = []
     
     if circuit_file and circuit_file.filename:
@@ -601,24 +456,13 @@ def upload_data():
     if success_messages:
         flash("<br>".join(success_messages), "success")
     
-    circuit_df, switch_df = load_data_from_database(
-        circuit_path=session.get('circuit_file_path'),
-        switch_path=session.get('switch_file_path')
-    )
-    unique_circuits = sorted(circuit_df['Circuit_name'].unique().tolist()) if circuit_df is not None else []
-    
     return redirect(url_for('circuit_switch_analysis.index'))
 
 
 @circuit_switch_analysis_bp.route('/reset_to_default_data')
 def reset_to_default_data():
     """Reset data to default database state."""
-    global circuit_df, switch_df, unique_circuits
-    
     try:
-        circuit_df, switch_df = load_data_from_database()
-        unique_circuits = sorted(circuit_df['Circuit_name'].unique().tolist()) if circuit_df is not None else []
-        
         for key in ['circuit_file_path', 'switch_file_path', 'circuit_file_name', 
                     'switch_file_name', 'using_uploaded_data']:
             session.pop(key, None)
@@ -653,7 +497,8 @@ def debug_app():
 def debug_load():
     """Debug data loading functionality."""
     try:
-        test_circuit_df, test_switch_df = load_data_from_database()
+        test_circuit_df, test_switch_df = load_data_from_database(station=get_request_station(DEFAULT_STATION))
+        unique_circuits = get_unique_circuits(test_circuit_df)
         
         return jsonify({
             "circuit_df_rows": len(test_circuit_df) if test_circuit_df is not None else 0,
@@ -675,6 +520,7 @@ def debug_load():
 def debug_switches():
     """Debug switch data functionality."""
     try:
+        _, switch_df, unique_circuits = get_analysis_data()
         test_circuit = unique_circuits[0] if unique_circuits else "NO_CIRCUIT"
         now = pd.Timestamp.now()
         from_time = now - pd.Timedelta(days=30)
@@ -709,7 +555,7 @@ def debug_switches():
 def debug_switch_data():
     """Debug switch data structure and processing."""
     try:
-        global circuit_df, switch_df
+        circuit_df, switch_df, _ = get_analysis_data()
         
         result = {
             "switch_df_info": {
@@ -759,6 +605,7 @@ def debug_switch_data():
 def debug_short_duration():
     """Debug short duration circuit data processing."""
     try:
+        circuit_df, _, unique_circuits = get_analysis_data()
         circuit_name = request.args.get('circuit', unique_circuits[0] if unique_circuits else "NO_CIRCUIT")
         now = pd.Timestamp.now()
         from_time = now - pd.Timedelta(days=365)
@@ -0,0 +1,11 @@
+"""
+Interval Pipeline
+
+Offline builders for the interval tables the analysis modules read, starting
+from the raw interlocking datalog.
+"""
+from .datalog_intervals import (
+    build_circuit_intervals, build_interval_tables, build_switch_intervals, read_datalog
+)
+from .successor_intervals import build_successor_intervals, read_circuit_adjacency
+from .chain_grouping import assign_chain_ids, build_chain_table, write_chain_artifacts
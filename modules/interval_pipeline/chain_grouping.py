@@ -0,0 +1,296 @@
+"""
+Chain and Net Grouping Module
+
+This module turns successor links (see successor_intervals) into the chain and
+net artifacts the analysis modules read:
+    - chain_seq_dataset.csv / final_sucessor_to_chain_<station>.csv
+      (Net_id, Chain_id, Chain_interval joined with " - ")
+    - <Station>_grouped_chains.json (chains and sub_chain per Net_id)
+    - Net_Group_ID / Chain_ID columns on the circuit interval table
+
+Interval ids are integer-coded and the links stored as a sorted adjacency
+array. A chain is a maximal non-branching path: it starts at every interval
+that is not a plain pass-through (one link in, one link out) and follows
+successors until it reaches the next one, so a junction interval ends one
+chain and starts the next. Chains that share an interval belong to the same
+Net, found with union-find. Both passes are linear in the number of links.
+
+Only intervals with at least one successor link are chained, as in the
+existing artifacts. Successor links point forward in time, but intervals that
+went down at the same moment can link to each other; a cycle made only of
+pass-through intervals has no chain start, so it is broken at its earliest
+interval and kept as one chain.
+"""
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CHAIN_SEQ_SEPARATOR = ' - '
+GROUPED_CHAIN_SEPARATOR = '-'
+
+CHAIN_COLUMNS = ['Net_id', 'Chain_id', 'Chain_intervals', 'Sub_chain']
+
+#######################
+# GRAPH TRAVERSAL     #
+#######################
+
+def _find(parent: List[int], node: int) -> int:
+    """Return the union-find root of node, halving the path on the way."""
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+def _walk_chains(src: np.ndarray, dst: np.ndarray, down: np.ndarray) -> List[List[int]]:
+    """
+    Split the link graph into maximal non-branching paths.
+
+    Args:
+        src: Integer-coded interval of each link
+        dst: Integer-coded successor of each link
+        down: Down time per interval code, used to order branches
+
+    Returns:
+        List of chains as lists of interval codes, including one chain per
+        cycle of pass-through intervals
+    """
+    node_count = len(down)
+    out_degree = np.bincount(src, minlength=node_count)
+    in_degree = np.bincount(dst, minlength=node_count)
+    through = ((in_degree == 1) & (out_degree == 1)).tolist()
+
+    # Adjacency array: successors of node v are targets[offsets[v]:offsets[v + 1]], earliest first
+    order = np.lexsort((down[dst], src))
+    targets = dst[order].tolist()
+    offsets = np.concatenate(([0], np.cumsum(out_degree))).tolist()
+
+    chains = []
+    visited = [False] * node_count
+    for node in np.flatnonzero(~np.asarray(through, dtype=bool)).tolist():
+        visited[node] = True
+        for successor in targets[offsets[node]:offsets[node + 1]]:
+            chain = [node, successor]
+            visited[successor] = True
+            while through[successor]:
+                successor = targets[offsets[successor]]
+                chain.append(successor)
+                visited[successor] = True
+            chains.append(chain)
+
+    # Pass-through intervals left unvisited lie on cycles with no chain start;
+    # break each cycle at its earliest interval
+    for node in np.lexsort((np.arange(node_count), down)).tolist():
+        if visited[node]:
+            continue
+        chain = [node]
+        visited[node] = True
+        successor = targets[offsets[node]]
+        while successor != node:
+            chain.append(successor)
+            visited[successor] = True
+            successor = targets[offsets[successor]]
+        chains.append(chain)
+    return chains
+
+#######################
+# CHAIN TABLE         #
+#######################
+
+def build_chain_table(successors: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the chains and nets of a successor table.
+
+    Chains are numbered by the time their first interval went down and nets
+    by their earliest chain. Where several chains run into the same junction
+    interval, the earliest of them continues into the chains leaving it and
+    the later ones are flagged as sub-chains.
+
+    Args:
+        successors: Successor table from build_successor_intervals
+
+    Returns:
+        DataFrame with CHAIN_COLUMNS, one row per chain, ordered by Chain_id
+    """
+    ids = [successors['Interval_id'], successors['Successor_ID']]
+    times = [successors['Current_Dntime'], successors['Successor_Dntime']]
+
+    codes, interval_ids = pd.factorize(pd.concat(ids, ignore_index=True).astype(str))
+    down = pd.Series(pd.to_datetime(pd.concat(times, ignore_index=True)).to_numpy()).groupby(codes).min()
+    down = down.reindex(np.arange(len(interval_ids))).to_numpy(dtype='datetime64[ns]')
+
+    link_count = len(successors)
+    src, dst = codes[:link_count], codes[link_count:2 * link_count]
+    chains = _walk_chains(src, dst, down)
+
+    # Chain ids follow the down time of the first, then the second interval
+    first = np.array([chain[0] for chain in chains], dtype=np.int64)
+    second = np.array([chain[1] if len(chain) > 1 else chain[0] for chain in chains], dtype=np.int64)
+    order = np.lexsort((down[second], down[first]))
+    chains = [chains[idx] for idx in order]
+
+    # Union-find over intervals; a chain's net is the root of its first interval
+    parent = list(range(len(interval_ids)))
+    for chain in chains:
+        root = _find(parent, chain[0])
+        for node in chain[1:]:
+            other = _find(parent, node)
+            if other != root:
+                parent[other] = root
+    roots = pd.Series([_find(parent, chain[0]) for chain in chains])
+    net_ids = pd.factorize(roots)[0] + 1
+
+    # Later chains running into an occupied junction interval are sub-chains
+    in_degree = np.bincount(dst, minlength=len(interval_ids))
+    last = pd.Series([chain[-1] for chain in chains])
+    merging = (in_degree[last.to_numpy()] > 1) & (pd.Series([len(chain) for chain in chains]) > 1).to_numpy()
+    sub_chain = np.zeros(len(chains), dtype=bool)
+    sub_chain[merging] = last[merging].duplicated().to_numpy()
+
+    labels = interval_ids.to_numpy()
+    chain_table = pd.DataFrame({
+        'Net_id': net_ids,
+        'Chain_id': np.arange(1, len(chains) + 1),
+        'Chain_intervals': [labels[chain].tolist() for chain in chains],
+        'Sub_chain': sub_chain
+    })
+    return chain_table[CHAIN_COLUMNS]
+
+#######################
+# ARTIFACTS           #
+#######################
+
+def chain_sequence_table(chain_table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format chains in the chain_seq_dataset / final_sucessor_to_chain layout.
+
+    Args:
+        chain_table: Chains from build_chain_table
+
+    Returns:
+        DataFrame with Net_id, Chain_id and Chain_interval, ordered by net and chain
+    """
+    sequences = chain_table.sort_values(['Net_id', 'Chain_id'], kind='stable')
+    return pd.DataFrame({
+        'Net_id': sequences['Net_id'].to_numpy(),
+        'Chain_id': sequences['Chain_id'].to_numpy(),
+        'Chain_interval': sequences['Chain_intervals'].str.join(CHAIN_SEQ_SEPARATOR).to_numpy()
+    })
+
+
+def grouped_chains(chain_table: pd.DataFrame) -> List[Dict]:
+    """
+    Format chains in the grouped_chains JSON layout.
+
+    Args:
+        chain_table: Chains from build_chain_table
+
+    Returns:
+        List of {"Net_id", "chains", "sub_chain"} dictionaries ordered by Net_id
+    """
+    groups = []
+    for net_id, net_chains in chain_table.groupby('Net_id', sort=True):
+        group = {"Net_id": int(net_id), "chains": {}, "sub_chain": {}}
+        for chain_id, intervals, is_sub in net_chains[['Chain_id', 'Chain_intervals', 'Sub_chain']].itertuples(
+                index=False, name=None):
+            group["sub_chain" if is_sub else "chains"][str(chain_id)] = GROUPED_CHAIN_SEPARATOR.join(intervals)
+        groups.append(group)
+    return groups
+
+
+def assign_chain_ids(interval_df: pd.DataFrame, chain_table: pd.DataFrame,
+                     net_column: str = 'Net_Group_ID', chain_column: str = 'Chain_ID') -> pd.DataFrame:
+    """
+    Label the chained intervals with their net and chain.
+
+    Intervals that belong to no chain are dropped, and a junction interval
+    belonging to several chains is labelled with the first of them. Rows are
+    ordered by net, chain and position in the chain, as in
+    final_circuit_interval_chain_id_net_id_route_id.csv.
+
+    Args:
+        interval_df: Circuit interval table
+        chain_table: Chains from build_chain_table
+        net_column: Name of the net column (Net_id for the railway visuals tables)
+        chain_column: Name of the chain column (Chain_id for the railway visuals tables)
+
+    Returns:
+        Chained rows of interval_df with the net and chain columns first
+    """
+    members = chain_table[['Net_id', 'Chain_id', 'Chain_intervals']].explode('Chain_intervals')
+    members['position'] = members.groupby('Chain_id').cumcount()
+    members = members.drop_duplicates('Chain_intervals').set_index('Chain_intervals')
+
+    id_column = 'Interval_id' if 'Interval_id' in interval_df.columns else 'Interval ID'
+    labelled = interval_df.drop(columns=[net_column, chain_column], errors='ignore')
+    labelled = labelled[labelled[id_column].astype(str).isin(members.index)]
+    interval_ids = labelled[id_column].astype(str)
+    labelled.insert(0, chain_column, interval_ids.map(members['Chain_id']).astype('Int64').to_numpy())
+    labelled.insert(0, net_column, interval_ids.map(members['Net_id']).astype('Int64').to_numpy())
+
+    position = interval_ids.map(members['position']).to_numpy()
+    order = np.lexsort((position, labelled[chain_column].to_numpy(dtype=np.int64),
+                        labelled[net_column].to_numpy(dtype=np.int64)))
+    return labelled.iloc[order].reset_index(drop=True)
+
+
+def write_chain_artifacts(chain_table: pd.DataFrame, output_dir: str, station: str = 'karimnagar',
+                          interval_df: Optional[pd.DataFrame] = None) -> List[str]:
+    """
+    Write the chain artifacts of one station in their existing file layouts.
+
+    Args:
+        chain_table: Chains from build_chain_table
+        output_dir: Directory to write to
+        station: Station name used in the file names
+        interval_df: Circuit interval table to label with Net_Group_ID/Chain_ID
+
+    Returns:
+        List of written file paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+
+    sequences = chain_sequence_table(chain_table)
+    for name in ('chain_seq_dataset.csv', f'final_sucessor_to_chain_{station.lower()}.csv'):
+        path = os.path.join(output_dir, name)
+        sequences.to_csv(path, index=False)
+        written.append(path)
+
+    path = os.path.join(output_dir, f'{station.capitalize()}_grouped_chains.json')
+    with open(path, 'w') as json_file:
+        json.dump(grouped_chains(chain_table), json_file, indent=4)
+    written.append(path)
+
+    if interval_df is not None:
+        path = os.path.join(output_dir, 'final_circuit_interval_chain_id_net_id_route_id.csv')
+        assign_chain_ids(interval_df, chain_table).to_csv(path, index=False)
+        written.append(path)
+
+    return written
+
+
+def main(argv=None) -> None:
+    """Command line entry point: build chains and nets from a successor table."""
+    parser = argparse.ArgumentParser(description="Group successor links into chains and nets")
+    parser.add_argument('successors', help="Successor interval CSV (see successor_intervals)")
+    parser.add_argument('output_dir', help="Directory to write the chain artifacts to")
+    parser.add_argument('--intervals', help="Circuit interval CSV to label with Net_Group_ID/Chain_ID")
+    parser.add_argument('--station', default='karimnagar', help="Station name used in the file names")
+    args = parser.parse_args(argv)
+
+    successors = pd.read_csv(args.successors, dtype=str)
+    interval_df = pd.read_csv(args.intervals, dtype=str) if args.intervals else None
+
+    chain_table = build_chain_table(successors)
+    for path in write_chain_artifacts(chain_table, args.output_dir, args.station, interval_df):
+        print(f"Wrote {path}")
+    print(f"{len(chain_table)} chains in {chain_table['Net_id'].nunique()} nets")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,530 @@
+"""
+Datalog Interval Builder Module
+
+This module turns a raw interlocking datalog into the circuit and switch
+interval tables the analysis modules read (circuit_intervals_karimnagar.csv,
+switch_intervals_karimnagar.csv). Datalog lines look like:
+
+    SlNo,SIGNAL_NAME,SIGNAL_STATUS,SIGNAL_TIME
+    1,102BTPR,Up,05/15/2025 00:12:18:578
+
+Track circuit relays (TPR/VPR) are occupied between a Down and the next Up.
+Switch detection relays (for example 101NDKR) prove a switch position between
+an Up and the next Down and become switch intervals named like 101_NWKR.
+
+Events are paired without a Python loop: the log is sorted by signal and
+time, and each start event is paired with the next row of the same signal if
+that row is an end. As in the existing tables, a repeated start leaves the
+earlier interval open and a repeated end is ignored. An interval whose start
+precedes the log gets the 1000-01-01 00:00:00 sentinel, one still open at the
+end of the log gets 9999-12-31 23:59:59, and both get a 'Null' duration.
+
+Timestamps follow the existing tables too: circuit tables round them to the
+nearest second, switch tables truncate them and measure durations between
+the truncated times. Switch intervals are numbered in time order of their
+first logged event, circuit intervals by circuit name (ignoring case) and
+down time, counting open and short occupations even when they are dropped.
+The circuit tables are not reproduced row for row. The existing ones drop
+occupations under 11 seconds (pass min_duration to do the same), wrap
+durations of a day or more at 24 hours where these keep the full hours, and
+take a switch position from an interval left open by a repeated Up even
+after the switch was reported in the other position.
+"""
+import argparse
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Raw datalog layout
+DATALOG_COLUMNS = ['SlNo', 'SIGNAL_NAME', 'SIGNAL_STATUS', 'SIGNAL_TIME']
+DATALOG_TIME_FORMAT = '%m/%d/%Y %H:%M:%S:%f'
+
+# Character positions of the fixed-width MM/DD/YYYY HH:MM:SS:mmm layout
+DATALOG_TIME_WIDTH = 23
+DATALOG_TIME_SEPARATORS = {2: '/', 5: '/', 10: ' ', 13: ':', 16: ':', 19: ':'}
+
+# Zero-padded two-digit strings for duration formatting
+TWO_DIGITS = np.array([f'{value:02d}' for value in range(100)])
+_CLOCK_STRINGS: Optional[np.ndarray] = None
+
+# Switch detection relays (<switch><N|R>DKR) and the point-zone circuits they control
+SWITCH_RELAY_PATTERN = r'^(?P<switch>\d+)(?P<position>[NR])DKR$'
+SWITCH_CIRCUIT_PATTERN = r'^(?P<switch>\d+)[AB]TPR$'
+
+# Bounds written for intervals that start before or end after the log
+START_SENTINEL = np.datetime64('1000-01-01T00:00:00', 'ms')
+END_SENTINEL = np.datetime64('9999-12-31T23:59:59', 'ms')
+NULL_DURATION = 'Null'
+
+NO_SWITCH = 'No switch'
+SWITCH_STATUS = {'N': 'Switch position N', 'R': 'Switch position R'}
+
+CIRCUIT_INTERVAL_COLUMNS = [
+    'Interval_id', 'Circuit_name', 'Down_date', 'Down_time', 'Up_date', 'Up_time',
+    'Duration', 'switch_name', 'switch_status'
+]
+SWITCH_INTERVAL_COLUMNS = ['Interval_id', 'Switch_name', 'Up_date', 'Up_time', 'Down_date', 'Down_time', 'Duration']
+
+#######################
+# DATALOG PARSING     #
+#######################
+
+def read_datalog(path: str) -> pd.DataFrame:
+    """
+    Read a raw datalog file.
+
+    Signal names and statuses are read as categoricals so millions of rows
+    stay cheap, and rows whose timestamp cannot be parsed are dropped.
+
+    Args:
+        path: Path to the datalog CSV
+
+    Returns:
+        DataFrame with SIGNAL_NAME, SIGNAL_STATUS and SIGNAL_TIME (datetime64) columns
+    """
+    raw = pd.read_csv(
+        path, usecols=DATALOG_COLUMNS[1:], skipinitialspace=True,
+        dtype={'SIGNAL_NAME': 'category', 'SIGNAL_STATUS': 'category', 'SIGNAL_TIME': str}
+    )
+    return normalize_datalog(raw)
+
+
+def normalize_datalog(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parse the timestamps and statuses of a raw datalog frame.
+
+    Args:
+        raw: DataFrame with SIGNAL_NAME, SIGNAL_STATUS and SIGNAL_TIME string columns
+
+    Returns:
+        DataFrame with categorical names, 'down'/'up' statuses and datetime64 times
+    """
+    times = parse_datalog_times(raw['SIGNAL_TIME'])
+
+    # Normalize the status categories instead of every row
+    statuses = raw['SIGNAL_STATUS'].astype('category')
+    labels = statuses.cat.categories.str.strip().str.lower()
+    label_codes, unique_labels = pd.factorize(labels)
+    codes = statuses.cat.codes.to_numpy()
+    statuses = pd.Categorical.from_codes(np.where(codes >= 0, label_codes[codes], -1), unique_labels)
+
+    log_df = pd.DataFrame({
+        'SIGNAL_NAME': raw['SIGNAL_NAME'].astype('category'),
+        'SIGNAL_STATUS': statuses,
+        'SIGNAL_TIME': times
+    })
+    valid = ~np.isnat(times) & log_df['SIGNAL_STATUS'].isin(['down', 'up']) & log_df['SIGNAL_NAME'].notna()
+    return log_df[valid].reset_index(drop=True)
+
+
+def parse_datalog_times(values: pd.Series) -> np.ndarray:
+    """
+    Parse MM/DD/YYYY HH:MM:SS:mmm timestamps.
+
+    Well-formed values are decoded arithmetically from their fixed-width
+    digits, which is far faster than strptime with the odd millisecond
+    separator. Anything else falls back to pandas with DATALOG_TIME_FORMAT,
+    and unparseable values become NaT.
+
+    Args:
+        values: Series of timestamp strings
+
+    Returns:
+        datetime64[ms] array aligned with values
+    """
+    # One spare byte tells a value of exactly DATALOG_TIME_WIDTH characters from a longer one
+    chars = values.fillna('').to_numpy(dtype=f'S{DATALOG_TIME_WIDTH + 1}')
+    chars = chars.view(np.uint8).reshape(len(values), DATALOG_TIME_WIDTH + 1)
+
+    digit_positions = [pos for pos in range(DATALOG_TIME_WIDTH) if pos not in DATALOG_TIME_SEPARATORS]
+    digits = chars[:, digit_positions].astype(np.int64) - ord('0')
+
+    well_formed = (chars[:, DATALOG_TIME_WIDTH] == 0) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    for pos, separator in DATALOG_TIME_SEPARATORS.items():
+        well_formed &= chars[:, pos] == ord(separator)
+
+    def number(*columns):
+        result = np.zeros(len(digits), dtype=np.int64)
+        for column in columns:
+            result = result * 10 + digits[:, column]
+        return result
+
+    month, day, year = number(0, 1), number(2, 3), number(4, 5, 6, 7)
+    well_formed &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    month_start = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = month_start.astype('datetime64[D]') + (day - 1)
+    # Days past the end of the month roll into the next month; reject them
+    well_formed &= dates.astype('datetime64[M]') == month_start
+
+    times = dates.astype('datetime64[ms]') + (
+        ((number(8, 9) * 60 + number(10, 11)) * 60 + number(12, 13)) * 1000 + number(14, 15, 16)
+    ).astype('timedelta64[ms]')
+
+    if not well_formed.all():
+        fallback = ~well_formed
+        times[fallback] = pd.to_datetime(
+            values[fallback].str.strip(), format=DATALOG_TIME_FORMAT, errors='coerce'
+        ).to_numpy(dtype='datetime64[ms]')
+    return times
+
+#######################
+# EVENT PAIRING       #
+#######################
+
+def pair_events(codes: np.ndarray, is_start: np.ndarray, times: np.ndarray,
+                keep_open: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pair start and end events per signal into intervals.
+
+    Args:
+        codes: Integer signal code per event
+        is_start: True for events that open an interval
+        times: datetime64[ms] time per event
+        keep_open: Emit intervals missing their start or end with sentinel bounds;
+            otherwise they are dropped
+
+    Returns:
+        Tuple of (signal code, start time, end time) arrays, sorted by signal and start
+    """
+    order = np.lexsort((times, codes))
+    codes, is_start, times = codes[order], is_start[order], times[order]
+
+    # A start is closed by the next event of its signal if that is an end
+    new_signal = np.r_[True, codes[1:] != codes[:-1]]
+    last_of_signal = np.r_[new_signal[1:], True]
+    starts = np.flatnonzero(is_start)
+    closed = ~last_of_signal[starts] & ~is_start[np.minimum(starts + 1, len(codes) - 1)]
+
+    interval_codes = [codes[starts[closed]]]
+    start_times = [times[starts[closed]]]
+    end_times = [times[starts[closed] + 1]]
+
+    if keep_open:
+        # End events that open a signal's history started before the log
+        orphan_ends = np.flatnonzero(new_signal & ~is_start)
+        interval_codes.append(codes[orphan_ends])
+        start_times.append(np.full(len(orphan_ends), START_SENTINEL))
+        end_times.append(times[orphan_ends])
+
+        # Starts that are repeated or close a signal's history are left open
+        open_starts = starts[~closed]
+        interval_codes.append(codes[open_starts])
+        start_times.append(times[open_starts])
+        end_times.append(np.full(len(open_starts), END_SENTINEL))
+
+    interval_codes = np.concatenate(interval_codes)
+    start_times = np.concatenate(start_times)
+    end_times = np.concatenate(end_times)
+
+    order = np.lexsort((start_times, interval_codes))
+    return interval_codes[order], start_times[order], end_times[order]
+
+
+def merge_short_gaps(codes: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                     max_gap: pd.Timedelta) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge consecutive intervals of a signal separated by at most max_gap.
+
+    Relay chatter (a Down/Up/Down within a few milliseconds) otherwise splits
+    one occupation into several intervals.
+
+    Args:
+        codes, starts, ends: Intervals sorted by signal and start
+        max_gap: Largest gap that is bridged
+
+    Returns:
+        Tuple of merged (signal code, start time, end time) arrays
+    """
+    if not len(codes):
+        return codes, starts, ends
+    gap = starts[1:] - ends[:-1]
+    new_group = np.r_[True, (codes[1:] != codes[:-1]) | (gap > np.timedelta64(max_gap.to_timedelta64(), 'ms'))]
+    first = np.flatnonzero(new_group)
+    last = np.r_[first[1:] - 1, len(codes) - 1]
+    return codes[first], starts[first], ends[last]
+
+#######################
+# TABLE FORMATTING    #
+#######################
+
+def _split_datetimes(times: np.ndarray, truncate: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """Format datetime64 values (sentinels included) as date and time strings rounded or truncated to seconds."""
+    if truncate:
+        rounded = times.astype('datetime64[s]')
+    else:
+        rounded = np.where(
+            (times == START_SENTINEL) | (times == END_SENTINEL),
+            times, times + np.timedelta64(500, 'ms')
+        ).astype('datetime64[s]')
+    # Format each distinct day once and look clock times up by second of the day
+    days = rounded.astype('datetime64[D]')
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    dates = np.datetime_as_string(unique_days, unit='D')[day_index]
+    clock = _clock_strings()[(rounded - days).astype(np.int64)]
+    return pd.Series(dates), pd.Series(clock)
+
+
+def _clock_strings() -> np.ndarray:
+    """Return 'HH:MM:SS' for every second of a day, built on first use."""
+    global _CLOCK_STRINGS
+    if _CLOCK_STRINGS is None:
+        seconds = np.arange(86400)
+        clock = np.strings.add(np.strings.add(TWO_DIGITS[seconds // 3600], ':'), TWO_DIGITS[seconds // 60 % 60])
+        _CLOCK_STRINGS = np.strings.add(np.strings.add(clock, ':'), TWO_DIGITS[seconds % 60])
+    return _CLOCK_STRINGS
+
+
+def join_datetimes(dates: pd.Series, times: pd.Series) -> np.ndarray:
+    """
+    Parse date and time string columns into datetime64[ms] values.
+
+    NumPy parses the sentinel years that are out of range for pandas timestamps.
+    """
+    return (dates.astype(str) + 'T' + times.astype(str)).to_numpy(dtype=str).astype('datetime64[ms]')
+
+
+def format_durations(starts: np.ndarray, ends: np.ndarray) -> pd.Series:
+    """
+    Format interval durations as HH:MM:SS, truncated to whole seconds.
+
+    Intervals with a sentinel bound get NULL_DURATION. Hours are not wrapped at
+    24, so multi-day intervals stay readable.
+    """
+    seconds = ((ends - starts) // np.timedelta64(1, 's')).astype(np.int64)
+    hours, remainder = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(remainder, 60)
+    hour_text = np.where(hours < 100, TWO_DIGITS[np.clip(hours, 0, 99)], hours.astype(str))
+    durations = np.strings.add(np.strings.add(hour_text, ':'), TWO_DIGITS[minutes])
+    durations = np.strings.add(np.strings.add(durations, ':'), TWO_DIGITS[secs])
+
+    is_open = (starts == START_SENTINEL) | (ends == END_SENTINEL)
+    return pd.Series(np.where(is_open, NULL_DURATION, durations))
+
+
+def _interval_ids(prefix: str, count: int, order: Optional[np.ndarray] = None) -> pd.Series:
+    """Number intervals prefix1 .. prefixN, in row order or in the given order of rows."""
+    numbers = np.arange(1, count + 1)
+    if order is not None:
+        numbers[order] = numbers.copy()
+    return pd.Series(np.strings.add(prefix, numbers.astype(str)))
+
+#######################
+# INTERVAL TABLES     #
+#######################
+
+def build_switch_intervals(log_df: pd.DataFrame, keep_open: bool = True) -> pd.DataFrame:
+    """
+    Build the switch interval table from the switch detection relays of a datalog.
+
+    Args:
+        log_df: Datalog from read_datalog
+        keep_open: Keep intervals cut by the start or end of the log (with sentinels)
+
+    Returns:
+        DataFrame with SWITCH_INTERVAL_COLUMNS, sorted by switch and up time
+    """
+    names = log_df['SIGNAL_NAME'].cat.categories.to_series()
+    relays = names.str.extract(SWITCH_RELAY_PATTERN)
+    relay_names = (relays['switch'] + '_' + relays['position'] + 'WKR').to_numpy()
+
+    codes = log_df['SIGNAL_NAME'].cat.codes.to_numpy()
+    is_relay = relays['switch'].notna().to_numpy()[codes]
+    times = log_df['SIGNAL_TIME'].to_numpy(dtype='datetime64[ms]')
+    # A detection relay proves the position while it is picked up
+    is_start = (log_df['SIGNAL_STATUS'] == 'up').to_numpy()
+
+    codes, starts, ends = pair_events(codes[is_relay], is_start[is_relay], times[is_relay], keep_open)
+
+    # Intervals are numbered by their first logged event, then cut to whole seconds
+    first_event = np.where(starts == START_SENTINEL, ends, starts)
+    starts = starts.astype('datetime64[s]').astype('datetime64[ms]')
+    ends = ends.astype('datetime64[s]').astype('datetime64[ms]')
+    up_date, up_time = _split_datetimes(starts, truncate=True)
+    down_date, down_time = _split_datetimes(ends, truncate=True)
+    switch_df = pd.DataFrame({
+        'Interval_id': _interval_ids('S', len(codes), np.argsort(first_event, kind='stable')),
+        'Switch_name': relay_names[codes],
+        'Up_date': up_date,
+        'Up_time': up_time,
+        'Down_date': down_date,
+        'Down_time': down_time,
+        'Duration': format_durations(starts, ends)
+    })
+    return switch_df
+
+
+def assign_switch_positions(circuit_names: np.ndarray, down_times: np.ndarray,
+                            switch_df: pd.DataFrame,
+                            circuit_switches: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up the switch position in effect when each circuit interval started.
+
+    The position is the one of the latest switch interval of the controlling
+    switch that started at or before the circuit went down (a sorted
+    merge_asof per switch). Circuits without a switch, or before the first
+    detected position, are reported in position N.
+
+    Args:
+        circuit_names: Circuit name per interval
+        down_times: datetime64[ms] start per interval
+        switch_df: Table from build_switch_intervals
+        circuit_switches: Mapping of circuit name to switch number; defaults to
+            circuits matching SWITCH_CIRCUIT_PATTERN whose switch is in switch_df
+
+    Returns:
+        Tuple of (switch_name, switch_status) arrays
+    """
+    switch_names = np.full(len(circuit_names), NO_SWITCH, dtype=object)
+    switch_statuses = np.full(len(circuit_names), SWITCH_STATUS['N'], dtype=object)
+    if switch_df.empty or not len(circuit_names):
+        return switch_names, switch_statuses
+
+    # Parse each distinct switch name once
+    switch_names_cat = switch_df['Switch_name'].astype('category')
+    name_parts = switch_names_cat.cat.categories.to_series().str.extract(r'^(?P<switch>\d+)_(?P<position>[NR])WKR$')
+    switch_parts = name_parts.iloc[switch_names_cat.cat.codes.to_numpy()].reset_index(drop=True)
+    if circuit_switches is None:
+        circuits = pd.Series(np.unique(circuit_names))
+        matched = circuits.str.extract(SWITCH_CIRCUIT_PATTERN)['switch']
+        known = matched.isin(set(switch_parts['switch'].dropna()))
+        circuit_switches = dict(zip(circuits[known], matched[known]))
+
+    controlling = pd.Series(circuit_names).map(circuit_switches)
+    controlled = controlling.notna().to_numpy()
+    if not controlled.any():
+        return switch_names, switch_statuses
+
+    starts = join_datetimes(switch_df['Up_date'], switch_df['Up_time'])
+    positions = pd.DataFrame({
+        'switch': switch_parts['switch'].to_numpy(),
+        'position': switch_parts['position'].to_numpy(),
+        'time': starts.astype(np.int64)
+    }).dropna().sort_values('time', kind='stable')
+
+    lookups = pd.DataFrame({
+        'row': np.flatnonzero(controlled),
+        'switch': controlling[controlled].to_numpy(),
+        'time': down_times[controlled].astype(np.int64)
+    }).sort_values('time', kind='stable')
+
+    matched = pd.merge_asof(lookups, positions, on='time', by='switch', direction='backward')
+    position = matched['position'].fillna('N').to_numpy()
+    rows = matched['row'].to_numpy()
+    switch_names[rows] = matched['switch'].to_numpy() + '_' + position + 'WKR'
+    switch_statuses[rows] = np.where(position == 'R', SWITCH_STATUS['R'], SWITCH_STATUS['N'])
+    return switch_names, switch_statuses
+
+
+def build_circuit_intervals(log_df: pd.DataFrame, switch_df: Optional[pd.DataFrame] = None,
+                            keep_open: bool = False, merge_gap: Optional[pd.Timedelta] = None,
+                            circuit_switches: Optional[Dict[str, str]] = None,
+                            min_duration: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+    """
+    Build the circuit interval table from the track circuit relays of a datalog.
+
+    Args:
+        log_df: Datalog from read_datalog
+        switch_df: Switch intervals used for switch_name/switch_status
+            (built from log_df if omitted)
+        keep_open: Keep occupations cut by the start or end of the log (with sentinels)
+        merge_gap: Merge occupations of a circuit separated by at most this gap
+        circuit_switches: Optional circuit to switch number mapping (see assign_switch_positions)
+        min_duration: Drop closed occupations shorter than this (the existing
+            Karimnagar tables drop those under 11 seconds)
+
+    Returns:
+        DataFrame with CIRCUIT_INTERVAL_COLUMNS, sorted by circuit and down time
+    """
+    names = log_df['SIGNAL_NAME'].cat.categories.to_series()
+    is_relay_name = names.str.match(SWITCH_RELAY_PATTERN).to_numpy()
+
+    codes = log_df['SIGNAL_NAME'].cat.codes.to_numpy()
+    is_circuit = ~is_relay_name[codes]
+    times = log_df['SIGNAL_TIME'].to_numpy(dtype='datetime64[ms]')
+    # A track relay drops when the circuit is occupied
+    is_start = (log_df['SIGNAL_STATUS'] == 'down').to_numpy()
+
+    codes, starts, ends = pair_events(codes[is_circuit], is_start[is_circuit], times[is_circuit])
+    if merge_gap is not None and merge_gap > pd.Timedelta(0):
+        codes, starts, ends = merge_short_gaps(codes, starts, ends, merge_gap)
+
+    # Number occupations like the existing tables: every logged Down in
+    # case-insensitive circuit order, before open or short ones are dropped
+    name_rank = np.argsort(np.argsort(names.str.lower().to_numpy(), kind='stable'))
+    interval_ids = _interval_ids('T', len(codes), np.lexsort((starts, name_rank[codes], starts == START_SENTINEL)))
+
+    is_open = (starts == START_SENTINEL) | (ends == END_SENTINEL)
+    keep = np.ones(len(codes), dtype=bool) if keep_open else ~is_open
+    if min_duration is not None and min_duration > pd.Timedelta(0):
+        keep &= is_open | (ends - starts >= np.timedelta64(min_duration.to_timedelta64(), 'ms'))
+    codes, starts, ends = codes[keep], starts[keep], ends[keep]
+    interval_ids = interval_ids[keep].reset_index(drop=True)
+
+    circuit_names = names.to_numpy()[codes]
+    if switch_df is None:
+        switch_df = build_switch_intervals(log_df)
+    switch_names, switch_statuses = assign_switch_positions(circuit_names, starts, switch_df, circuit_switches)
+
+    down_date, down_time = _split_datetimes(starts)
+    up_date, up_time = _split_datetimes(ends)
+    return pd.DataFrame({
+        'Interval_id': interval_ids,
+        'Circuit_name': circuit_names,
+        'Down_date': down_date,
+        'Down_time': down_time,
+        'Up_date': up_date,
+        'Up_time': up_time,
+        'Duration': format_durations(starts, ends),
+        'switch_name': switch_names,
+        'switch_status': switch_statuses
+    })
+
+
+def build_interval_tables(datalog_path: str, keep_open_circuits: bool = False,
+                          merge_gap: Optional[pd.Timedelta] = None,
+                          min_duration: Optional[pd.Timedelta] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Read a datalog and build both interval tables.
+
+    Args:
+        datalog_path: Path to the raw datalog CSV
+        keep_open_circuits: Keep circuit occupations cut by the log bounds
+        merge_gap: Merge circuit occupations separated by at most this gap
+        min_duration: Drop closed circuit occupations shorter than this
+
+    Returns:
+        Tuple of (circuit_df, switch_df)
+    """
+    log_df = read_datalog(datalog_path)
+    switch_df = build_switch_intervals(log_df)
+    circuit_df = build_circuit_intervals(
+        log_df, switch_df, keep_open_circuits, merge_gap, min_duration=min_duration
+    )
+    return circuit_df, switch_df
+
+
+def main(argv=None) -> None:
+    """Command line entry point: build interval tables from a datalog file."""
+    parser = argparse.ArgumentParser(description="Build circuit and switch interval tables from a raw datalog")
+    parser.add_argument('datalog', help="Raw datalog CSV (SlNo,SIGNAL_NAME,SIGNAL_STATUS,SIGNAL_TIME)")
+    parser.add_argument('circuit_output', help="Circuit interval CSV to write")
+    parser.add_argument('switch_output', help="Switch interval CSV to write")
+    parser.add_argument('--keep-open-circuits', action='store_true',
+                        help="Keep circuit occupations cut by the log bounds, with sentinel dates")
+    parser.add_argument('--merge-gap-ms', type=int, default=0,
+                        help="Merge circuit occupations separated by at most this many milliseconds")
+    parser.add_argument('--min-duration-s', type=float, default=0,
+                        help="Drop circuit occupations shorter than this many seconds (11 matches the existing tables)")
+    args = parser.parse_args(argv)
+
+    merge_gap = pd.Timedelta(milliseconds=args.merge_gap_ms) if args.merge_gap_ms else None
+    min_duration = pd.Timedelta(seconds=args.min_duration_s) if args.min_duration_s else None
+    circuit_df, switch_df = build_interval_tables(args.datalog, args.keep_open_circuits, merge_gap, min_duration)
+    circuit_df.to_csv(args.circuit_output, index=False)
+    switch_df.to_csv(args.switch_output, index=False)
+    print(f"Wrote {len(circuit_df)} circuit intervals and {len(switch_df)} switch intervals")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Successor Interval Engine Module
+
+This module computes the successor table (Karimnagar_successor_intervals.csv)
+from a circuit interval table and the circuit adjacency
+(Kakrimnagar_circuit_adjacency.csv). An interval's successors are the
+intervals of adjacent circuits that went down while it was occupied: after its
+Down and before its Up. They are the links a train leaves behind as it moves
+from one circuit into the next.
+
+Instead of scanning interval pairs, every (interval, adjacent circuit) pair is
+resolved with two sorted merge_asof lookups into that circuit's intervals: the
+first Down after the current Down and the last Down before the end of the
+window. Every interval between the two is a successor, so the whole table
+costs O(n log n) plus the size of the output.
+"""
+import argparse
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+ADJACENCY_COLUMNS = ['Switch_position_N', 'Switch_position_R']
+
+SUCCESSOR_COLUMNS = [
+    'Interval_id', 'Circuit_Name', 'Successor_ID', 'Successor_Track',
+    'Current_Dntime', 'Successor_Dntime', 'Current_Uptime', 'Successor_Uptime'
+]
+
+#######################
+# INPUT PREPARATION   #
+#######################
+
+def read_circuit_adjacency(path: str) -> pd.DataFrame:
+    """
+    Read a circuit adjacency file into one row per adjacent circuit pair.
+
+    Each row of the file lists, per switch position column, the circuits a
+    train can reach from Circuit_Name as a comma-separated string.
+
+    Args:
+        path: Path to the adjacency CSV (Circuit_Name, Switch_position_N, Switch_position_R)
+
+    Returns:
+        DataFrame with Circuit_Name and Successor_Track columns
+    """
+    return adjacency_pairs(pd.read_csv(path, dtype=str))
+
+
+def adjacency_pairs(adjacency_df: pd.DataFrame) -> pd.DataFrame:
+    """Explode the comma-separated adjacency lists into unique circuit pairs."""
+    columns = [column for column in ADJACENCY_COLUMNS if column in adjacency_df.columns]
+    pairs = adjacency_df.melt(id_vars='Circuit_Name', value_vars=columns, value_name='Successor_Track')
+    pairs['Successor_Track'] = pairs['Successor_Track'].str.split(',')
+    pairs = pairs.explode('Successor_Track')
+
+    pairs['Circuit_Name'] = pairs['Circuit_Name'].str.strip()
+    pairs['Successor_Track'] = pairs['Successor_Track'].str.strip()
+    pairs = pairs[pairs['Successor_Track'].notna() & (pairs['Successor_Track'] != '')]
+    return pairs[['Circuit_Name', 'Successor_Track']].drop_duplicates().reset_index(drop=True)
+
+
+def prepare_intervals(interval_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize an interval table for the successor join.
+
+    Accepts both the combined layout (Circuit_Name, Down_timestamp,
+    Up_timestamp) and the split date/time layout written by
+    datalog_intervals. Circuits of the split layout that are controlled by a
+    switch get the N/R position prefix used by the adjacency file.
+
+    Args:
+        interval_df: Circuit interval table
+
+    Returns:
+        DataFrame with Interval_id, Circuit_Name, Down_timestamp and Up_timestamp
+    """
+    df = interval_df.rename(columns={'Interval ID': 'Interval_id', 'Circuit_name': 'Circuit_Name'})
+
+    if 'Down_timestamp' in df.columns:
+        down = pd.to_datetime(df['Down_timestamp'], errors='coerce')
+        up = pd.to_datetime(df['Up_timestamp'], errors='coerce')
+        circuits = df['Circuit_Name'].astype(str)
+    else:
+        down = pd.to_datetime(df['Down_date'] + ' ' + df['Down_time'], errors='coerce')
+        up = pd.to_datetime(df['Up_date'] + ' ' + df['Up_time'], errors='coerce')
+        circuits = df['Circuit_Name'].astype(str)
+        if 'switch_name' in df.columns:
+            controlled = df['switch_name'] != 'No switch'
+            position = df['switch_status'].str[-1]
+            circuits = circuits.where(~controlled, position + circuits)
+
+    intervals = pd.DataFrame({
+        'Interval_id': df['Interval_id'].astype(str),
+        'Circuit_Name': circuits.str.strip(),
+        'Down_timestamp': down,
+        'Up_timestamp': up
+    })
+    # Sentinel or unparseable bounds cannot take part in a time join
+    return intervals.dropna(subset=['Down_timestamp', 'Up_timestamp']).reset_index(drop=True)
+
+#######################
+# SUCCESSOR JOIN      #
+#######################
+
+def build_successor_intervals(interval_df: pd.DataFrame, adjacency: pd.DataFrame,
+                              tolerance: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+    """
+    Pair every interval with the intervals of adjacent circuits that went down during it.
+
+    Args:
+        interval_df: Circuit interval table (see prepare_intervals)
+        adjacency: Circuit pairs from read_circuit_adjacency
+        tolerance: Only link successors that went down within this time of the
+            current Down (the whole occupation if None)
+
+    Returns:
+        DataFrame with SUCCESSOR_COLUMNS, sorted by current and successor down time
+    """
+    intervals = prepare_intervals(interval_df)
+
+    # Candidate successors ranked by (circuit, down time), so one circuit's
+    # intervals inside a time window occupy a contiguous rank range
+    candidates = intervals.sort_values(['Circuit_Name', 'Down_timestamp'], kind='stable').reset_index(drop=True)
+    candidates['rank'] = np.arange(len(candidates))
+    lookup = candidates[['Circuit_Name', 'Down_timestamp', 'rank']].rename(
+        columns={'Circuit_Name': 'Successor_Track', 'Down_timestamp': 'candidate_time'}
+    ).sort_values('candidate_time', kind='stable')
+
+    pairs = intervals.merge(adjacency, on='Circuit_Name')
+    window_end = pairs['Up_timestamp']
+    if tolerance is not None:
+        window_end = window_end.where(window_end <= pairs['Down_timestamp'] + tolerance,
+                                      pairs['Down_timestamp'] + tolerance)
+    pairs['window_end'] = window_end
+    pairs['pair'] = np.arange(len(pairs))
+
+    # First candidate strictly after the current Down
+    first = pd.merge_asof(
+        pairs[['pair', 'Successor_Track', 'Down_timestamp']].sort_values('Down_timestamp', kind='stable'),
+        lookup, left_on='Down_timestamp', right_on='candidate_time', by='Successor_Track',
+        direction='forward', allow_exact_matches=False, tolerance=tolerance
+    ).sort_values('pair')['rank'].to_numpy()
+
+    # Last candidate strictly before the end of the window
+    last = pd.merge_asof(
+        pairs[['pair', 'Successor_Track', 'window_end']].sort_values('window_end', kind='stable'),
+        lookup, left_on='window_end', right_on='candidate_time', by='Successor_Track',
+        direction='backward', allow_exact_matches=False
+    ).sort_values('pair')['rank'].to_numpy()
+
+    found = ~np.isnan(first) & ~np.isnan(last)
+    counts = np.where(found, last - first + 1, 0).clip(min=0).astype(np.int64)
+
+    # Expand each [first, last] rank range into one row per successor
+    pair_idx = np.repeat(np.arange(len(pairs)), counts)
+    range_starts = np.repeat(np.nan_to_num(first).astype(np.int64), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    successor_idx = range_starts + offsets
+
+    current = pairs.iloc[pair_idx]
+    successor = candidates.iloc[successor_idx]
+    successors = pd.DataFrame({
+        'Interval_id': current['Interval_id'].to_numpy(),
+        'Circuit_Name': current['Circuit_Name'].to_numpy(),
+        'Successor_ID': successor['Interval_id'].to_numpy(),
+        'Successor_Track': successor['Circuit_Name'].to_numpy(),
+        'Current_Dntime': current['Down_timestamp'].to_numpy(),
+        'Successor_Dntime': successor['Down_timestamp'].to_numpy(),
+        'Current_Uptime': current['Up_timestamp'].to_numpy(),
+        'Successor_Uptime': successor['Up_timestamp'].to_numpy()
+    })
+    return successors.sort_values(['Current_Dntime', 'Successor_Dntime'], kind='stable').reset_index(drop=True)
+
+
+def main(argv=None) -> None:
+    """Command line entry point: build the successor table from intervals and adjacency."""
+    parser = argparse.ArgumentParser(description="Build the successor interval table from circuit adjacency")
+    parser.add_argument('intervals', help="Circuit interval CSV")
+    parser.add_argument('adjacency', help="Circuit adjacency CSV (Circuit_Name, Switch_position_N, Switch_position_R)")
+    parser.add_argument('output', help="Successor interval CSV to write")
+    parser.add_argument('--tolerance-seconds', type=float, default=None,
+                        help="Only link successors that went down within this many seconds")
+    args = parser.parse_args(argv)
+
+    tolerance = pd.Timedelta(seconds=args.tolerance_seconds) if args.tolerance_seconds else None
+    successors = build_successor_intervals(
+        pd.read_csv(args.intervals, dtype=str), read_circuit_adjacency(args.adjacency), tolerance
+    )
+    successors.to_csv(args.output, index=False)
+    print(f"Wrote {len(successors)} successor links")
+
+
+if __name__ == '__main__':
+    main()
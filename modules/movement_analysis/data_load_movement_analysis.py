@@ -3,13 +3,21 @@ import os
 import logging
 import glob
 
+from modules.stations import MOVEMENT_INTERVALS, ROUTE_CHART, get_explicit_station, station_registry
+
 logger = logging.getLogger(__name__)
 
-_route_circuits_cache = {}
+_route_circuits_cache = {}   # Route chart path -> {route_id: [circuits]}
 _file_type_cache = {}
 
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
 
+# Station file roles used instead of uploads when a request names a station
+STATION_FILE_ROLES = {
+    'route_chart': ROUTE_CHART,
+    'circuit_data': MOVEMENT_INTERVALS
+}
+
 def clear_cache():
     """Clear all caches to force reloading data"""
     global _route_circuits_cache, _file_type_cache
@@ -80,13 +88,38 @@ def has_uploaded_files():
     return any(identify_file_type(file) in ('route_chart', 'circuit_data') 
                for file in get_available_csv_files())
 
+def _station_file(file_type):
+    """
+    Get the file of the station named by the current request.
+    
+    Args:
+        file_type: 'route_chart' or 'circuit_data'
+    
+    Returns:
+        Path to the station's file, or None if no station was named or it has no such file
+    """
+    station = get_explicit_station()
+    role = STATION_FILE_ROLES.get(file_type)
+    if station is None or role is None or not station.has(role):
+        return None
+    return station.path(role)
+
 def has_required_uploads():
     """
     Check if we have the required uploaded files to run the system.
     
+    A request naming a station uses that station's route chart and movement
+    interval files instead of the uploads.
+    
     Returns:
         Tuple of (success: bool, error_message: str)
     """
+    station = get_explicit_station()
+    if station is not None:
+        if station.has(*STATION_FILE_ROLES.values()):
+            return True, ""
+        return False, f"Station '{station.key}' has no route chart and movement interval files."
+    
     route_chart_files = find_files_by_type('route_chart')
     circuit_data_files = find_files_by_type('circuit_data')
     
@@ -106,7 +139,8 @@ def has_required_uploads():
 
 def get_best_file_of_type(file_type):
     """
-    Get the most recent file of a specific type.
+    Get the most recent file of a specific type, or the file of the station
+    named by the request.
     
     Args:
         file_type: 'route_chart' or 'circuit_data'
@@ -114,6 +148,11 @@ def get_best_file_of_type(file_type):
     Returns:
         Path to the most recent matching file or None
     """
+    station_file = _station_file(file_type)
+    if station_file:
+        logger.info(f"Using station {file_type} file: {os.path.basename(station_file)}")
+        return station_file
+    
     matching_files = find_files_by_type(file_type)
     
     if not matching_files:
@@ -161,6 +200,33 @@ def load_routes():
         logger.error(f"Error loading routes: {e}")
         return []
 
+def _read_route_circuits(route_chart_file):
+    """
+    Read route circuits from a route chart file, cached per file.
+    
+    Args:
+        route_chart_file: Path to the route chart CSV
+    
+    Returns:
+        Dictionary mapping route IDs to lists of circuits in sequence
+    """
+    if route_chart_file in _route_circuits_cache:
+        return _route_circuits_cache[route_chart_file]
+    
+    logger.info(f"Loading route circuits from: {route_chart_file}")
+    route_df = pd.read_csv(route_chart_file)
+    
+    route_ids = route_df['Route_id'].astype(str).str.strip()
+    circuit_lists = route_df['Route_circuit'].astype(str).str.split('-')
+    route_circuits = {
+        route_id: [circuit.strip() for circuit in circuits]
+        for route_id, circuits in zip(route_ids, circuit_lists)
+    }
+    
+    logger.info(f"Loaded {len(route_circuits)} route sequences")
+    _route_circuits_cache[route_chart_file] = route_circuits
+    return route_circuits
+
 def get_route_circuits():
     """
     Read and cache route circuits from uploaded files.
@@ -168,9 +234,6 @@ def get_route_circuits():
     Returns:
         Dictionary mapping route IDs to lists of circuits in sequence
     """
-    if _route_circuits_cache:
-        return _route_circuits_cache
-        
     try:
         has_required, error_msg = has_required_uploads()
         if not has_required:
@@ -182,19 +245,22 @@ def get_route_circuits():
             logger.error("Could not find route chart file")
             return {}
         
-        logger.info(f"Loading route circuits from: {route_chart_file}")
-        route_df = pd.read_csv(route_chart_file)
-        
-        route_circuits = {}
-        for _, row in route_df.iterrows():
-            route_id = str(row['Route_id']).strip()
-            circuits = [circuit.strip() for circuit in str(row['Route_circuit']).split('-')]
-            route_circuits[route_id] = circuits
-            
-        logger.info(f"Loaded {len(route_circuits)} route sequences")
-        _route_circuits_cache.update(route_circuits)
-        return _route_circuits_cache
+        return _read_route_circuits(route_chart_file)
         
     except Exception as e:
         logger.error(f"Error reading route circuits: {e}")
         return {}
+
+def load_station_route_circuits(station):
+    """
+    Read a station's route circuits for the station registry.
+    
+    Args:
+        station: Station declaring a route chart file
+    
+    Returns:
+        Dictionary mapping route IDs to lists of circuits in sequence
+    """
+    return _read_route_circuits(station.path(ROUTE_CHART))
+
+station_registry.register_loader('movement_analysis', load_station_route_circuits, roles=(ROUTE_CHART,))
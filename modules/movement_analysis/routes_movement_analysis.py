@@ -13,6 +13,7 @@ from modules.movement_analysis.data_filter_movement_analysis import get_circuit_
 from modules.movement_analysis.plot_movement_analysis import generate_plot
 from .helper_movement_analysis import validate_route_chart_csv, validate_circuit_data_csv
 from .helper_movement_analysis import generate_route_chart_template, generate_Movement_data_template
+from modules.stations import bind_station
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,7 @@ main = Blueprint("main", __name__,
                 template_folder='../templates', 
                 static_folder=None,
                 url_prefix='/movement_analysis')
+bind_station(main)
 
 # Create an uploads directory to store uploaded CSV files
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
@@ -7,6 +7,11 @@ import os
 import logging
 from werkzeug.utils import secure_filename
 
+from modules.stations import (
+    CHAIN_INTERVALS, CHAIN_START_END, NET_INTERVALS, START_END, get_request_station, station_registry
+)
+from .data_visuals import Net
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -28,22 +33,13 @@ DATA_FOLDER = os.environ.get(
     os.path.join(PROJECT_ROOT, 'Data')
 )
 
-DEFAULT_MAIN_DATASET = os.environ.get(
-    "RAILWAY_VISUALS_MAIN_DATA",
-    os.path.join(DATA_FOLDER, 'Circuit_interval_with_net_chain_shunting_karimnagar.csv')
-)
-DEFAULT_SECOND_DATASET = os.environ.get(
-    "RAILWAY_VISUALS_SECOND_DATA",
-    os.path.join(DATA_FOLDER, 'start_end_data_karimnagar.csv')
-)
-DEFAULT_THIRD_DATASET = os.environ.get(
-    "RAILWAY_VISUALS_THIRD_DATA",
-    os.path.join(DATA_FOLDER, 'final_sucessor_to_chain_karimnagar.csv')
-)
-DEFAULT_START_END_DATASET = os.environ.get(
-    "RAILWAY_VISUALS_START_END_DATA",
-    os.path.join(DATA_FOLDER, 'start_end_data_updated.csv')
-)
+# Station file roles behind each dataset slot of the page
+DATASET_ROLES = {
+    'main_file': NET_INTERVALS,
+    'second_file': CHAIN_START_END,
+    'json_file': CHAIN_INTERVALS,
+    'start_end_file': START_END
+}
 
 def check_allowed_file(filename, allowed_extensions=None):
     """
@@ -132,17 +128,14 @@ def use_default_file(file_type):
     Returns:
         tuple: (success, message, filepath)
     """
-    if file_type == 'main_file':
-        default_file = DEFAULT_MAIN_DATASET
-    elif file_type == 'second_file':
-        default_file = DEFAULT_SECOND_DATASET
-    elif file_type == 'json_file' or file_type == 'third_file':
-        default_file = DEFAULT_THIRD_DATASET
-    else:
+    if file_type == 'third_file':
+        file_type = 'json_file'
+    if file_type not in DATASET_ROLES:
         return False, f"Unknown file type: {file_type}", None
+    default_file = get_default_datasets()[file_type]
         
     # Check if default file exists
-    if not os.path.exists(default_file):
+    if not default_file or not os.path.exists(default_file):
         logger.error(f"Default {file_type} not found at {default_file}")
         return False, f"Default {file_type} not found", None
         
@@ -195,17 +188,33 @@ def create_upload_directory():
         logger.error(f"Error creating upload directory: {str(e)}")
         return False
 
-def check_default_data_available():
+def get_default_datasets(station=None):
+    """
+    Get the default file of each dataset slot for a station
+    
+    Args:
+        station (Station): Station to use, the current request's station if None
+        
+    Returns:
+        dict: Slot name to file path (None if the station declares no such file)
+    """
+    station = station or get_request_station()
+    return {slot: station.path(role) for slot, role in DATASET_ROLES.items()}
+
+def check_default_data_available(station=None):
     """
     Check if the default data files are available
     
+    Args:
+        station (Station): Station to check, the current request's station if None
+        
     Returns:
         dict: Status of each default file
     """
+    datasets = get_default_datasets(station)
     status = {
-        "main_file": os.path.exists(DEFAULT_MAIN_DATASET),
-        "json_file": os.path.exists(DEFAULT_THIRD_DATASET),
-        "start_end_file": os.path.exists(DEFAULT_START_END_DATASET)
+        slot: bool(datasets[slot]) and os.path.exists(datasets[slot])
+        for slot in ("main_file", "json_file", "start_end_file")
     }
     
     # We don't require the second file for the application to work
@@ -228,4 +237,49 @@ def check_default_data_available():
         logger.warning(f"Missing required default data files: {missing}")
         logger.info(f"Default data folder path: {DATA_FOLDER}")
     
-    return status
\ No newline at end of file
+    return status
+
+def load_station_net(station):
+    """
+    Build the Net of a station's default files for the station registry
+    
+    Args:
+        station (Station): Station declaring the net interval and chain files
+        
+    Returns:
+        Net: Net with the main, chain and start-end datasets loaded
+    """
+    datasets = get_default_datasets(station)
+    net = Net(main_data_source=datasets['main_file'], second_data_source=None,
+              third_data_source=datasets['json_file'])
+    if datasets['start_end_file'] and os.path.exists(datasets['start_end_file']):
+        net.load_start_end_dataset(datasets['start_end_file'])
+    return net
+
+def get_net(main_file_path, json_file_path, start_end_file_path=None):
+    """
+    Get a Net for a set of files
+    
+    The default files of the request's station are served from the Net the
+    station registry preloaded; any other combination is read on the spot.
+    
+    Args:
+        main_file_path (str): Path of the main dataset
+        json_file_path (str): Path of the chain dataset
+        start_end_file_path (str): Path of the start-end dataset (optional)
+        
+    Returns:
+        Net: Net for the files
+    """
+    station = get_request_station()
+    datasets = get_default_datasets(station)
+    if (main_file_path == datasets['main_file'] and json_file_path == datasets['json_file']
+            and start_end_file_path in (None, datasets['start_end_file'])):
+        return station_registry.get_data(station, 'railway_data_visuals')
+    
+    net = Net(main_file_path, None, json_file_path)
+    if start_end_file_path:
+        net.load_start_end_dataset(start_end_file_path)
+    return net
+
+station_registry.register_loader('railway_data_visuals', load_station_net, roles=(NET_INTERVALS, CHAIN_INTERVALS))
@@ -6,9 +6,9 @@ import json
 from .data_visuals import Net, dataframe_to_html, NumpyEncoder
 from .load_visual_data import (
     handle_file_upload, UPLOAD_FOLDER, ALLOWED_EXTENSIONS,
-    DEFAULT_MAIN_DATASET, DEFAULT_SECOND_DATASET, DEFAULT_THIRD_DATASET,
-    DEFAULT_START_END_DATASET, DATA_FOLDER, check_default_data_available
+    DATA_FOLDER, check_default_data_available, get_default_datasets, get_net
 )
+from modules.stations import bind_station
 from .sample_inputs import get_all_samples
 
 # Configure logging
@@ -17,6 +17,7 @@ logger = logging.getLogger(__name__)
 # Create the blueprint
 railway_data_visuals_bp = Blueprint('railway_data_visuals', __name__, 
                                   template_folder='templates')
+bind_station(railway_data_visuals_bp)
 
 @railway_data_visuals_bp.route('/')
 def index():
@@ -71,11 +72,8 @@ def upload_files():
         # If all files were uploaded successfully, initialize Net and store summary
         if all_success and 'main_file_path' in session and 'json_file_path' in session:
             try:
-                net = Net(session['main_file_path'], None, session['json_file_path'])
-                
-                # Load start-end file if provided
-                if 'start_end_file_path' in session:
-                    net.load_start_end_dataset(session['start_end_file_path'])
+                net = get_net(session['main_file_path'], session['json_file_path'],
+                              session.get('start_end_file_path'))
                     
                 # Handle potential non-JSON serializable objects in the data summary
                 summary = net.data_summary()
@@ -119,7 +117,7 @@ def net_analysis():
     
     # Initialize Net with the uploaded files
     try:
-        net = Net(session['main_file_path'], None, session['json_file_path'])
+        net = get_net(session['main_file_path'], session['json_file_path'])
     except Exception as e:
         logger.error(f"Error initializing Net: {str(e)}")
         return jsonify({
@@ -226,7 +224,7 @@ def get_data_summary():
         })
     
     try:
-        net = Net(session['main_file_path'], None, session['json_file_path'])
+        net = get_net(session['main_file_path'], session['json_file_path'])
         summary = net.data_summary()
         
         # Convert set objects to lists for JSON serialization
@@ -269,24 +267,17 @@ def use_default_data():
                 "message": error_message + f". Data folder: {DATA_FOLDER}"
             }), 404
         
-        # Set session variables to default file paths
-        session['main_file_path'] = DEFAULT_MAIN_DATASET
-        session['json_file_path'] = DEFAULT_THIRD_DATASET
-        session['start_end_file_path'] = DEFAULT_START_END_DATASET
+        # Set session variables to the station's default file paths
+        datasets = get_default_datasets()
+        session['main_file_path'] = datasets['main_file']
+        session['json_file_path'] = datasets['json_file']
+        session['start_end_file_path'] = datasets['start_end_file']
         
-        logger.info(f"Default files set in session: {DEFAULT_MAIN_DATASET}, {DEFAULT_THIRD_DATASET}, {DEFAULT_START_END_DATASET}")
+        logger.info(f"Default files set in session: {datasets['main_file']}, {datasets['json_file']}, {datasets['start_end_file']}")
         
-        # Initialize Net with the default files
+        # Get the station's preloaded Net for the default files
         try:
-            # Using the updated Net class constructor parameters
-            net = Net(
-                main_data_source=DEFAULT_MAIN_DATASET, 
-                second_data_source=None, 
-                third_data_source=DEFAULT_THIRD_DATASET
-            )
-            
-            # Load the start-end dataset
-            net.load_start_end_dataset(DEFAULT_START_END_DATASET)
+            net = get_net(datasets['main_file'], datasets['json_file'], datasets['start_end_file'])
             
             # Get data summary
             summary = net.data_summary()
@@ -368,12 +359,9 @@ def feature_start_end_api():
         # Get Net ID from request
         net_id = data.get('net_id')
         
-        # Initialize Net with the uploaded files
-        net = Net(session['main_file_path'], None, session.get('json_file_path'))
-        
-        # Load start-end dataset
-        if 'start_end_file_path' in session:
-            net.load_start_end_dataset(session['start_end_file_path'])
+        # Get the Net for the session's files, start-end dataset included
+        net = get_net(session['main_file_path'], session.get('json_file_path'),
+                      session['start_end_file_path'])
         
         # Get start-end data for the Net ID
         result_df = net.feature_start_end(net_id)
@@ -11,6 +11,8 @@ import pandas as pd
 from typing import Dict, List, Any, Optional, IO
 from io import StringIO
 
+from modules.stations import CHAIN_SEQUENCES, SHUNTING_INTERVALS, Station, station_registry
+
 logger = logging.getLogger(__name__)
 
 PROJECT_ROOT = os.environ.get(
@@ -23,18 +25,22 @@ DEFAULT_DATA_DIRECTORY = os.environ.get(
     os.path.join(PROJECT_ROOT, 'Data')
 )
 
-DEFAULT_CHAIN_SEQ_FILE = os.environ.get("SHUNTING_VISUALS_CHAIN_SEQ_FILE", 'chain_seq_dataset.csv')
-DEFAULT_INTERVAL_FILE = os.environ.get("SHUNTING_VISUALS_INTERVAL_FILE", 'Circuit_interval_with_net.csv')
-
 class ShuntingDataLoader:
     """Data loader for shunting visuals - handles CSV files, default data, and user uploads"""
     
-    def __init__(self, data_directory: str = None):
+    def __init__(self, data_directory: str = None, station: Station = None):
         env_directory = os.environ.get("SHUNTING_VISUALS_DATA_DIR")
         self.data_directory = data_directory or env_directory or DEFAULT_DATA_DIRECTORY
+        self.station = station or station_registry.get()
+        
+        # An explicitly configured directory is searched before the station's data directories
+        lookup = self.station
+        if data_directory or env_directory:
+            lookup = Station(self.station.key, self.station.name, self.station.files,
+                             [self.data_directory] + self.station.data_directories)
         self.default_files = {
-            'chain_seq': DEFAULT_CHAIN_SEQ_FILE,
-            'interval': DEFAULT_INTERVAL_FILE
+            'chain_seq': lookup.path(CHAIN_SEQUENCES) or '',
+            'interval': lookup.path(SHUNTING_INTERVALS) or ''
         }
     
     def _resolve_file_path(self, filename: str) -> str:
@@ -373,4 +379,28 @@ class ShuntingDataLoader:
             
         except Exception as e:
             logger.error(f"Error getting data info: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+
+
+def load_station_shunting_data(station: Station) -> Dict[str, Any]:
+    """
+    Load a station's default shunting data for the station registry
+    
+    Args:
+        station: Station declaring chain sequence and shunting interval files
+        
+    Returns:
+        Result of ShuntingDataLoader.load_default_data
+        
+    Raises:
+        RuntimeError: If the data could not be loaded, so the failure is not cached
+    """
+    result = ShuntingDataLoader(station=station).load_default_data()
+    if result['status'] != 'success':
+        raise RuntimeError(result['message'])
+    return result
+
+
+station_registry.register_loader(
+    'shunting_visuals', load_station_shunting_data, roles=(CHAIN_SEQUENCES, SHUNTING_INTERVALS)
+)
@@ -8,6 +8,8 @@ import os
 import logging
 import sys
 
+from modules.stations import bind_station, get_request_station, station_registry
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.info("Loading routes_shunting_visuals module...")
@@ -76,6 +78,24 @@ except Exception as e:
     data_loader = None
     processor = None
 
+bind_station(shunting_visuals_bp)
+
+def _load_station_default_data():
+    """
+    Get the default shunting data of the request's station, preloaded by the station registry
+    
+    Returns:
+        Dict in the ShuntingDataLoader.load_default_data layout
+    """
+    try:
+        return station_registry.get_data(get_request_station(), 'shunting_visuals')
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "data": None
+        }
+
 @shunting_visuals_bp.route('/')
 def index():
     """Main shunting visuals dashboard"""
@@ -98,7 +118,7 @@ def get_shunting_data():
         
         # Load default data
         logger.info("Loading default shunting data...")
-        result = data_loader.load_default_data()
+        result = _load_station_default_data()
         
         if result['status'] == 'success':
             # Process the data and get available Net IDs
@@ -247,7 +267,7 @@ def load_default_data_endpoint():
                 "message": "Data loader not available"
             }), 500
             
-        result = data_loader.load_default_data()
+        result = _load_station_default_data()
         
         if result['status'] == 'success':
             # Extract unique Net IDs
@@ -0,0 +1,13 @@
+"""
+Stations
+
+Registry of the stations served by the application and the data files each
+one declares, with parallel warm loading of per-station feature data.
+"""
+from .registry import (
+    CHAIN_INTERVALS, CHAIN_SEQUENCES, CHAIN_START_END, CIRCUIT_ADJACENCY, CIRCUIT_INTERVALS,
+    GROUPED_CHAINS, LIVE_DATALOG, MOVEMENT_INTERVALS, NET_INTERVALS, REPLAY_INTERVALS, ROUTE_CHART,
+    SHUNTING_INTERVALS, START_END, SUCCESSOR_INTERVALS, SWITCH_INTERVALS, TOPOLOGY_EDGES,
+    TOPOLOGY_NODES, Station, StationRegistry, bind_station, get_explicit_station,
+    get_request_station, station_registry
+)
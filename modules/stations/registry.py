@@ -0,0 +1,480 @@
+"""
+Station Registry Module
+
+Every station declares its data files by role (topology, circuit and switch
+intervals, route chart, chains, ...), so the analysis modules ask the registry
+for "the route chart of karimnagar" instead of hard-coding file names.
+
+Modules register a loader per feature. When a process serves its first
+request, the registry runs every loader for every station that declares the
+files it needs in a thread pool, so each station is parsed and indexed once,
+in parallel, and switching stations afterwards is a cache lookup. Warming per
+process (instead of at import) keeps pre-forking servers from inheriting
+futures whose loader threads did not survive the fork; a forked child also
+drops any such futures. A feature whose files a station does not declare is
+refused without running its loader. Features fetch station data through
+get_data, so a request that arrives before its warm-up finished waits for the
+same future instead of starting a second load.
+
+Blueprints take the station as a `station` request parameter (query string,
+form field or JSON body) via bind_station.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Blueprint, current_app, g, has_app_context, has_request_context, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.environ.get(
+    "PROJECT_ROOT",
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+# Registry settings with environment overrides
+DEFAULT_STATION = os.environ.get("DEFAULT_STATION", 'karimnagar')
+STATIONS_CONFIG = os.environ.get("STATIONS_CONFIG")
+WARM_WORKERS = int(os.environ.get("STATION_WARM_WORKERS", 4))
+WARM_ON_STARTUP = os.environ.get("STATION_WARM_ON_STARTUP", 'True') == 'True'
+
+# Request parameter naming the station
+STATION_PARAMETER = 'station'
+
+# Directories searched, in order, for files declared by bare file name
+DATA_DIRECTORIES = [
+    path for path in (
+        os.environ.get("STATION_DATA_DIR"),
+        os.path.join(PROJECT_ROOT, 'Data'),
+        os.path.join(PROJECT_ROOT, 'data'),
+        os.path.join(PROJECT_ROOT, 'uploads'),
+        os.path.join(PROJECT_ROOT, 'uploads', 'railway_data_visuals')
+    ) if path
+]
+
+#######################
+# FILE ROLES          #
+#######################
+
+TOPOLOGY_NODES = 'topology_nodes'
+TOPOLOGY_EDGES = 'topology_edges'
+REPLAY_INTERVALS = 'replay_intervals'          # Circuit intervals with Net_Group_ID/Chain_ID
+CIRCUIT_INTERVALS = 'circuit_intervals'        # Circuit intervals with split date/time columns
+SWITCH_INTERVALS = 'switch_intervals'
+ROUTE_CHART = 'route_chart'
+MOVEMENT_INTERVALS = 'movement_intervals'      # Circuit intervals with Movement_id/Route_id
+NET_INTERVALS = 'net_intervals'                # Circuit intervals with Net_id/Chain_id/shunting_status
+SHUNTING_INTERVALS = 'shunting_intervals'
+CHAIN_SEQUENCES = 'chain_sequences'
+CHAIN_INTERVALS = 'chain_intervals'
+GROUPED_CHAINS = 'grouped_chains'
+START_END = 'start_end'
+CHAIN_START_END = 'chain_start_end'
+CIRCUIT_ADJACENCY = 'circuit_adjacency'
+SUCCESSOR_INTERVALS = 'successor_intervals'
+LIVE_DATALOG = 'live_datalog'                  # Raw signal datalog followed by the live replay
+
+# Module-specific environment variables that still override a station file
+LEGACY_FILE_ENV = {
+    ('gandhipuram', CIRCUIT_INTERVALS): 'PHASE1_CIRCUIT_DATA_PATH',
+    ('gandhipuram', SWITCH_INTERVALS): 'PHASE1_SWITCH_DATA_PATH',
+    ('karimnagar', NET_INTERVALS): 'RAILWAY_VISUALS_MAIN_DATA',
+    ('karimnagar', CHAIN_START_END): 'RAILWAY_VISUALS_SECOND_DATA',
+    ('karimnagar', CHAIN_INTERVALS): 'RAILWAY_VISUALS_THIRD_DATA',
+    ('karimnagar', START_END): 'RAILWAY_VISUALS_START_END_DATA',
+    ('karimnagar', CHAIN_SEQUENCES): 'SHUNTING_VISUALS_CHAIN_SEQ_FILE',
+    ('karimnagar', SHUNTING_INTERVALS): 'SHUNTING_VISUALS_INTERVAL_FILE'
+}
+
+# Built-in station declarations; STATIONS_CONFIG can add stations or override files
+STATION_DECLARATIONS = {
+    'karimnagar': {
+        'name': 'Karimnagar',
+        'files': {
+            TOPOLOGY_NODES: 'nodes.csv',
+            TOPOLOGY_EDGES: 'edges.csv',
+            REPLAY_INTERVALS: 'final_circuit_interval_chain_id_net_id_route_id.csv',
+            CIRCUIT_INTERVALS: 'circuit_intervals_karimnagar.csv',
+            SWITCH_INTERVALS: 'switch_intervals_karimnagar.csv',
+            ROUTE_CHART: 'Route_chart_Karimnagar.csv',
+            MOVEMENT_INTERVALS: 'movement_interval_Karimnagar.csv',
+            NET_INTERVALS: 'Circuit_interval_with_net_chain_shunting_karimnagar.csv',
+            SHUNTING_INTERVALS: 'Circuit_interval_with_net.csv',
+            CHAIN_SEQUENCES: 'chain_seq_dataset.csv',
+            CHAIN_INTERVALS: 'final_sucessor_to_chain_karimnagar.csv',
+            GROUPED_CHAINS: 'Karimnagar_grouped_chains.json',
+            START_END: 'start_end_data_updated.csv',
+            CHAIN_START_END: 'karimnagar_start_end_data.csv',
+            CIRCUIT_ADJACENCY: 'Kakrimnagar_circuit_adjacency.csv',
+            SUCCESSOR_INTERVALS: 'Karimnagar_successor_intervals.csv'
+        }
+    },
+    'gandhipuram': {
+        'name': 'Gandhipuram',
+        'files': {
+            CIRCUIT_INTERVALS: 'circuit_interval_Gandhipuram.csv',
+            SWITCH_INTERVALS: 'switch_interval_Gandhipuram.csv',
+            ROUTE_CHART: 'Route_chart_Gandhipuram.csv',
+            MOVEMENT_INTERVALS: 'movement_interval_Gandhipuram.csv'
+        }
+    }
+}
+
+#######################
+# STATIONS            #
+#######################
+
+class Station:
+    """One station and the data files it declares, by role"""
+
+    def __init__(self, key: str, name: str, files: Dict[str, str],
+                 data_directories: Optional[List[str]] = None):
+        self.key = key
+        self.name = name
+        self.files = dict(files)
+        self.data_directories = data_directories or DATA_DIRECTORIES
+
+    def path(self, role: str) -> Optional[str]:
+        """
+        Resolve the file a station declares for a role.
+
+        STATION_<KEY>_<ROLE> (and the legacy module variables) override the
+        declaration. Bare file names are searched in the data directories,
+        ignoring case.
+
+        Args:
+            role: File role, e.g. ROUTE_CHART
+
+        Returns:
+            Path of the file (which may not exist), or None if the role is not declared
+        """
+        override = os.environ.get(f"STATION_{self.key.upper()}_{role.upper()}")
+        legacy_env = LEGACY_FILE_ENV.get((self.key, role))
+        if not override and legacy_env:
+            override = os.environ.get(legacy_env)
+
+        filename = override or self.files.get(role)
+        if not filename:
+            return None
+        if os.path.isabs(filename):
+            return filename
+
+        for directory in self.data_directories:
+            candidate = os.path.join(directory, filename)
+            if os.path.exists(candidate):
+                return candidate
+            if os.path.isdir(directory):
+                for entry in os.listdir(directory):
+                    if entry.lower() == filename.lower():
+                        return os.path.join(directory, entry)
+
+        return os.path.join(self.data_directories[0], filename)
+
+    def require(self, role: str) -> str:
+        """
+        Resolve the file for a role, failing if it is not declared or missing.
+
+        Raises:
+            FileNotFoundError: If the station has no such file
+        """
+        path = self.path(role)
+        if path is None:
+            raise FileNotFoundError(f"Station '{self.key}' declares no {role} file")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{role} file of station '{self.key}' not found: {path}")
+        return path
+
+    def has(self, *roles: str) -> bool:
+        """Return True if every role is declared and its file exists."""
+        paths = [self.path(role) for role in roles]
+        return all(path is not None and os.path.exists(path) for path in paths)
+
+    def describe(self) -> Dict[str, Any]:
+        """Describe the station and the availability of its files."""
+        return {
+            "key": self.key,
+            "name": self.name,
+            "files": {role: self.path(role) for role in sorted(self.files)},
+            "available": {role: self.has(role) for role in sorted(self.files)}
+        }
+
+
+class StationRegistry:
+    """Declared stations plus per-station feature data, loaded in a thread pool"""
+
+    def __init__(self, stations: Dict[str, Station], default_key: str, max_workers: int = WARM_WORKERS):
+        self.stations = stations
+        self.default_key = default_key if default_key in stations else next(iter(stations))
+        self.max_workers = max_workers
+        self.app = None
+
+        self._loaders: Dict[str, Tuple[Callable[[Station], Any], Tuple[str, ...]]] = {}
+        self._results: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._warmed_pid: Optional[int] = None
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def get(self, key: Optional[str] = None) -> Station:
+        """
+        Look up a station by key, the default station if key is None.
+
+        Raises:
+            KeyError: If no such station is declared
+        """
+        key = (key or self.default_key).lower()
+        if key not in self.stations:
+            raise KeyError(f"Unknown station: {key}")
+        return self.stations[key]
+
+    def keys(self) -> List[str]:
+        """Return the declared station keys."""
+        return list(self.stations)
+
+    #######################
+    # LOADERS             #
+    #######################
+
+    def register_loader(self, name: str, loader: Callable[[Station], Any], roles: Sequence[str] = ()) -> None:
+        """
+        Register a feature loader.
+
+        Args:
+            name: Feature name used with get_data
+            loader: Function taking a Station and returning its parsed, indexed data
+            roles: File roles the loader needs; stations missing one are not warmed
+        """
+        self._loaders[name] = (loader, tuple(roles))
+
+    def has_data(self, station: Station, name: str) -> bool:
+        """Return True if a station has every file the feature's loader needs."""
+        _, roles = self._loaders[name]
+        return station.has(*roles)
+
+    def init_app(self, app) -> None:
+        """Attach the registry to the app and warm every station on each process's first request unless disabled."""
+        self.app = app
+        app.extensions['station_registry'] = self
+        if WARM_ON_STARTUP:
+            app.before_request(self._warm_process)
+
+    def _warm_process(self) -> None:
+        """Start the warm-up once per process."""
+        if self._warmed_pid == os.getpid():
+            return
+        with self._lock:
+            if self._warmed_pid == os.getpid():
+                return
+            self._warmed_pid = os.getpid()
+        self.warm()
+
+    def _reset_after_fork(self) -> None:
+        """Forget the parent's loads; their threads do not exist in a forked child."""
+        self._lock = threading.Lock()
+        self._results = {}
+        self._executor = None
+
+    def warm(self) -> List[Future]:
+        """
+        Start every registered loader for every station that has its files.
+
+        Returns:
+            Futures of the started loads
+        """
+        futures = []
+        for station in self.stations.values():
+            for name, (_, roles) in self._loaders.items():
+                if station.has(*roles):
+                    futures.append(self._submit(station, name))
+        logger.info(f"Warming {len(futures)} station datasets with {self.max_workers} workers")
+        return futures
+
+    def get_data(self, station: Station, name: str) -> Any:
+        """
+        Return a station's data for a feature, loading it if it is not warm.
+
+        Failed loads are not cached, so the next call tries again. A station
+        missing one of the loader's files is refused without running it.
+
+        Args:
+            station: Station to load
+            name: Feature name of a registered loader
+
+        Returns:
+            Whatever the loader returned
+
+        Raises:
+            FileNotFoundError: If the station lacks a file the loader needs
+        """
+        _, roles = self._loaders[name]
+        missing = [role for role in roles if not station.has(role)]
+        if missing:
+            raise FileNotFoundError(f"Station '{station.key}' has no {', '.join(missing)} file")
+
+        future = self._submit(station, name)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._results.get((station.key, name)) is future:
+                    del self._results[(station.key, name)]
+            raise
+
+    def invalidate(self, station: Optional[Station] = None, name: Optional[str] = None) -> None:
+        """Forget loaded data, for one station and/or feature or everything."""
+        with self._lock:
+            for key in list(self._results):
+                if (station is None or key[0] == station.key) and (name is None or key[1] == name):
+                    del self._results[key]
+
+    def _submit(self, station: Station, name: str) -> Future:
+        """Return the future of a station's feature data, starting the load if needed."""
+        loader, _ = self._loaders[name]
+        with self._lock:
+            future = self._results.get((station.key, name))
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='station-loader')
+                app = self.app
+                if app is None and has_app_context():
+                    app = current_app._get_current_object()
+                future = self._executor.submit(self._run, app, station, name, loader)
+                self._results[(station.key, name)] = future
+            return future
+
+    @staticmethod
+    def _run(app, station: Station, name: str, loader: Callable[[Station], Any]) -> Any:
+        """Run a loader inside an app context and log the outcome."""
+        try:
+            if app is None:
+                result = loader(station)
+            else:
+                with app.app_context():
+                    result = loader(station)
+            logger.info(f"Loaded {name} data for station {station.key}")
+            return result
+        except Exception as e:
+            logger.error(f"Error loading {name} data for station {station.key}: {str(e)}")
+            raise
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the stations and the state of every load."""
+        with self._lock:
+            loads = {
+                f"{station_key}/{name}": (
+                    'loading' if not future.done() else 'failed' if future.exception() else 'ready'
+                )
+                for (station_key, name), future in self._results.items()
+            }
+        return {
+            "default_station": self.default_key,
+            "stations": [station.describe() for station in self.stations.values()],
+            "loaders": list(self._loaders),
+            "loads": loads
+        }
+
+
+def load_station_declarations(config_path: Optional[str] = STATIONS_CONFIG) -> Dict[str, Station]:
+    """
+    Build the declared stations, merging the optional JSON config file.
+
+    The config maps station keys to {"name": ..., "files": {role: file}};
+    files of a built-in station are merged with its declaration.
+
+    Args:
+        config_path: Path of the JSON config file, or None
+
+    Returns:
+        Dictionary of station key to Station
+    """
+    declarations = {key: {'name': value['name'], 'files': dict(value['files'])}
+                    for key, value in STATION_DECLARATIONS.items()}
+
+    if config_path:
+        try:
+            with open(config_path) as config_file:
+                config = json.load(config_file)
+            for key, value in config.items():
+                declaration = declarations.setdefault(key.lower(), {'name': key, 'files': {}})
+                declaration['name'] = value.get('name', declaration['name'])
+                declaration['files'].update(value.get('files', {}))
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading station config {config_path}: {str(e)}")
+
+    return {key: Station(key, value['name'], value['files']) for key, value in declarations.items()}
+
+
+# Process-wide registry shared by every blueprint
+station_registry = StationRegistry(load_station_declarations(), DEFAULT_STATION)
+
+#######################
+# REQUEST BINDING     #
+#######################
+
+def _requested_station_key() -> Optional[str]:
+    """Return the station named by the current request, if any."""
+    key = request.args.get(STATION_PARAMETER) or request.form.get(STATION_PARAMETER)
+    if not key and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            key = body.get(STATION_PARAMETER)
+    return str(key).strip().lower() if key else None
+
+
+def bind_station(blueprint: Blueprint, default: Optional[str] = None) -> None:
+    """
+    Give every route of a blueprint a `station` parameter.
+
+    The station is resolved before each request and stored on flask.g; an
+    unknown station is answered with a 404. URLs built with url_for inside
+    the blueprint keep an explicitly requested station.
+
+    Args:
+        blueprint: Blueprint to bind
+        default: Station used when the request names none (registry default if None)
+    """
+    @blueprint.before_request
+    def _resolve_station():
+        key = _requested_station_key()
+        try:
+            g.station = station_registry.get(key or default)
+        except KeyError:
+            return jsonify({
+                "status": "error",
+                "error": f"Unknown station: {key}",
+                "stations": station_registry.keys()
+            }), 404
+        g.station_explicit = key is not None
+
+    @blueprint.url_defaults
+    def _keep_station(endpoint, values):
+        if g.get('station_explicit') and STATION_PARAMETER not in values:
+            values[STATION_PARAMETER] = g.station.key
+
+
+def get_request_station(default: Optional[str] = None) -> Station:
+    """
+    Return the station of the current request.
+
+    Args:
+        default: Station used outside a bound request (registry default if None)
+
+    Returns:
+        Station resolved by bind_station, or the default
+    """
+    if has_request_context() and g.get('station') is not None:
+        return g.station
+    return station_registry.get(default)
+
+
+def get_explicit_station() -> Optional[Station]:
+    """Return the station of the current request only if the request named one."""
+    if has_request_context() and g.get('station_explicit'):
+        return g.station
+    return None
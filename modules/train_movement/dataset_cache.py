@@ -0,0 +1,320 @@
+"""
+Train Movement Dataset Cache Module
+
+This module keeps parsed train movement datasets in memory for the lifetime of
+the process. Entries are keyed by the (path, size, mtime) signature of every
+source file, so default files in Data/ and per-session uploads share one cache
+and an edited or re-uploaded file is picked up automatically on the next request.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Cache limits with environment overrides
+DEFAULT_MAX_ENTRIES = int(os.environ.get("TRAIN_MOVEMENT_CACHE_MAX_ENTRIES", 8))
+DEFAULT_MAX_BYTES = int(os.environ.get("TRAIN_MOVEMENT_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+# Derived indexes shared between datasets and bounded by their own cache
+SHARED_INDEXES = frozenset({'topology'})
+
+FileSignature = Tuple[str, int, int]
+DatasetKey = Tuple[FileSignature, ...]
+
+
+def file_signature(path: str) -> FileSignature:
+    """
+    Build the cache signature for a single file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Tuple of (absolute path, size in bytes, modification time in ns)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def dataset_key(*paths: str) -> DatasetKey:
+    """Build the cache key for a dataset made up of several files."""
+    return tuple(file_signature(path) for path in paths)
+
+
+def _frame_bytes(df: Optional[pd.DataFrame]) -> int:
+    """Estimate the in-memory size of a DataFrame."""
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def estimate_nbytes(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """
+    Estimate the memory held by a derived structure.
+
+    Arrays and frames report their buffer sizes; containers and plain objects
+    are walked so nested arrays, keyframes and masks are counted. Objects are
+    counted once however often they are referenced.
+
+    Args:
+        obj: Structure to measure
+        exclude: Objects that are already accounted for elsewhere (not counted)
+
+    Returns:
+        Approximate size in bytes
+    """
+    seen = {id(item) for item in exclude}
+    pending = [obj]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if item is None or id(item) in seen:
+            continue
+        seen.add(id(item))
+
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            total += int(item.memory_usage(index=True, deep=True).sum())
+        elif isinstance(item, np.ndarray):
+            total += item.nbytes
+            if item.dtype == object:
+                pending.extend(item.ravel())
+        elif isinstance(item, dict):
+            total += sys.getsizeof(item)
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(item)
+            pending.extend(item)
+        elif isinstance(item, type):
+            continue
+        else:
+            total += sys.getsizeof(item)
+            attributes = getattr(item, '__dict__', None)
+            if isinstance(attributes, dict):
+                pending.extend(attributes.values())
+    return total
+
+
+class TrainMovementDataset:
+    """Parsed nodes, edges, circuit intervals and event log for one set of source files"""
+
+    def __init__(self, nodes_df: pd.DataFrame, edges_df: pd.DataFrame,
+                 log_df: pd.DataFrame, circuit_df: pd.DataFrame):
+        self.nodes_df = nodes_df
+        self.edges_df = edges_df
+        self.log_df = log_df
+        self.circuit_df = circuit_df
+        self.indexes: Dict[str, Any] = {}
+        self._index_lock = threading.Lock()
+        self._keyed_lock = threading.Lock()
+        self._index_nbytes: Dict[Hashable, int] = {}
+        self.frame_nbytes = sum(_frame_bytes(df) for df in (nodes_df, edges_df, log_df, circuit_df))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the frames and the derived indexes built so far.
+
+        Index sizes are estimated once when each index is built. Indexes in
+        SHARED_INDEXES (the topology) are held by their own cache and excluded.
+        """
+        return self.frame_nbytes + sum(self._index_nbytes.values())
+
+    def _measure(self, index: Any) -> int:
+        """Estimate an index's size without counting the dataset's own frames."""
+        return estimate_nbytes(index, exclude=self.as_tuple())
+
+    def get_index(self, name: str, builder: Callable[["TrainMovementDataset"], Any]) -> Any:
+        """
+        Return a derived structure for this dataset, building it on first use.
+
+        Args:
+            name: Name of the derived structure
+            builder: Function taking the dataset and returning the structure
+
+        Returns:
+            The cached or newly built structure
+        """
+        if name in self.indexes:
+            return self.indexes[name]
+
+        with self._index_lock:
+            if name not in self.indexes:
+                index = builder(self)
+                if name not in SHARED_INDEXES:
+                    self._index_nbytes[name] = self._measure(index)
+                self.indexes[name] = index
+            return self.indexes[name]
+
+    def get_keyed_index(self, name: str, key: Hashable, builder: Callable[[], Any], max_entries: int) -> Any:
+        """
+        Return one entry of a per-key LRU of derived structures, building it on a miss.
+
+        The LRU is shared by request threads, so lookups, inserts and evictions
+        happen under a lock. The builder runs outside it; if two threads build
+        the same key at once, the first result stored is kept.
+
+        Args:
+            name: Name of the derived structure family (for example 'replay_timelines')
+            key: Hashable key of the entry, such as a replay filter key
+            builder: Function returning the entry
+            max_entries: Number of entries kept, least recently used dropped first
+
+        Returns:
+            The cached or newly built entry
+        """
+        entries = self.get_index(name, lambda _: OrderedDict())
+        with self._keyed_lock:
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                return entry
+
+        entry = builder()
+        entry_nbytes = self._measure(entry)
+
+        with self._keyed_lock:
+            if key not in entries:
+                entries[key] = entry
+                self._index_nbytes[(name, key)] = entry_nbytes
+            entry = entries[key]
+            entries.move_to_end(key)
+            while len(entries) > max_entries:
+                evicted_key, _ = entries.popitem(last=False)
+                self._index_nbytes.pop((name, evicted_key), None)
+            return entry
+
+    def as_tuple(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Return the frames in the order used by load_and_process_data."""
+        return self.nodes_df, self.edges_df, self.log_df, self.circuit_df
+
+
+class DatasetCache:
+    """Thread-safe LRU cache of TrainMovementDataset objects with an entry and memory cap"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[DatasetKey, TrainMovementDataset]" = OrderedDict()
+        self._loading: Dict[DatasetKey, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    @property
+    def total_bytes(self) -> int:
+        """Approximate memory held by all cached datasets."""
+        return sum(dataset.nbytes for dataset in self._entries.values())
+
+    def get(self, key: DatasetKey) -> Optional[TrainMovementDataset]:
+        """Return the dataset for key and mark it most recently used."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: DatasetKey, dataset: TrainMovementDataset) -> None:
+        """Store a dataset and evict least recently used entries over the limits."""
+        with self._lock:
+            self._store(key, dataset)
+
+    def get_or_load(self, paths: Tuple[str, ...],
+                    loader: Callable[..., TrainMovementDataset]) -> TrainMovementDataset:
+        """
+        Return the cached dataset for paths, loading it on a miss.
+
+        Loading is single-flight: a thread that misses while another thread is
+        already parsing the same files waits for that load instead of parsing
+        them again. A failed load is not cached; every waiter sees its error.
+
+        Args:
+            paths: Source file paths that make up the dataset
+            loader: Function called with the paths to parse the dataset
+
+        Returns:
+            The cached or newly loaded dataset
+        """
+        key = dataset_key(*paths)
+        with self._lock:
+            dataset = self._lookup(key)
+            if dataset is not None:
+                return dataset
+            future = self._loading.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = self._loading[key] = Future()
+
+        if not is_loader:
+            return future.result()
+
+        try:
+            dataset = loader(*paths)
+        except BaseException as error:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            self._store(key, dataset)
+            del self._loading[key]
+        future.set_result(dataset)
+        return dataset
+
+    def clear(self) -> None:
+        """Drop every cached dataset."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters for diagnostics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _reset_after_fork(self) -> None:
+        """Drop loads in flight at fork time; their threads do not exist in a forked child."""
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def _lookup(self, key: DatasetKey) -> Optional[TrainMovementDataset]:
+        """Find a dataset, count the hit or miss and re-apply the limits; caller holds the lock."""
+        dataset = self._entries.get(key)
+        if dataset is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Derived indexes grow after a dataset is stored, so the memory cap is re-checked on use
+        self._evict()
+        return dataset
+
+    def _store(self, key: DatasetKey, dataset: TrainMovementDataset) -> None:
+        """Store a dataset as most recently used and evict over the limits; caller holds the lock."""
+        self._entries[key] = dataset
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently used entries, always keeping the newest one."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+
+# Process-wide cache shared by default and uploaded datasets
+dataset_cache = DatasetCache()
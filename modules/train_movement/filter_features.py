@@ -4,11 +4,73 @@ Railway Visualization Filter Features Module
 This module provides filtering functionality for railway visualization data,
 including datetime filtering, route filtering, and related utility functions.
 """
+import numpy as np
 import pandas as pd
 from typing import List, Optional, Dict, Tuple, Set, Any
 from datetime import datetime
 from flask import current_app
 
+from .dataset_cache import TrainMovementDataset
+
+
+def to_datetime64(value) -> np.datetime64:
+    """
+    Convert a datetime, Timestamp or ISO string to a naive datetime64[ns].
+    
+    Timezone-aware values keep their wall-clock time, matching the naive
+    SIGNAL TIME column of the event log.
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_localize(None)
+    return np.datetime64(timestamp, 'ns')
+
+
+def time_slice_bounds(times: np.ndarray, start_datetime=None, end_datetime=None) -> Tuple[int, int]:
+    """
+    Find the row range of a sorted time array inside [start_datetime, end_datetime].
+    
+    Args:
+        times: datetime64[ns] array sorted in ascending order
+        start_datetime: Inclusive lower bound (None for the beginning)
+        end_datetime: Inclusive upper bound (None for the end)
+        
+    Returns:
+        Tuple of (first row, row after the last) for use as a slice
+    """
+    start = 0 if start_datetime is None else int(np.searchsorted(times, to_datetime64(start_datetime), side='left'))
+    stop = len(times) if end_datetime is None else int(np.searchsorted(times, to_datetime64(end_datetime), side='right'))
+    return start, max(start, stop)
+
+
+def slice_log_by_time(
+    log_df: pd.DataFrame, 
+    start_datetime=None, 
+    end_datetime=None
+) -> pd.DataFrame:
+    """
+    Select the events of a time window with two binary searches.
+    
+    The event log is sorted by 'SIGNAL TIME' when it is built (see
+    load_train_movement.create_event_log), so the window is a contiguous row
+    range and is returned as a view of log_df rather than a copy. The cost is
+    O(log n) regardless of the log size.
+    
+    Args:
+        log_df: Signal log DataFrame sorted by 'SIGNAL TIME'
+        start_datetime: Inclusive start of the window (datetime or ISO string)
+        end_datetime: Inclusive end of the window (datetime or ISO string)
+        
+    Returns:
+        View of the rows inside the window, keeping the original index
+    """
+    if start_datetime is None and end_datetime is None:
+        return log_df
+    
+    times = log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]', copy=False)
+    start, stop = time_slice_bounds(times, start_datetime, end_datetime)
+    return log_df.iloc[start:stop]
+
 
 def apply_datetime_filter(
     log_df: pd.DataFrame, 
@@ -18,6 +80,8 @@ def apply_datetime_filter(
     """
     Filter signal log DataFrame based on start and end datetime.
     
+    log_df must be sorted by 'SIGNAL TIME'; the result shares its data.
+    
     Args:
         log_df: DataFrame containing signal log data
         start_datetime: Optional start datetime for filtering
@@ -26,18 +90,12 @@ def apply_datetime_filter(
     Returns:
         Filtered DataFrame based on datetime range
     """
-    filtered_df = log_df.copy()
+    filtered_df = log_df.iloc[slice(*time_slice_bounds(
+        log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]', copy=False), start_datetime, end_datetime
+    ))]
     
-    # Apply start datetime filter if provided
-    if start_datetime is not None:
-        filtered_df = filtered_df[filtered_df['SIGNAL TIME'] >= start_datetime]
-        
-    # Apply end datetime filter if provided
-    if end_datetime is not None:
-        filtered_df = filtered_df[filtered_df['SIGNAL TIME'] <= end_datetime]
-    
-    # Reset index after filtering
-    filtered_df.reset_index(drop=True, inplace=True)
+    # Renumber the rows without copying the sliced data
+    filtered_df.index = pd.RangeIndex(len(filtered_df))
     
     current_app.logger.info(f"Datetime filter applied: {len(filtered_df)} rows from {len(log_df)} original rows")
     
@@ -190,20 +248,88 @@ def get_available_net_group_ids(circuit_df: pd.DataFrame) -> List[str]:
         # Fall back to lexicographic sorting if conversion fails
         return sorted(valid_net_groups)
 
-def get_interval_ids_by_net_group(circuit_df: pd.DataFrame, net_group_id: str) -> List[str]:
+def _interval_status(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the status record of one interval shown in the UI."""
+    status = {
+        'circuit_name': row['Circuit_Name'],
+        'down_time': row['Down_timestamp'],
+        'up_time': row['Up_timestamp'],
+        'duration': row['Duration'],
+        'switch_name': row['switch_name'],
+        'switch_status': row['switch_status'],
+        'chain_id': row['Chain_ID']
+    }
+    
+    # Add route information if available
+    if 'Route_id' in row and row['Route_id'] != "Not_matched":
+        status['route_id'] = row['Route_id']
+        status['route_name'] = row.get('Route_name', '')
+    
+    return status
+
+def build_net_group_index(circuit_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Group the intervals of a circuit table by Net_Group_ID.
+    
+    Every entry holds what a net-group request needs, so the filter and the
+    interval status payload become dictionary lookups:
+    - 'interval_ids': Interval_id values of the group, in table order
+    - 'track_ids': circuit names of those intervals, unique, in table order
+    - 'circuit_names': set of circuit names used to filter the signal log
+    - 'interval_statuses': status record per Interval_id
+    
+    Args:
+        circuit_df: DataFrame containing circuit and Net_Group_ID information
+        
+    Returns:
+        Dictionary keyed by Net_Group_ID as a string
+    """
+    # Status records describe the first row of an interval, the log filter
+    # the last one (as the per-request lookups used to)
+    first_rows = circuit_df.drop_duplicates('Interval_id', keep='first')
+    status_by_interval = dict(zip(first_rows['Interval_id'], map(_interval_status, first_rows.to_dict('records'))))
+    interval_to_circuit = circuit_df.set_index('Interval_id')['Circuit_Name'].to_dict()
+    
+    index = {}
+    groups = circuit_df.groupby(circuit_df['Net_Group_ID'].astype(str), sort=False)['Interval_id']
+    for net_group_id, interval_series in groups:
+        interval_ids = interval_series.unique().tolist()
+        statuses = {interval_id: status_by_interval[interval_id] for interval_id in interval_ids}
+        index[net_group_id] = {
+            'interval_ids': interval_ids,
+            'track_ids': list(dict.fromkeys(status['circuit_name'] for status in statuses.values())),
+            'circuit_names': {interval_to_circuit[interval_id] for interval_id in interval_ids},
+            'interval_statuses': statuses
+        }
+    
+    return index
+
+def get_net_group_index(dataset: TrainMovementDataset) -> Dict[str, Dict[str, Any]]:
+    """Return the Net_Group_ID index of a cached dataset, building it on first use."""
+    return dataset.get_index('net_groups', lambda ds: build_net_group_index(ds.circuit_df))
+
+def get_interval_ids_by_net_group(
+    circuit_df: pd.DataFrame, 
+    net_group_id: str,
+    net_group_index: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[str]:
     """
     Get a list of Interval_id values associated with a specific Net_Group_ID.
     
     Args:
         circuit_df: DataFrame containing circuit and Net_Group_ID information
         net_group_id: Net_Group_ID to filter by
+        net_group_index: Index from build_net_group_index, to skip scanning circuit_df
         
     Returns:
         List of Interval_id values associated with the given Net_Group_ID
     """
-    # Convert net_group_id to string for comparison since it might be stored as various types
-    filtered_df = circuit_df[circuit_df['Net_Group_ID'].astype(str) == str(net_group_id)]
-    interval_ids = filtered_df['Interval_id'].unique().tolist()
+    if net_group_index is not None:
+        interval_ids = list(net_group_index.get(str(net_group_id), {}).get('interval_ids', []))
+    else:
+        # Convert net_group_id to string for comparison since it might be stored as various types
+        filtered_df = circuit_df[circuit_df['Net_Group_ID'].astype(str) == str(net_group_id)]
+        interval_ids = filtered_df['Interval_id'].unique().tolist()
     
     current_app.logger.info(f"Found {len(interval_ids)} Interval_ids for Net_Group_ID {net_group_id}")
     return interval_ids
@@ -211,7 +337,8 @@ def get_interval_ids_by_net_group(circuit_df: pd.DataFrame, net_group_id: str) -
 def filter_by_interval_ids(
     log_df: pd.DataFrame, 
     circuit_df: pd.DataFrame,
-    interval_ids: List[str]
+    interval_ids: List[str],
+    circuit_names: Optional[Set[str]] = None
 ) -> pd.DataFrame:
     """
     Filter signal log DataFrame based on specific Interval_ids.
@@ -220,6 +347,8 @@ def filter_by_interval_ids(
         log_df: DataFrame containing signal log data
         circuit_df: DataFrame containing circuit information
         interval_ids: List of Interval_ids to filter by
+        circuit_names: Circuit names of the intervals if already known
+            (e.g. from build_net_group_index), to skip the lookup
         
     Returns:
         Filtered DataFrame containing only signals for the specified Interval_ids
@@ -228,12 +357,13 @@ def filter_by_interval_ids(
         current_app.logger.warning("No Interval_ids provided for filtering")
         return log_df  # Return original if no interval ids provided
     
-    # Create a mapping from Interval_id to Circuit_Name
-    interval_to_circuit = circuit_df.set_index('Interval_id')['Circuit_Name'].to_dict()
-    
-    # Get the circuit names corresponding to our interval IDs
-    circuit_names = [interval_to_circuit.get(interval_id) for interval_id in interval_ids 
-                     if interval_id in interval_to_circuit]
+    if circuit_names is None:
+        # Create a mapping from Interval_id to Circuit_Name
+        interval_to_circuit = circuit_df.set_index('Interval_id')['Circuit_Name'].to_dict()
+        
+        # Get the circuit names corresponding to our interval IDs
+        circuit_names = [interval_to_circuit.get(interval_id) for interval_id in interval_ids 
+                         if interval_id in interval_to_circuit]
     
     if not circuit_names:
         current_app.logger.warning(f"No circuit names found for the provided Interval_ids")
@@ -250,7 +380,8 @@ def filter_by_interval_ids(
 def apply_net_group_filter(
     log_df: pd.DataFrame, 
     circuit_df: pd.DataFrame,
-    net_group_id: str
+    net_group_id: str,
+    net_group_index: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> pd.DataFrame:
     """
     Filter signal log DataFrame based on Net_Group_ID using Interval_ids.
@@ -259,16 +390,141 @@ def apply_net_group_filter(
         log_df: DataFrame containing signal log data
         circuit_df: DataFrame containing circuit and Net_Group_ID information
         net_group_id: Net_Group_ID to filter by
+        net_group_index: Index from build_net_group_index, to look the group up
+            instead of scanning circuit_df
         
     Returns:
         Filtered DataFrame containing only signals for the specified Net_Group_ID
     """
     # Get interval IDs for the specified net_group_id
-    interval_ids = get_interval_ids_by_net_group(circuit_df, net_group_id)
+    interval_ids = get_interval_ids_by_net_group(circuit_df, net_group_id, net_group_index)
     
     if not interval_ids:
         current_app.logger.warning(f"No Interval_ids found for Net_Group_ID {net_group_id}")
         return log_df  # Return original if no matching interval ids
     
+    circuit_names = None
+    if net_group_index is not None:
+        circuit_names = net_group_index[str(net_group_id)]['circuit_names']
+    
     # Use the filter_by_interval_ids function to filter the log DataFrame
-    return filter_by_interval_ids(log_df, circuit_df, interval_ids)
+    return filter_by_interval_ids(log_df, circuit_df, interval_ids, circuit_names)
+
+def build_scope_index(
+    circuit_df: pd.DataFrame,
+    track_to_edge_idx: Dict[str, int],
+    edge_count: int
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Build boolean edge masks of the circuits belonging to each route and chain.
+    
+    Args:
+        circuit_df: DataFrame containing circuit information (Route_id and
+            Chain_ID columns are used when present)
+        track_to_edge_idx: Mapping of track IDs to edge indices
+        edge_count: Number of edges in the topology
+        
+    Returns:
+        Dictionary {'route': {route_id: mask}, 'chain': {chain_id: mask}} with
+        IDs as strings and one boolean per edge in each mask
+    """
+    scopes = {'route': {}, 'chain': {}}
+    
+    # Circuits outside the topology cannot be drawn, so they are left out of the masks
+    edge_idx = circuit_df['Circuit_Name'].map(track_to_edge_idx)
+    in_topology = edge_idx.notna()
+    
+    for scope, column in (('route', 'Route_id'), ('chain', 'Chain_ID')):
+        if column not in circuit_df.columns:
+            continue
+        
+        scope_ids = circuit_df[column].astype(str)
+        valid = in_topology & circuit_df[column].notna() & ~scope_ids.isin(['', 'Not_matched'])
+        for scope_id, edges in edge_idx[valid].astype(np.int64).groupby(scope_ids[valid]):
+            mask = np.zeros(edge_count, dtype=bool)
+            mask[edges.to_numpy()] = True
+            scopes[scope][scope_id] = mask
+    
+    return scopes
+
+def get_scope_index(dataset: TrainMovementDataset, track_to_edge_idx: Dict[str, int],
+                    edge_count: int) -> Dict[str, Dict[str, np.ndarray]]:
+    """Return the route/chain edge masks of a cached dataset, building them on first use."""
+    return dataset.get_index(
+        'scopes', lambda ds: build_scope_index(ds.circuit_df, track_to_edge_idx, edge_count)
+    )
+
+def get_log_edge_index(dataset: TrainMovementDataset, track_to_edge_idx: Dict[str, int]) -> np.ndarray:
+    """
+    Return the edge index of every event in the dataset's log (-1 if not in the topology).
+    
+    The array is aligned with the rows of dataset.log_df and built once per dataset.
+    """
+    return dataset.get_index(
+        'log_edge_idx',
+        lambda ds: ds.log_df['SIGNAL NAME'].map(track_to_edge_idx).fillna(-1).to_numpy(dtype=np.int64)
+    )
+
+def sorted_scope_ids(scope_ids: List[str]) -> List[str]:
+    """Sort route or chain IDs numerically when they are all numbers."""
+    try:
+        return sorted(scope_ids, key=int)
+    except ValueError:
+        return sorted(scope_ids)
+
+def get_scope_mask(
+    scope_index: Dict[str, Dict[str, np.ndarray]],
+    route_id: Optional[str] = None,
+    chain_id: Optional[str] = None
+) -> Optional[np.ndarray]:
+    """
+    Combine the masks of the requested route and chain.
+    
+    Args:
+        scope_index: Index from build_scope_index
+        route_id: Route_id to scope to
+        chain_id: Chain_ID to scope to
+        
+    Returns:
+        Edge mask of the circuits in every requested scope, or None if no
+        scope was requested
+        
+    Raises:
+        ValueError: If the route or chain is not in the index
+    """
+    mask = None
+    for scope, scope_id in (('route', route_id), ('chain', chain_id)):
+        if not scope_id:
+            continue
+        scope_mask = scope_index[scope].get(str(scope_id))
+        if scope_mask is None:
+            raise ValueError(f"Unknown {scope}: {scope_id}")
+        mask = scope_mask if mask is None else mask & scope_mask
+    return mask
+
+def apply_scope_filter(
+    log_df: pd.DataFrame,
+    edge_mask: np.ndarray,
+    log_edge_idx: np.ndarray
+) -> pd.DataFrame:
+    """
+    Keep only the events whose circuit lies inside an edge mask.
+    
+    log_df must be a row subset of the dataset log whose index labels are
+    still the row positions in that log (as returned by slice_log_by_time),
+    so the membership test is two array lookups per event.
+    
+    Args:
+        log_df: Signal log DataFrame (positional subset of the dataset log)
+        edge_mask: Boolean mask over edge indices from get_scope_mask
+        log_edge_idx: Edge index per dataset log row from get_log_edge_index
+        
+    Returns:
+        Filtered DataFrame containing only events inside the scope
+    """
+    event_edges = log_edge_idx[log_df.index.to_numpy()]
+    in_scope = (event_edges >= 0) & edge_mask[np.maximum(event_edges, 0)]
+    filtered_df = log_df[in_scope]
+    
+    current_app.logger.info(f"Scope filter applied: {len(filtered_df)} rows from {len(log_df)} original rows")
+    return filtered_df
@@ -0,0 +1,406 @@
+"""
+Train Movement Frame Encoding Module
+
+This module converts full animation frames into compact wire formats for the
+train movement replay. The delta format sends one complete initial state and,
+for every following signal event, only the edges, trains and signal indicators
+that changed. The browser rebuilds each frame by applying deltas in order.
+
+Delta format:
+    track_anchors: {edge_idx: {"x", "y", "angle", "start", "end", "track_id"}}
+        train icon anchor for every track a train was seen on
+    initial_frame: {"colors": [...], "widths": [...], "signals": "<hex bitmask>",
+                    "trains": {train_id: [edge_idx, ...]}, "train_colors": {train_id: color},
+                    "transient": [edge_idx, ...]}  (coalesced frames with flag_transient only)
+    frame_deltas[i] (transition from frame i to frame i + 1):
+        "e": [[edge_idx, color, width], ...]       changed edge styles
+        "t": {train_id: [edge_idx, ...], ...}      new or moved trains
+        "c": {train_id: color, ...}                colors of trains seen for the first time
+        "r": [train_id, ...]                       trains that left the layout
+        "s": [signal_idx, ...]                     signal indicators that toggled
+        "x": [edge_idx, ...]                       new transient track list (coalesced frames)
+    Keys are omitted when nothing of that kind changed.
+
+Signal states are a hex bitmask in numpy.packbits order: indicator i is bit
+(7 - i % 8) of byte i // 8, set when the indicator is active.
+
+Binary format (served as BINARY_FRAMES_MIMETYPE, all numbers little-endian):
+    bytes 0-3    magic b'TMF1'
+    bytes 4-7    uint32 length of the JSON header in bytes (a multiple of 8)
+    header       UTF-8 JSON: every response field except the frames and
+                 time labels, plus "sections": {name: {"offset", "dtype", "shape"}}
+                 with offsets from the start of the buffer, 8-byte aligned
+    sections:
+        "times"          int64   [frames]             epoch milliseconds of each frame
+        "edge_states"    uint8   [frames, edges]      index into header "edge_palette"
+                                                      ([[color, width], ...], 0 = free track);
+                                                      uint16 when the palette has over 256 entries
+        "signals"        uint8   [frames, ceil(signals / 8)]  signal bitmask bytes
+        "train_offsets"  uint32  [frames + 1]         frame i owns train rows offsets[i]..offsets[i+1]
+        "train_index"    uint32  [rows]               index into header "train_ids"/"train_colors"
+        "train_edges"    int32   [rows]               edge index of each train position
+        "train_xya"      float32 [rows, 3]            x, y and angle of each train position
+        "transient"      uint8   [frames, ceil(edges / 8)]  transient track bits (coalesced
+                                                      frames with flag_transient only)
+    Header "edge_tracks" lists the track_id of every edge index.
+"""
+import json
+import struct
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FRAME_FORMAT_FULL = 'full'
+FRAME_FORMAT_DELTA = 'delta'
+FRAME_FORMAT_BINARY = 'binary'
+FRAME_FORMATS = (FRAME_FORMAT_FULL, FRAME_FORMAT_DELTA, FRAME_FORMAT_BINARY)
+
+BINARY_FRAMES_MIMETYPE = 'application/vnd.train-movement.frames'
+BINARY_MAGIC = b'TMF1'
+BINARY_ALIGNMENT = 8
+
+
+def toggled_signals(previous_mask: Optional[str], current_mask: Optional[str]) -> List[int]:
+    """
+    Return the indices of signal indicators whose bit differs between two masks.
+
+    Args:
+        previous_mask: Hex signal bitmask of frame i
+        current_mask: Hex signal bitmask of frame i + 1
+
+    Returns:
+        Sorted list of toggled signal indices
+    """
+    if not previous_mask or not current_mask or previous_mask == current_mask:
+        return []
+    changed = np.frombuffer(bytes.fromhex(previous_mask), dtype=np.uint8) ^ \
+        np.frombuffer(bytes.fromhex(current_mask), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(changed)).tolist()
+
+
+class DeltaFrameEncoder:
+    """Turns a stream of full frames into an initial state plus per-event deltas"""
+
+    def __init__(self, track_to_edge_idx: Dict[str, int]):
+        self.track_to_edge_idx = track_to_edge_idx
+        self.track_anchors: Dict[int, Dict] = {}
+        self.train_colors: Dict[str, str] = {}
+
+    def compact_trains(self, trains: Dict[str, List[Dict]]) -> Tuple[Dict[str, List[int]], Dict[str, str]]:
+        """
+        Replace train position objects with edge indices.
+
+        Returns:
+            Tuple of (train_id -> edge indices, colors of trains not seen before)
+        """
+        compact = {}
+        new_colors = {}
+        for train_id, train_positions in trains.items():
+            edge_indices = []
+            for position in train_positions:
+                edge_idx = self.track_to_edge_idx[position['track_id']]
+                if edge_idx not in self.track_anchors:
+                    self.track_anchors[edge_idx] = {
+                        key: position[key] for key in ('x', 'y', 'angle', 'start', 'end', 'track_id')
+                    }
+                edge_indices.append(edge_idx)
+                if self.train_colors.get(train_id) != position['color']:
+                    self.train_colors[train_id] = position['color']
+                    new_colors[train_id] = position['color']
+            compact[train_id] = edge_indices
+        return compact, new_colors
+
+    def initial_state(self, frame: Dict) -> Dict:
+        """
+        Build the complete state sent ahead of the deltas.
+
+        Args:
+            frame: Full frame as produced by create_frame_data
+
+        Returns:
+            Dictionary with colors, widths, signal bitmask and compact trains
+        """
+        trains, train_colors = self.compact_trains(frame["trains"])
+        initial = {
+            "colors": list(frame["colors"]),
+            "widths": list(frame["widths"]),
+            "signals": frame.get("signals") or "",
+            "trains": trains,
+            "train_colors": train_colors
+        }
+        if "transient_tracks" in frame:
+            initial["transient"] = self._edge_indices(frame["transient_tracks"])
+        return initial
+
+    def _edge_indices(self, track_ids: List[str]) -> List[int]:
+        """Map track IDs to edge indices."""
+        return [self.track_to_edge_idx[track_id] for track_id in track_ids]
+
+    def diff(self, previous: Dict, current: Dict, previous_trains: Dict[str, List[int]],
+             current_trains: Dict[str, List[int]], new_colors: Dict[str, str]) -> Dict:
+        """
+        Compute the delta that turns one full frame into the next.
+
+        Args:
+            previous: Full frame at index i
+            current: Full frame at index i + 1
+            previous_trains: Compact trains of frame i
+            current_trains: Compact trains of frame i + 1
+            new_colors: Colors of trains first seen in frame i + 1
+
+        Returns:
+            Delta dictionary (empty when nothing changed)
+        """
+        delta = {}
+
+        edge_changes = [
+            [idx, color, width]
+            for idx, (color, width, prev_color, prev_width) in enumerate(
+                zip(current["colors"], current["widths"], previous["colors"], previous["widths"])
+            )
+            if color != prev_color or width != prev_width
+        ]
+        if edge_changes:
+            delta["e"] = edge_changes
+
+        train_changes = {
+            train_id: edge_indices
+            for train_id, edge_indices in current_trains.items()
+            if previous_trains.get(train_id) != edge_indices
+        }
+        if train_changes:
+            delta["t"] = train_changes
+        if new_colors:
+            delta["c"] = new_colors
+        removed_trains = [train_id for train_id in previous_trains if train_id not in current_trains]
+        if removed_trains:
+            delta["r"] = removed_trains
+
+        signal_changes = toggled_signals(previous.get("signals"), current.get("signals"))
+        if signal_changes:
+            delta["s"] = signal_changes
+
+        transient = current.get("transient_tracks")
+        if transient is not None and transient != previous.get("transient_tracks"):
+            delta["x"] = self._edge_indices(transient)
+
+        return delta
+
+    def encode(self, frames: Iterable[Tuple[Dict, str, np.datetime64]]) -> Tuple[Optional[Dict], List[Dict], List[str]]:
+        """
+        Encode a stream of full frames.
+
+        Only the previous frame is kept while encoding, so the full frames never
+        need to be materialised together.
+
+        Args:
+            frames: Iterable of (full frame, time label, frame time) triples
+
+        Returns:
+            Tuple containing:
+            - Initial frame state (None if there were no frames)
+            - List of deltas, one per frame after the first
+            - List of time labels, one per frame
+        """
+        initial = None
+        deltas = []
+        time_labels = []
+        previous = None
+        previous_trains = {}
+
+        for frame, time_label, _ in frames:
+            if previous is None:
+                initial = self.initial_state(frame)
+                current_trains = initial["trains"]
+            else:
+                current_trains, new_colors = self.compact_trains(frame["trains"])
+                deltas.append(self.diff(previous, frame, previous_trains, current_trains, new_colors))
+            time_labels.append(time_label)
+            previous = frame
+            previous_trains = current_trains
+
+        return initial, deltas, time_labels
+
+
+def encode_delta_frames(
+    frames: Iterable[Tuple[Dict, str, np.datetime64]], track_to_edge_idx: Dict[str, int]
+) -> Tuple[Optional[Dict], List[Dict], List[str], Dict[int, Dict]]:
+    """
+    Encode a stream of full frames as an initial state plus per-event deltas.
+
+    Args:
+        frames: Iterable of (full frame, time label, frame time) triples
+        track_to_edge_idx: Mapping of track IDs to edge indices
+
+    Returns:
+        Tuple of (initial state, deltas, time labels, track anchors)
+    """
+    encoder = DeltaFrameEncoder(track_to_edge_idx)
+    initial, deltas, time_labels = encoder.encode(frames)
+    return initial, deltas, time_labels, encoder.track_anchors
+
+
+class BinaryFrameEncoder:
+    """Packs a stream of full frames into the columnar arrays of the binary format"""
+
+    def __init__(self, track_to_edge_idx: Dict[str, int]):
+        self.track_to_edge_idx = track_to_edge_idx
+        self.edge_palette: Dict[Tuple[str, int], int] = {}
+        self.train_ids: Dict[str, int] = {}
+        self.train_colors: List[str] = []
+
+    def _palette_index(self, color: str, width: int) -> int:
+        """Return the palette index of an edge style, adding it on first use."""
+        key = (color, width)
+        index = self.edge_palette.get(key)
+        if index is None:
+            index = self.edge_palette[key] = len(self.edge_palette)
+        return index
+
+    def _train_index(self, train_id: str, color: str) -> int:
+        """Return the index of a train, registering it and its color on first use."""
+        index = self.train_ids.get(train_id)
+        if index is None:
+            index = self.train_ids[train_id] = len(self.train_colors)
+            self.train_colors.append(color)
+        return index
+
+    def encode(self, frames: Iterable[Tuple[Dict, str, np.datetime64]]) -> Tuple[Dict[str, np.ndarray], Dict[str, Any], List[str]]:
+        """
+        Encode a stream of full frames.
+
+        Args:
+            frames: Iterable of (full frame, time label, frame time) triples
+
+        Returns:
+            Tuple of (sections, header fields, time labels)
+        """
+        edge_count = len(self.track_to_edge_idx)
+        # Free tracks are palette entry 0
+        self._palette_index('#0066cc', 3)
+
+        # Palette indices outgrow a byte once there are more than 256 edge styles
+        states = array('H')
+        signals = bytearray()
+        transient_rows = []
+        train_offsets = [0]
+        train_index = []
+        train_edges = []
+        train_xya = []
+        time_labels = []
+        frame_times = []
+
+        for frame, time_label, frame_time in frames:
+            edge_count = len(frame["colors"])
+            states.extend(
+                self._palette_index(color, width) for color, width in zip(frame["colors"], frame["widths"])
+            )
+            if frame.get("signals"):
+                signals.extend(bytes.fromhex(frame["signals"]))
+            if "transient_tracks" in frame:
+                transient_rows.append([self.track_to_edge_idx[track_id] for track_id in frame["transient_tracks"]])
+
+            for train_id, train_positions in frame["trains"].items():
+                for position in train_positions:
+                    train_index.append(self._train_index(train_id, position['color']))
+                    train_edges.append(self.track_to_edge_idx[position['track_id']])
+                    train_xya.append((position['x'], position['y'], position['angle']))
+            train_offsets.append(len(train_index))
+            time_labels.append(time_label)
+            frame_times.append(frame_time)
+
+        frame_count = len(time_labels)
+        state_dtype = np.uint8 if len(self.edge_palette) <= 256 else np.uint16
+        edge_states = np.frombuffer(states, dtype=np.uint16).astype(state_dtype)
+
+        sections = {
+            "times": np.array(frame_times, dtype='datetime64[ns]').astype('datetime64[ms]').astype(np.int64),
+            "edge_states": edge_states.reshape(frame_count, edge_count),
+            "signals": np.frombuffer(bytes(signals), dtype=np.uint8).reshape(frame_count, -1)
+                       if signals else np.zeros((frame_count, 0), dtype=np.uint8),
+            "train_offsets": np.array(train_offsets, dtype=np.uint32),
+            "train_index": np.array(train_index, dtype=np.uint32),
+            "train_edges": np.array(train_edges, dtype=np.int32),
+            "train_xya": np.array(train_xya, dtype=np.float32).reshape(-1, 3)
+        }
+        if transient_rows:
+            transient = np.zeros((frame_count, edge_count), dtype=bool)
+            for row, edge_indices in enumerate(transient_rows):
+                transient[row, edge_indices] = True
+            sections["transient"] = np.packbits(transient, axis=1)
+
+        edge_tracks = [''] * edge_count
+        for track_id, idx in self.track_to_edge_idx.items():
+            if idx < edge_count:
+                edge_tracks[idx] = track_id
+
+        header = {
+            "edge_palette": [[color, width] for color, width in self.edge_palette],
+            "train_ids": list(self.train_ids),
+            "train_colors": self.train_colors,
+            "edge_tracks": edge_tracks
+        }
+        return sections, header, time_labels
+
+
+def encode_binary_frames(
+    frames: Iterable[Tuple[Dict, str, np.datetime64]], track_to_edge_idx: Dict[str, int]
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any], List[str]]:
+    """
+    Encode a stream of full frames as the columnar sections of the binary format.
+
+    Args:
+        frames: Iterable of (full frame, time label, frame time) triples
+        track_to_edge_idx: Mapping of track IDs to edge indices
+
+    Returns:
+        Tuple of (sections, header fields, time labels)
+    """
+    return BinaryFrameEncoder(track_to_edge_idx).encode(frames)
+
+
+def pack_binary_frames(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize a binary-format response into one buffer.
+
+    Args:
+        payload: Response dictionary whose "frame_sections" entry holds the
+            section arrays; the other entries (except "time_labels", which
+            the "times" section replaces) go into the JSON header
+
+    Returns:
+        The packed buffer described in the module docstring
+    """
+    sections = payload["frame_sections"]
+    header = {key: value for key, value in payload.items() if key not in ("frame_sections", "time_labels")}
+
+    # Section offsets depend on the header length, so lay sections out relative
+    # to the data start first and shift them once the header is sized
+    layout = {}
+    position = 0
+    for name, array in sections.items():
+        layout[name] = {"offset": position, "dtype": array.dtype.name, "shape": list(array.shape)}
+        position += -(-array.nbytes // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
+
+    header_bytes = b''
+    data_start = 0
+    while True:
+        header["sections"] = {
+            name: {**entry, "offset": entry["offset"] + data_start} for name, entry in layout.items()
+        }
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        header_bytes += b' ' * (-len(header_bytes) % BINARY_ALIGNMENT)
+        if len(BINARY_MAGIC) + 4 + len(header_bytes) == data_start:
+            break
+        data_start = len(BINARY_MAGIC) + 4 + len(header_bytes)
+
+    buffer = bytearray(data_start + position)
+    buffer[0:4] = BINARY_MAGIC
+    buffer[4:8] = struct.pack('<I', len(header_bytes))
+    buffer[8:data_start] = header_bytes
+    for name, array in sections.items():
+        offset = header["sections"][name]["offset"]
+        data = np.ascontiguousarray(array).astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+        buffer[offset:offset + len(data)] = data
+    return bytes(buffer)
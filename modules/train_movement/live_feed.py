@@ -0,0 +1,423 @@
+"""
+Train Movement Live Feed Module
+
+This module replays a raw signal datalog while the datalogger is still writing
+it. A DatalogTailer follows one local file by byte offset: every poll reads
+only the complete lines appended since the previous poll, applies their events
+to a ReplayState and publishes the change as a delta in the frame_encoding
+delta format. Each subscriber gets a snapshot of the current state first and
+the deltas after it, so history is parsed once per process no matter how many
+browsers are connected. Point-zone circuits are renamed to the N/R track of
+the switch position their detection relays report (see PointZoneMapper).
+
+Datalog lines look like:
+    SlNo,SIGNAL_NAME,SIGNAL_STATUS,SIGNAL_TIME
+    1,102BTPR,Up,05/15/2025 00:12:18:578
+"""
+import io
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from modules.interval_pipeline.datalog_intervals import SWITCH_CIRCUIT_PATTERN, SWITCH_RELAY_PATTERN
+
+from .frame_encoding import FRAME_FORMAT_DELTA, DeltaFrameEncoder
+from .topology import Topology
+from .train_movement import (
+    TRAIN_MODE_GLOBAL, build_signal_edge_index, convert_numpy_types, create_frame_data,
+    get_track_position_index, new_replay_state, signal_info
+)
+
+logger = logging.getLogger(__name__)
+
+# Datalog followed by the live mode (app config key of the same name wins)
+LIVE_DATALOG_SETTING = 'TRAIN_MOVEMENT_LIVE_DATALOG'
+
+# Tailer timing and buffering, with environment overrides
+LIVE_POLL_SECONDS = float(os.environ.get('TRAIN_MOVEMENT_LIVE_POLL_SECONDS', 1.0))
+LIVE_KEEPALIVE_SECONDS = float(os.environ.get('TRAIN_MOVEMENT_LIVE_KEEPALIVE_SECONDS', 15.0))
+LIVE_MAX_READ_BYTES = int(os.environ.get('TRAIN_MOVEMENT_LIVE_MAX_READ_MB', 4)) * 1024 * 1024
+LIVE_QUEUE_SIZE = 256
+
+# Prefix of a point-zone track in each switch position
+SWITCH_POSITIONS = ('N', 'R')
+
+# Raw datalog layout
+DATALOG_COLUMNS = ['SlNo', 'SIGNAL_NAME', 'SIGNAL_STATUS', 'SIGNAL_TIME']
+DATALOG_TIME_FORMAT = '%m/%d/%Y %H:%M:%S:%f'
+
+#######################
+# DATALOG PARSING     #
+#######################
+
+def parse_datalog_lines(lines: List[str]) -> pd.DataFrame:
+    """
+    Parse raw datalog lines into the event log layout used by the replay.
+
+    Header lines and lines with an unparseable timestamp are dropped, and the
+    events are stable-sorted by time.
+
+    Args:
+        lines: Complete datalog lines without line terminators
+
+    Returns:
+        DataFrame with 'SIGNAL NAME', 'SIGNAL STATUS' and 'SIGNAL TIME' columns
+    """
+    raw = pd.read_csv(
+        io.StringIO('\n'.join(lines)), header=None, names=DATALOG_COLUMNS,
+        dtype=str, skipinitialspace=True, on_bad_lines='skip'
+    )
+    raw = raw[raw['SIGNAL_NAME'].notna() & (raw['SIGNAL_NAME'] != 'SIGNAL_NAME')]
+
+    times = pd.to_datetime(raw['SIGNAL_TIME'].str.strip(), format=DATALOG_TIME_FORMAT, errors='coerce')
+    events = pd.DataFrame({
+        'SIGNAL NAME': raw['SIGNAL_NAME'].str.strip(),
+        'SIGNAL STATUS': raw['SIGNAL_STATUS'].fillna('').str.strip(),
+        'SIGNAL TIME': times
+    })
+    events = events[times.notna()]
+    return events.sort_values('SIGNAL TIME', kind='stable').reset_index(drop=True)
+
+#######################
+# POINT ZONES         #
+#######################
+
+class PointZoneMapper:
+    """
+    Maps raw datalog circuit names onto the N/R-prefixed point-zone tracks.
+
+    The datalog reports a point-zone circuit such as 101ATPR under its plain
+    name, while the topology draws one track per switch position (N101ATPR,
+    R101ATPR). The mapper follows the switch detection relays (101NDKR,
+    101RDKR) and names each occupation after the position proven when the
+    circuit went down, the same rule assign_switch_positions applies to
+    interval tables: the latest relay pick-up wins, and a switch is in N
+    until its first one. The Up event of an occupation releases the track
+    its Down occupied, even if the switch moved in between.
+    """
+
+    def __init__(self, track_to_edge_idx: Dict[str, int]):
+        self.positions: Dict[str, str] = {}
+        self.occupied: Dict[str, str] = {}
+        self._relays: Dict[str, Optional[Tuple[str, str]]] = {}
+        self._circuits: Dict[str, Optional[str]] = {}
+        self._tracks = set(track_to_edge_idx)
+        self._relay_pattern = re.compile(SWITCH_RELAY_PATTERN)
+        self._circuit_pattern = re.compile(SWITCH_CIRCUIT_PATTERN)
+
+    def _relay(self, name: str) -> Optional[Tuple[str, str]]:
+        """Return (switch, position) for a detection relay name, else None."""
+        if name not in self._relays:
+            match = self._relay_pattern.match(name)
+            self._relays[name] = (match['switch'], match['position']) if match else None
+        return self._relays[name]
+
+    def _switch(self, name: str) -> Optional[str]:
+        """Return the controlling switch of a circuit drawn as N/R tracks, else None."""
+        if name not in self._circuits:
+            match = self._circuit_pattern.match(name)
+            drawn = match is not None and any(position + name in self._tracks for position in SWITCH_POSITIONS)
+            self._circuits[name] = match['switch'] if drawn else None
+        return self._circuits[name]
+
+    def map(self, name: str, status: str) -> Optional[str]:
+        """
+        Track a datalog event and return the track name it applies to.
+
+        Args:
+            name: Raw datalog signal name
+            status: Lower-case event status ('down' or 'up')
+
+        Returns:
+            Track name for the replay state, or None for detection relay events
+        """
+        relay = self._relay(name)
+        if relay is not None:
+            if status == 'up':
+                switch, position = relay
+                self.positions[switch] = position
+            return None
+
+        switch = self._switch(name)
+        if switch is None:
+            return name
+        if status == 'down':
+            self.occupied[name] = self.positions.get(switch, 'N') + name
+            return self.occupied[name]
+        return self.occupied.pop(name, self.positions.get(switch, 'N') + name)
+
+#######################
+# TAILER              #
+#######################
+
+class DatalogTailer:
+    """Follows one datalog file and fans its replay deltas out to subscriber queues"""
+
+    def __init__(self, path: str, topology: Topology, train_mode: str = TRAIN_MODE_GLOBAL,
+                 poll_interval: float = LIVE_POLL_SECONDS):
+        self.path = path
+        self.topology = topology
+        self.train_mode = train_mode
+        self.poll_interval = poll_interval
+        self.signal_edge_idx = build_signal_edge_index(topology.signal_traces, topology.track_to_edge_idx)
+
+        self._lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+        self._thread: Optional[threading.Thread] = None
+        self.generation = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start over from the beginning of the file with nothing occupied."""
+        self.generation += 1
+        self.offset = 0
+        self.event_count = 0
+        self.time_label = ''
+        self.state = new_replay_state(self.train_mode, self.topology.G)
+        self.point_zones = PointZoneMapper(self.topology.track_to_edge_idx)
+        self.encoder = DeltaFrameEncoder(self.topology.track_to_edge_idx)
+        self.frame = self._render()
+        self.trains, _ = self.encoder.compact_trains(self.frame["trains"])
+
+    def _render(self) -> Dict:
+        """Build the full frame of the current state."""
+        topology = self.topology
+        return create_frame_data(
+            self.state.active_set, self.state.train_assignments, topology.edge_traces,
+            topology.track_to_edge_idx, topology.G, topology.positions, self.state.trains,
+            signal_edge_idx=self.signal_edge_idx
+        )
+
+    #######################
+    # READING             #
+    #######################
+
+    def _read_new_lines(self) -> List[str]:
+        """
+        Read the complete lines appended since the last read.
+
+        A trailing line without its newline is left for the next read, and a
+        file that shrank (truncated or rotated) restarts the replay.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+
+        if size < self.offset:
+            logger.info(f"Live datalog {self.path} shrank, replaying it from the start")
+            self._reset()
+        if size == self.offset:
+            return []
+
+        with open(self.path, 'rb') as datalog:
+            datalog.seek(self.offset)
+            chunk = datalog.read(min(size - self.offset, LIVE_MAX_READ_BYTES))
+
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return []
+        self.offset += end + 1
+        return chunk[:end + 1].decode('utf-8', errors='replace').splitlines()
+
+    def poll(self) -> bool:
+        """
+        Apply every complete line appended since the last poll.
+
+        All events read in one poll are coalesced into a single delta, so a
+        datalog that already holds days of history costs one snapshot.
+
+        Returns:
+            True if the state changed and a delta was published
+        """
+        with self._lock:
+            generation = self.generation
+            applied = 0
+            while True:
+                lines = self._read_new_lines()
+                if not lines:
+                    break
+                events = parse_datalog_lines(lines)
+                track_to_edge_idx = self.topology.track_to_edge_idx
+                for name, status, timestamp in events.itertuples(index=False, name=None):
+                    status = status.lower()
+                    track = self.point_zones.map(name, status)
+                    if track is not None:
+                        self.state.apply(track, status, track_to_edge_idx)
+                if len(events):
+                    self.time_label = events['SIGNAL TIME'].iloc[-1].strftime('%Y-%m-%d %H:%M:%S')
+                applied += len(events)
+
+            self.event_count += applied
+            if self.generation != generation:
+                # The file was replaced; clients need a fresh snapshot, not a delta
+                self.frame = self._render()
+                self.trains, _ = self.encoder.compact_trains(self.frame["trains"])
+                self._broadcast('snapshot', self._snapshot_message())
+                return True
+            if not applied:
+                return False
+
+            frame = self._render()
+            trains, new_colors = self.encoder.compact_trains(frame["trains"])
+            delta = self.encoder.diff(self.frame, frame, self.trains, trains, new_colors)
+            self.frame, self.trains = frame, trains
+            if not delta:
+                return False
+
+            self._broadcast('delta', {
+                "delta": delta,
+                "time_label": self.time_label,
+                "event_count": self.event_count
+            })
+            return True
+
+    #######################
+    # SUBSCRIBERS         #
+    #######################
+
+    def _snapshot_message(self) -> Dict:
+        """Describe the current state in the delta format's initial-frame layout."""
+        topology = self.topology
+        track_positions = get_track_position_index(topology.G, topology.positions)
+        track_anchors = {
+            topology.track_to_edge_idx[track_id]: anchor
+            for track_id, anchor in track_positions.items()
+            if track_id in topology.track_to_edge_idx
+        }
+        return {
+            "frame_format": FRAME_FORMAT_DELTA,
+            "initial_frame": DeltaFrameEncoder(topology.track_to_edge_idx).initial_state(self.frame),
+            "track_anchors": convert_numpy_types(track_anchors),
+            "time_label": self.time_label,
+            "event_count": self.event_count,
+            "topology_id": topology.id,
+            **signal_info(topology.signal_traces)
+        }
+
+    def _broadcast(self, event: str, message: Dict) -> None:
+        """Queue a message for every subscriber, dropping subscribers that fell behind."""
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait((event, message))
+            except queue.Full:
+                # The client reconnects and starts again from a snapshot
+                self._subscribers.remove(subscriber)
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(('close', {}))
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscribe(self) -> queue.Queue:
+        """
+        Register a subscriber and start the tailer thread if it is not running.
+
+        Returns:
+            Queue of (event name, message) pairs, starting with a snapshot
+        """
+        subscriber = queue.Queue(maxsize=LIVE_QUEUE_SIZE)
+        with self._lock:
+            subscriber.put_nowait(('snapshot', self._snapshot_message()))
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='train-movement-live', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a subscriber; the thread stops after the last one leaves."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def _run(self) -> None:
+        """Poll the datalog until no subscriber is left."""
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                logger.exception(f"Error tailing live datalog {self.path}")
+            time.sleep(self.poll_interval)
+
+    def status(self) -> Dict:
+        """Return tailer counters for diagnostics."""
+        return {
+            "path": self.path,
+            "offset": self.offset,
+            "event_count": self.event_count,
+            "time_label": self.time_label,
+            "active_tracks": len(self.state.active_set),
+            "subscribers": self.subscriber_count
+        }
+
+
+_tailers: Dict[Tuple[str, str, str], DatalogTailer] = {}
+_tailers_lock = threading.Lock()
+
+
+def get_live_tailer(path: str, topology: Topology, train_mode: str = TRAIN_MODE_GLOBAL) -> DatalogTailer:
+    """
+    Get the shared tailer for a datalog, topology and train mode.
+
+    Args:
+        path: Path of the datalog file
+        topology: Topology the datalog's signal names refer to
+        train_mode: 'global' or 'adjacency'
+
+    Returns:
+        DatalogTailer shared by every client of the same feed
+    """
+    key = (os.path.abspath(path), topology.id, train_mode)
+    with _tailers_lock:
+        tailer = _tailers.get(key)
+        if tailer is None:
+            tailer = _tailers[key] = DatalogTailer(key[0], topology, train_mode)
+        return tailer
+
+
+def iter_sse_messages(tailer: DatalogTailer, keepalive: float = LIVE_KEEPALIVE_SECONDS) -> Iterator[str]:
+    """
+    Subscribe to a tailer and yield its messages as Server-Sent Events.
+
+    The subscription is made when the stream starts and removed when the
+    client disconnects, so a response that is never streamed leaves no queue
+    behind. A comment line is sent when nothing happened for keepalive
+    seconds so proxies keep the connection open.
+
+    Args:
+        tailer: Tailer to subscribe to
+        keepalive: Seconds of silence before a keepalive comment
+
+    Yields:
+        SSE-formatted message strings
+    """
+    subscriber = tailer.subscribe()
+    try:
+        while True:
+            try:
+                event, message = subscriber.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            if event == 'close':
+                return
+            yield f"event: {event}\ndata: {json.dumps(message, separators=(',', ':'))}\n\n"
+    finally:
+        tailer.unsubscribe(subscriber)
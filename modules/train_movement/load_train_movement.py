@@ -6,10 +6,26 @@ It provides functions to load node, edge, and circuit interval data, and transfo
 circuit intervals into a time-ordered event log.
 """
 import os
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Set, Any, Optional, Union
 from flask import current_app, session
 
+from modules.stations import (
+    REPLAY_INTERVALS, TOPOLOGY_EDGES, TOPOLOGY_NODES, Station, get_request_station, station_registry
+)
+
+from .dataset_cache import TrainMovementDataset, dataset_cache
+
+# Timestamp layout used by the Down_timestamp / Up_timestamp columns
+EVENT_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Event statuses in the order they are emitted for each interval
+EVENT_STATUSES = ['Down', 'Up']
+
+# Station files a replay dataset is read from
+STATION_FILE_ROLES = (TOPOLOGY_NODES, TOPOLOGY_EDGES, REPLAY_INTERVALS)
+
 #######################
 # FILE HANDLING       #
 #######################
@@ -19,10 +35,13 @@ def get_data_paths(use_uploaded: bool = False) -> Tuple[str, str, str]:
     Get file paths for data sources.
     
     Args:
-        use_uploaded: Flag to use uploaded files instead of default files
+        use_uploaded: Flag to use uploaded files instead of the station's files
         
     Returns:
         Tuple of file paths (nodes_path, edges_path, circuit_path)
+        
+    Raises:
+        FileNotFoundError: If the request's station does not declare the files
     """
     if use_uploaded and 'uploaded_files' in session:
         # Use uploaded files from session
@@ -32,11 +51,9 @@ def get_data_paths(use_uploaded: bool = False) -> Tuple[str, str, str]:
         circuit_path = uploaded_files['circuit']
         current_app.logger.info(f"Using uploaded files: {nodes_path}, {edges_path}, {circuit_path}")
     else:
-        # Use default data paths
-        data_dir = os.path.join(current_app.root_path, 'Data')
-        nodes_path = os.path.join(data_dir, 'nodes.csv')
-        edges_path = os.path.join(data_dir, 'edges.csv')
-        circuit_path = os.path.join(data_dir, 'final_circuit_interval_chain_id_net_id_route_id.csv')
+        # Use the files declared by the request's station
+        station = get_request_station()
+        nodes_path, edges_path, circuit_path = (station.require(role) for role in STATION_FILE_ROLES)
     
     return nodes_path, edges_path, circuit_path
 
@@ -66,12 +83,38 @@ def modify_track_circuit(row: pd.Series) -> str:
     else:
         return row['Circuit_Name']
 
+def _parse_event_times(values: pd.Series) -> np.ndarray:
+    """
+    Parse a timestamp column into a datetime64 array in a single pass.
+    
+    The interval files use EVENT_TIME_FORMAT; any values that do not match it
+    (fractional seconds, ISO 'T' separators) are re-parsed with mixed inference
+    so odd rows never abort the whole column.
+    
+    Args:
+        values: Series of timestamp strings or datetimes
+        
+    Returns:
+        datetime64[ns] array aligned with the input
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]')
+    
+    times = pd.to_datetime(values, format=EVENT_TIME_FORMAT, errors='coerce')
+    unparsed = times.isna() & values.notna()
+    if unparsed.any():
+        times[unparsed] = pd.to_datetime(values[unparsed], format='mixed', errors='coerce')
+    
+    return times.to_numpy(dtype='datetime64[ns]')
+
 def create_event_log(circuit_df: pd.DataFrame) -> pd.DataFrame:
     """
     Create event log DataFrame from circuit intervals.
     
     Transforms circuit interval data (with down and up times) into a time-ordered
-    sequence of signal events.
+    sequence of signal events. Each interval contributes a Down event followed by
+    an Up event; the columns are built as interleaved arrays and stable-sorted by
+    time, so events sharing a timestamp keep their interval order.
     
     Args:
         circuit_df: DataFrame with circuit interval data
@@ -79,31 +122,28 @@ def create_event_log(circuit_df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Event log DataFrame with signal events in chronological order
     """
-    # Create empty list for log entries
-    log_entries = []
-    
-    # Process each circuit interval
-    for _, row in circuit_df.iterrows():
-        # Add 'down' event
-        log_entries.append({
-            'SIGNAL NAME': row['Circuit_Name'],
-            'SIGNAL STATUS': 'Down',
-            'SIGNAL TIME': pd.to_datetime(row['Down_timestamp'])
-        })
-        
-        # Add 'up' event
-        log_entries.append({
-            'SIGNAL NAME': row['Circuit_Name'],
-            'SIGNAL STATUS': 'Up',
-            'SIGNAL TIME': pd.to_datetime(row['Up_timestamp'])
-        })
-    
-    # Create DataFrame from log entries and sort by time
-    log_df = pd.DataFrame(log_entries)
-    log_df.columns = log_df.columns.str.strip()
-    log_df['SIGNAL TIME'] = pd.to_datetime(log_df['SIGNAL TIME'])
-    log_df.sort_values(by='SIGNAL TIME', inplace=True)
-    log_df.reset_index(drop=True, inplace=True)
+    interval_count = len(circuit_df)
+    
+    # Parse each timestamp column once
+    down_times = _parse_event_times(circuit_df['Down_timestamp'])
+    up_times = _parse_event_times(circuit_df['Up_timestamp'])
+    
+    # Interleave Down/Up events: row i becomes events 2i (Down) and 2i + 1 (Up)
+    signal_times = np.empty(interval_count * 2, dtype='datetime64[ns]')
+    signal_times[0::2] = down_times
+    signal_times[1::2] = up_times
+    
+    signal_names = np.repeat(circuit_df['Circuit_Name'].to_numpy(dtype=object), 2)
+    status_codes = np.tile(np.array([0, 1], dtype=np.int8), interval_count)
+    
+    # Stable sort keeps Down before Up for zero-length intervals
+    order = np.argsort(signal_times, kind='stable')
+    
+    log_df = pd.DataFrame({
+        'SIGNAL NAME': signal_names[order],
+        'SIGNAL STATUS': pd.Categorical.from_codes(status_codes[order], categories=EVENT_STATUSES),
+        'SIGNAL TIME': signal_times[order]
+    })
     
     return log_df
 
@@ -111,12 +151,66 @@ def create_event_log(circuit_df: pd.DataFrame) -> pd.DataFrame:
 # MAIN FUNCTION       #
 #######################
 
+def read_dataset(nodes_path: str, edges_path: str, circuit_path: str) -> TrainMovementDataset:
+    """
+    Parse railway data files into a dataset.
+    
+    Loads nodes, edges, and circuit interval data, processes track circuits 
+    based on switch positions, and creates an event log from circuit intervals.
+    
+    Args:
+        nodes_path: Path to the nodes CSV file
+        edges_path: Path to the edges CSV file
+        circuit_path: Path to the circuit interval CSV file
+        
+    Returns:
+        TrainMovementDataset holding the parsed frames
+    """
+    nodes_df = pd.read_csv(nodes_path)
+    edges_df = pd.read_csv(edges_path)
+    circuit_df = pd.read_csv(circuit_path)
+    
+    # Process circuit data
+    circuit_df['Circuit_Name'] = circuit_df.apply(modify_track_circuit, axis=1)
+    circuit_df = circuit_df.dropna(subset=['Down_timestamp', 'Up_timestamp'])
+    
+    # Create event log from circuit intervals
+    log_df = create_event_log(circuit_df)
+    
+    current_app.logger.info(f"Parsed train movement dataset: {len(circuit_df)} intervals, {len(log_df)} events")
+    return TrainMovementDataset(nodes_df, edges_df, log_df, circuit_df)
+
+def load_dataset(use_uploaded: bool = False) -> TrainMovementDataset:
+    """
+    Get the dataset for the current data source from the process-wide cache.
+    
+    Files are only parsed when their (path, size, mtime) signature is not
+    already cached, so repeat requests skip CSV parsing entirely. The returned
+    frames are shared between requests and must not be modified in place.
+    
+    Station files are requested through the station registry first, so a
+    request arriving during the startup warm-up waits for that load instead
+    of parsing the same files itself.
+    
+    Args:
+        use_uploaded: Flag to use uploaded files instead of default files
+        
+    Returns:
+        TrainMovementDataset for the selected files
+    """
+    if not (use_uploaded and 'uploaded_files' in session):
+        station_registry.get_data(get_request_station(), 'train_movement')
+    
+    paths = get_data_paths(use_uploaded)
+    return dataset_cache.get_or_load(paths, read_dataset)
+
 def load_and_process_data(use_uploaded: bool = False) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
     """
     Load and process railway data files.
     
     This function loads nodes, edges, and circuit interval data, processes track circuits 
     based on switch positions, and creates an event log from circuit intervals.
+    Parsed data is served from the dataset cache when the files are unchanged.
     
     Args:
         use_uploaded: Flag to use uploaded files instead of default files
@@ -128,30 +222,53 @@ def load_and_process_data(use_uploaded: bool = False) -> Tuple[Optional[pd.DataF
         - DataFrame with log events
         - DataFrame with circuit data
     """
-    try:
-        # Get file paths
-        nodes_path, edges_path, circuit_path = get_data_paths(use_uploaded)
-        
-        # Load data files
-        nodes_df = pd.read_csv(nodes_path)
-        edges_df = pd.read_csv(edges_path)
-        circuit_df = pd.read_csv(circuit_path)
-        
-        # Process circuit data
-        circuit_df['Circuit_Name'] = circuit_df.apply(modify_track_circuit, axis=1)
-        circuit_df = circuit_df.dropna(subset=['Down_timestamp', 'Up_timestamp'])
-        
-        # Create event log from circuit intervals
-        log_df = create_event_log(circuit_df)
+    dataset = get_dataset(use_uploaded)
+    if dataset is None:
+        return None, None, None, None
+    return dataset.as_tuple()
+
+def get_dataset(use_uploaded: bool = False) -> Optional[TrainMovementDataset]:
+    """
+    Get the cached dataset for the current data source, logging load failures.
+    
+    Args:
+        use_uploaded: Flag to use uploaded files instead of default files
         
-        return nodes_df, edges_df, log_df, circuit_df
+    Returns:
+        TrainMovementDataset, or None if the files could not be loaded
+    """
+    try:
+        return load_dataset(use_uploaded)
         
     except FileNotFoundError as e:
         current_app.logger.error(f"Data file not found: {str(e)}")
-        return None, None, None, None
+        return None
     except pd.errors.EmptyDataError as e:
         current_app.logger.error(f"Empty data file: {str(e)}")
-        return None, None, None, None
+        return None
     except Exception as e:
         current_app.logger.error(f"Error loading and processing data: {str(e)}")
-        return None, None, None, None
+        return None
+
+def warm_station_dataset(station: Station) -> Dict[str, Any]:
+    """
+    Parse a station's replay dataset into the dataset cache and build its topology.
+    
+    Args:
+        station: Station declaring the nodes, edges and replay interval files
+        
+    Returns:
+        Summary of the warmed dataset
+    """
+    from .topology import get_topology
+    
+    paths = tuple(station.require(role) for role in STATION_FILE_ROLES)
+    dataset = dataset_cache.get_or_load(paths, read_dataset)
+    topology = get_topology(dataset)
+    return {
+        "intervals": len(dataset.circuit_df),
+        "events": len(dataset.log_df),
+        "topology_id": topology.id if topology is not None else None
+    }
+
+station_registry.register_loader('train_movement', warm_station_dataset, roles=STATION_FILE_ROLES)
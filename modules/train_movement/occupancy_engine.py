@@ -0,0 +1,277 @@
+"""
+Train Movement Occupancy Engine Module
+
+This module provides a NumPy alternative to the event-by-event replay loop in
+train_movement. Circuits are mapped to integer edge indices and the sorted event
+log is turned into per-edge +1/-1 occupancy deltas. A cumulative sum over those
+deltas gives the occupancy of every edge after every event, which is stored as a
+bit-packed (events x edges) matrix.
+
+The loop engine only starts a new train when a track goes down while nothing is
+occupied, and every later down event joins that train, so the train number at
+each event is the running count of those empty-to-occupied transitions. Colors,
+widths, train positions and signal states are then plain array lookups.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .train_movement import (
+    TRAIN_COLOR_PALETTE, build_signal_edge_index, compute_signal_states, get_track_position_index,
+    time_bucket_ends
+)
+
+# Rows processed per cumulative-sum chunk, bounding the dense working set
+CHUNK_EVENTS = 65536
+
+INACTIVE_COLOR = '#0066cc'
+INACTIVE_WIDTH = 3
+OCCUPIED_WIDTH = 6
+
+
+def occupancy_deltas(edge_idx: np.ndarray, is_down: np.ndarray) -> np.ndarray:
+    """
+    Convert events into per-edge occupancy deltas.
+
+    A down event on a free edge is +1, an up event on an occupied edge is -1 and
+    repeated events that do not change the edge state are 0, matching the set
+    semantics of the loop engine.
+
+    Args:
+        edge_idx: Edge index per event (-1 for circuits not in the topology)
+        is_down: True for down events
+
+    Returns:
+        int8 array of deltas, one per event
+    """
+    deltas = np.zeros(len(edge_idx), dtype=np.int8)
+    valid = np.flatnonzero(edge_idx >= 0)
+    if not len(valid):
+        return deltas
+
+    # Group valid events by edge while keeping time order inside each edge
+    order = valid[np.argsort(edge_idx[valid], kind='stable')]
+    edges = edge_idx[order]
+    states = is_down[order].astype(np.int8)
+
+    # State before each event is the state after the previous event on the same edge
+    previous = np.zeros(len(order), dtype=np.int8)
+    previous[1:] = states[:-1]
+    previous[np.r_[True, edges[1:] != edges[:-1]]] = 0
+
+    deltas[order] = states - previous
+    return deltas
+
+
+class OccupancyMatrix:
+    """Bit-packed occupancy of every edge after every event, plus the train number per event"""
+
+    def __init__(self, packed: np.ndarray, train_numbers: np.ndarray, edge_count: int,
+                 times: np.ndarray, edge_tracks: List[str]):
+        self.packed = packed
+        self.train_numbers = train_numbers
+        self.edge_count = edge_count
+        self.times = times
+        self.edge_tracks = edge_tracks
+
+    @classmethod
+    def from_log(cls, log_df: pd.DataFrame, track_to_edge_idx: Dict[str, int],
+                 edge_count: int) -> "OccupancyMatrix":
+        """
+        Build the occupancy matrix for a sorted signal log.
+
+        Args:
+            log_df: Signal log sorted by time
+            track_to_edge_idx: Mapping of track IDs to edge indices
+            edge_count: Number of edges in the topology
+
+        Returns:
+            OccupancyMatrix for the log
+        """
+        edge_idx = log_df['SIGNAL NAME'].map(track_to_edge_idx).fillna(-1).to_numpy(dtype=np.int64)
+        statuses = log_df['SIGNAL STATUS'].astype(str).str.strip().str.lower()
+        is_down = (statuses == 'down').to_numpy()
+
+        deltas = occupancy_deltas(edge_idx, is_down)
+
+        # A new train starts when an edge goes down while nothing is occupied
+        occupied_count = np.cumsum(deltas, dtype=np.int64)
+        count_before = np.concatenate(([0], occupied_count[:-1]))
+        new_train = (deltas == 1) & (count_before == 0)
+        train_numbers = np.cumsum(new_train, dtype=np.int64)
+        train_numbers[occupied_count == 0] = 0
+
+        packed = cls._pack_occupancy(edge_idx, deltas, edge_count)
+
+        edge_tracks = [''] * edge_count
+        for track_id, idx in track_to_edge_idx.items():
+            edge_tracks[idx] = track_id
+
+        times = log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]')
+        return cls(packed, train_numbers, edge_count, times, edge_tracks)
+
+    @staticmethod
+    def _pack_occupancy(edge_idx: np.ndarray, deltas: np.ndarray, edge_count: int) -> np.ndarray:
+        """Cumulative-sum the deltas per edge in chunks and bit-pack the rows."""
+        event_count = len(deltas)
+        packed = np.zeros((event_count, (edge_count + 7) // 8), dtype=np.uint8)
+        carry = np.zeros(edge_count, dtype=np.int8)
+        changed = np.flatnonzero(deltas)
+
+        for start in range(0, event_count, CHUNK_EVENTS):
+            stop = min(start + CHUNK_EVENTS, event_count)
+            dense = np.zeros((stop - start, edge_count), dtype=np.int8)
+            rows = changed[(changed >= start) & (changed < stop)]
+            dense[rows - start, edge_idx[rows]] = deltas[rows]
+            np.cumsum(dense, axis=0, dtype=np.int8, out=dense)
+            dense += carry
+            carry = dense[-1].copy()
+            packed[start:stop] = np.packbits(dense.astype(bool), axis=1)
+
+        return packed
+
+    @property
+    def event_count(self) -> int:
+        """Number of events (rows) in the matrix."""
+        return len(self.packed)
+
+    def occupancy(self, event_idx: int) -> np.ndarray:
+        """Return the boolean occupancy of every edge after event_idx."""
+        return np.unpackbits(self.packed[event_idx], count=self.edge_count).astype(bool)
+
+    def occupancy_rows(self, start: int, stop: int) -> np.ndarray:
+        """Return the boolean occupancy rows for events start .. stop - 1."""
+        return np.unpackbits(self.packed[start:stop], axis=1, count=self.edge_count).astype(bool)
+
+    def iter_frames(self, G=None, positions: Optional[Dict] = None,
+                    signal_traces: Optional[List] = None, start: int = 0,
+                    stop: Optional[int] = None, resolution: Optional[pd.Timedelta] = None,
+                    flag_transient: bool = False) -> Iterator[Tuple[Dict, str, np.datetime64]]:
+        """
+        Yield frames in the format produced by train_movement.create_frame_data.
+
+        Args:
+            G: NetworkX graph, used for train icon anchors
+            positions: Dictionary of node positions
+            signal_traces: Signal indicator traces (signals are omitted if None)
+            start: First event index
+            stop: Event index to stop before (defaults to the end of the log)
+            resolution: Emit one frame per time bucket of this size, at the
+                bucket's last event (see train_movement.time_bucket_ends)
+            flag_transient: With resolution, add 'transient_tracks' to each frame
+
+        Yields:
+            Tuple of (frame data, time label, frame time as datetime64)
+        """
+        stop = self.event_count if stop is None else min(stop, self.event_count)
+        palette = np.array(TRAIN_COLOR_PALETTE, dtype=object)
+        track_positions = get_track_position_index(G, positions) if G is not None and positions else None
+
+        signal_edges = None
+        if signal_traces:
+            track_to_edge_idx = {track_id: idx for idx, track_id in enumerate(self.edge_tracks) if track_id}
+            signal_edges = build_signal_edge_index(signal_traces, track_to_edge_idx)
+
+        transient = None
+        if resolution is None:
+            rows = np.arange(start, stop)
+            frame_times = self.times[start:stop]
+        else:
+            bucket_ends, bucket_starts = time_bucket_ends(self.times[start:stop], resolution)
+            rows = bucket_ends + start
+            frame_times = bucket_starts
+            if flag_transient and len(rows):
+                transient = self._transient_rows(rows, start)
+
+        labels = pd.DatetimeIndex(frame_times).strftime('%Y-%m-%d %H:%M:%S')
+
+        for chunk_idx in range(0, len(rows), CHUNK_EVENTS):
+            chunk_rows = rows[chunk_idx:chunk_idx + CHUNK_EVENTS]
+            occupied = np.unpackbits(self.packed[chunk_rows], axis=1, count=self.edge_count).astype(bool)
+            train_numbers = self.train_numbers[chunk_rows]
+            train_colors = palette[(np.maximum(train_numbers, 1) - 1) % len(palette)]
+
+            widths = np.where(occupied, OCCUPIED_WIDTH, INACTIVE_WIDTH)
+            colors = np.where(occupied, train_colors[:, None], INACTIVE_COLOR)
+
+            signal_masks = None
+            if signal_edges is not None:
+                signal_bytes = np.packbits(compute_signal_states(occupied, signal_edges), axis=1)
+                signal_masks = [row.tobytes().hex() for row in signal_bytes]
+
+            for row in range(len(occupied)):
+                active_edges = np.flatnonzero(occupied[row])
+                active_tracks = [self.edge_tracks[idx] for idx in active_edges]
+
+                trains = {}
+                if active_tracks and track_positions is not None:
+                    train_id = f"Train-{train_numbers[row]}"
+                    train_color = train_colors[row]
+                    trains[train_id] = [
+                        {**track_positions[track_id], 'color': train_color}
+                        for track_id in active_tracks
+                        if track_id in track_positions
+                    ]
+
+                signals = signal_masks[row] if signal_masks is not None else None
+
+                frame = {
+                    "colors": colors[row].tolist(),
+                    "widths": widths[row].tolist(),
+                    "trains": trains,
+                    "active_tracks": active_tracks,
+                    "signals": signals
+                }
+                if transient is not None:
+                    frame["transient_tracks"] = [
+                        self.edge_tracks[idx] for idx in np.flatnonzero(transient[chunk_idx + row])
+                    ]
+
+                yield frame, labels[chunk_idx + row], frame_times[chunk_idx + row]
+
+    def _transient_rows(self, bucket_ends: np.ndarray, start: int) -> np.ndarray:
+        """
+        Flag edges occupied at some point in each bucket but free at its end.
+
+        A bucket covers the state before its first event (the previous row)
+        through its last event, so each bucket ORs its packed rows plus the row
+        before it.
+
+        Args:
+            bucket_ends: Event index of the last event in each bucket
+            start: Event index of the first event of the first bucket
+
+        Returns:
+            Boolean (buckets x edges) matrix
+        """
+        bucket_starts = np.r_[start, bucket_ends[:-1] + 1]
+        seen = np.bitwise_or.reduceat(self.packed[start:bucket_ends[-1] + 1], bucket_starts - start, axis=0)
+        has_previous = bucket_starts > 0
+        seen[has_previous] |= self.packed[bucket_starts[has_previous] - 1]
+        seen &= ~self.packed[bucket_ends]
+        return np.unpackbits(seen, axis=1, count=self.edge_count).astype(bool)
+
+
+def get_occupancy_matrix(dataset, filter_key, log_df: pd.DataFrame, track_to_edge_idx: Dict[str, int],
+                         edge_count: int) -> OccupancyMatrix:
+    """
+    Get the occupancy matrix for a filtered replay of a dataset, building it on first use.
+
+    Args:
+        dataset: Cached TrainMovementDataset the log was derived from
+        filter_key: Hashable description of the filters applied to the log
+        log_df: Filtered signal log
+        track_to_edge_idx: Mapping of track IDs to edge indices
+        edge_count: Number of edges in the topology
+
+    Returns:
+        OccupancyMatrix for the filtered log
+    """
+    from .replay_timeline import MAX_TIMELINES_PER_DATASET
+
+    return dataset.get_keyed_index(
+        'occupancy_matrices', filter_key,
+        lambda: OccupancyMatrix.from_log(log_df, track_to_edge_idx, edge_count),
+        MAX_TIMELINES_PER_DATASET
+    )
@@ -0,0 +1,151 @@
+"""
+Train Movement Replay Timeline Module
+
+This module makes replays seekable. A ReplayTimeline stores a snapshot of the
+occupancy and train-assignment state every KEYFRAME_INTERVAL signal events, so a
+window of frames starting anywhere in the log is produced by restoring the
+nearest earlier keyframe and replaying at most KEYFRAME_INTERVAL events, instead
+of replaying the log from its start.
+"""
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from .dataset_cache import TrainMovementDataset
+from .train_movement import KEYFRAME_INTERVAL, ReplayState, find_time_offset, iter_animation_frames
+
+# Maximum number of filtered timelines kept per dataset
+MAX_TIMELINES_PER_DATASET = 16
+
+
+class ReplayTimeline:
+    """Event log of one replay plus keyframes of the replay state every keyframe_interval events"""
+
+    def __init__(self, log_df: pd.DataFrame, keyframes: List[Dict], keyframe_interval: int = KEYFRAME_INTERVAL,
+                 state_class: Type[ReplayState] = ReplayState):
+        self.log_df = log_df
+        self.keyframes = keyframes
+        self.keyframe_interval = keyframe_interval
+        self.state_class = state_class
+        self.times = log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]')
+
+    @classmethod
+    def build(cls, log_df: pd.DataFrame, track_to_edge_idx: Dict[str, int],
+              keyframe_interval: int = KEYFRAME_INTERVAL,
+              initial_state: Optional[ReplayState] = None) -> "ReplayTimeline":
+        """
+        Build keyframes with a single pass of the state machine (no frame rendering).
+
+        Args:
+            log_df: Sorted, filtered signal log of the replay
+            track_to_edge_idx: Mapping of track IDs to edge indices
+            keyframe_interval: Number of events between keyframes
+            initial_state: Empty state to replay with (a fresh ReplayState if omitted)
+
+        Returns:
+            ReplayTimeline for the log
+        """
+        state = initial_state if initial_state is not None else ReplayState()
+        keyframes = []
+        events = log_df[['SIGNAL NAME', 'SIGNAL STATUS']].itertuples(index=False, name=None)
+        for event_idx, (name, status) in enumerate(events):
+            if event_idx % keyframe_interval == 0:
+                keyframes.append(state.snapshot())
+            state.apply(name, status.strip().lower(), track_to_edge_idx)
+        return cls(log_df, keyframes, keyframe_interval, type(state))
+
+    @property
+    def frame_count(self) -> int:
+        """Total number of frames (one per signal event)."""
+        return len(self.log_df)
+
+    def offset_for_time(self, timestamp) -> int:
+        """
+        Return the index of the first frame at or after timestamp.
+
+        Args:
+            timestamp: datetime or ISO string
+
+        Returns:
+            Frame offset in [0, frame_count]
+        """
+        return find_time_offset(self.times, timestamp)
+
+    def state_at(self, offset: int, track_to_edge_idx: Dict[str, int]) -> ReplayState:
+        """
+        Reconstruct the replay state just before the event at offset.
+
+        Args:
+            offset: Frame index
+            track_to_edge_idx: Mapping of track IDs to edge indices
+
+        Returns:
+            ReplayState after all events before offset
+        """
+        keyframe_idx = min(offset // self.keyframe_interval, len(self.keyframes) - 1)
+        state = self.state_class.from_snapshot(self.keyframes[keyframe_idx])
+
+        start = keyframe_idx * self.keyframe_interval
+        catch_up = self.log_df.iloc[start:offset]
+        for name, status in catch_up[['SIGNAL NAME', 'SIGNAL STATUS']].itertuples(index=False, name=None):
+            state.apply(name, status.strip().lower(), track_to_edge_idx)
+        return state
+
+    def iter_window(self, offset: int, limit: int, track_to_edge_idx: Dict[str, int],
+                    edge_traces: List, G=None, positions: Optional[Dict] = None,
+                    signal_traces: Optional[List] = None, resolution: Optional[pd.Timedelta] = None,
+                    flag_transient: bool = False) -> Iterator[Tuple[Dict, str, np.datetime64]]:
+        """
+        Yield frames for events offset .. offset + limit - 1, resuming from the nearest keyframe.
+
+        Without a resolution every event is one frame; with one, the events
+        are coalesced into time buckets, so offset should start a bucket.
+
+        Args:
+            offset: First event index
+            limit: Maximum number of events
+            Remaining arguments are passed to iter_animation_frames
+
+        Yields:
+            Tuple of (frame data, time label, frame time as datetime64)
+        """
+        if not self.keyframes or offset >= self.frame_count or limit <= 0:
+            return
+
+        state = self.state_at(offset, track_to_edge_idx)
+        window_log = self.log_df.iloc[offset:offset + limit]
+        yield from iter_animation_frames(
+            window_log, track_to_edge_idx, edge_traces, G, positions, signal_traces, state=state,
+            resolution=resolution, flag_transient=flag_transient
+        )
+
+
+def get_replay_timeline(dataset: TrainMovementDataset, filter_key: Hashable, log_df: pd.DataFrame,
+                        track_to_edge_idx: Dict[str, int], keyframes: Optional[List[Dict]] = None,
+                        state_class: Type[ReplayState] = ReplayState,
+                        initial_state: Optional[ReplayState] = None) -> ReplayTimeline:
+    """
+    Get the timeline for a filtered replay of a dataset, building it on first use.
+
+    Timelines are stored with the dataset, so they are dropped together with it
+    when the dataset is evicted from the cache.
+
+    Args:
+        dataset: Cached dataset the log was derived from
+        filter_key: Hashable description of the filters applied to the log
+        log_df: Filtered signal log
+        track_to_edge_idx: Mapping of track IDs to edge indices
+        keyframes: Keyframes already collected while generating frames, if any
+        state_class: ReplayState class the keyframes were snapshotted from
+        initial_state: Empty state to build keyframes with when none were collected
+
+    Returns:
+        ReplayTimeline for the filtered log
+    """
+    def build() -> ReplayTimeline:
+        if keyframes is not None:
+            return ReplayTimeline(log_df, keyframes, state_class=state_class)
+        return ReplayTimeline.build(log_df, track_to_edge_idx, initial_state=initial_state)
+
+    return dataset.get_keyed_index('replay_timelines', filter_key, build, MAX_TIMELINES_PER_DATASET)
@@ -5,16 +5,42 @@ This module defines Flask routes for the train movement visualization system.
 """
 import os
 import tempfile
-from flask import Blueprint, render_template, request, jsonify, current_app, session
+from flask import Blueprint, render_template, request, jsonify, current_app, session, url_for, stream_with_context
 from datetime import datetime
 from typing import Tuple, Optional
+import pandas as pd
 
 # Import get_train_movement_data function
-from .train_movement import get_train_movement_data
-from .load_train_movement import load_and_process_data
+from .train_movement import (
+    DEFAULT_WINDOW_LIMIT, ENGINE_LOOP, ENGINES, TRAIN_MODE_GLOBAL, TRAIN_MODES,
+    get_train_movement_data, get_train_movement_window
+)
+from modules.stations import LIVE_DATALOG, bind_station, get_request_station, station_registry
+from .load_train_movement import get_dataset, load_and_process_data
+from .topology import get_topology
+from .frame_encoding import (
+    BINARY_FRAMES_MIMETYPE, FRAME_FORMAT_BINARY, FRAME_FORMAT_FULL, FRAME_FORMATS, pack_binary_frames
+)
 
 # Create Blueprint with template folder pointing to the main templates directory
 train_movement_bp = Blueprint('train_movement', __name__, template_folder='../../templates')
+bind_station(train_movement_bp)
+
+# Endpoints that do not read the station's replay data
+STATION_DATA_EXEMPT_ENDPOINTS = {'train_movement.index', 'train_movement.upload_files', 'train_movement.test'}
+
+@train_movement_bp.before_request
+def require_station_topology():
+    """Answer data requests for a station without nodes/edges/replay files with a 404."""
+    if request.endpoint in STATION_DATA_EXEMPT_ENDPOINTS:
+        return None
+    if request.args.get('use_uploaded', 'false').lower() == 'true' and 'uploaded_files' in session:
+        return None
+    
+    station = get_request_station()
+    if not station_registry.has_data(station, 'train_movement'):
+        return jsonify({"error": f"Station '{station.key}' has no topology", "station": station.key}), 404
+    return None
 
 # Temporary directory for uploaded files
 UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'railway_uploads')
@@ -64,16 +90,54 @@ def get_track_data():
         # Get Net_Group_ID filter parameter
         net_group_id = request.args.get('net_group', '')
         
+        # Get route/chain scope parameters
+        route_id = request.args.get('route', '')
+        chain_id = request.args.get('chain', '')
+        validate_replay_scope(use_uploaded, route_id, chain_id)
+        
+        # Get frame encoding ('full', 'delta' or 'binary')
+        frame_format = negotiate_frame_format()
+        if frame_format not in FRAME_FORMATS:
+            return jsonify({"error": f"Unsupported frame_format: {frame_format}"}), 400
+        
+        # Get replay engine ('loop' or 'numpy')
+        engine = request.args.get('engine', ENGINE_LOOP).lower()
+        if engine not in ENGINES:
+            return jsonify({"error": f"Unsupported engine: {engine}"}), 400
+        
+        # Get train identification mode ('global' or 'adjacency')
+        train_mode = request.args.get('train_mode', TRAIN_MODE_GLOBAL).lower()
+        if train_mode not in TRAIN_MODES:
+            return jsonify({"error": f"Unsupported train_mode: {train_mode}"}), 400
+        
+        # Coalesce events into time buckets (e.g. '10s', '1min') if requested
+        resolution = parse_resolution(request.args.get('resolution', ''))
+        flag_transient = request.args.get('flag_transient', 'false').lower() == 'true'
+        
+        # Embed the static figure only when explicitly requested
+        include_figure = request.args.get('include_figure', 'false').lower() == 'true'
+        
         # Get data with filters applied
         data = get_train_movement_data(
             use_uploaded=use_uploaded, 
             start_datetime=start_date,
             end_datetime=end_date,
-            net_group_id=net_group_id
+            net_group_id=net_group_id,
+            frame_format=frame_format,
+            engine=engine,
+            include_figure=include_figure,
+            train_mode=train_mode,
+            resolution=resolution,
+            flag_transient=flag_transient,
+            route_id=route_id,
+            chain_id=chain_id
         )
+        add_topology_url(data, use_uploaded)
         
-        return jsonify(data)
+        return frames_response(data)
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error in get_track_data: {str(e)}")
         # Return a more detailed error for debugging
@@ -84,17 +148,204 @@ def get_track_data():
         }
         return jsonify(error_details), 500
 
+@train_movement_bp.route('/get_topology')
+def get_topology_figure():
+    """
+    API endpoint to get the static track layout figure.
+    
+    The figure is built once per nodes/edges content hash and served with
+    that hash as its ETag, so unchanged layouts are answered with 304.
+    """
+    try:
+        use_uploaded = request.args.get('use_uploaded', 'false').lower() == 'true'
+        
+        dataset = get_dataset(use_uploaded=use_uploaded)
+        if dataset is None:
+            return jsonify({"error": "Failed to load data files"}), 500
+        
+        topology = get_topology(dataset)
+        if topology is None:
+            return jsonify({"error": "Failed to build graph"}), 500
+        
+        response = current_app.response_class(topology.figure_json, mimetype='application/json')
+        response.set_etag(topology.etag)
+        # Let browsers keep the figure but revalidate it on every use
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in get_topology: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@train_movement_bp.route('/get_frame_window')
+def get_frame_window():
+    """
+    API endpoint to get a slice of replay frames.
+    
+    Query parameters are the get_track_data filters and options (including
+    'resolution' and 'flag_transient') plus either 'offset' (frame index) or
+    'time' (ISO datetime), and 'limit' (number of frames).
+    """
+    try:
+        use_uploaded = request.args.get('use_uploaded', 'false').lower() == 'true'
+        start_date, end_date = parse_datetime_parameters()
+        net_group_id = request.args.get('net_group', '')
+        route_id = request.args.get('route', '')
+        chain_id = request.args.get('chain', '')
+        validate_replay_scope(use_uploaded, route_id, chain_id)
+        
+        frame_format = negotiate_frame_format()
+        if frame_format not in FRAME_FORMATS:
+            return jsonify({"error": f"Unsupported frame_format: {frame_format}"}), 400
+        
+        engine = request.args.get('engine', ENGINE_LOOP).lower()
+        if engine not in ENGINES:
+            return jsonify({"error": f"Unsupported engine: {engine}"}), 400
+        
+        train_mode = request.args.get('train_mode', TRAIN_MODE_GLOBAL).lower()
+        if train_mode not in TRAIN_MODES:
+            return jsonify({"error": f"Unsupported train_mode: {train_mode}"}), 400
+        
+        offset = request.args.get('offset', type=int)
+        limit = request.args.get('limit', DEFAULT_WINDOW_LIMIT, type=int)
+        at_time = parse_datetime_value(request.args.get('time', ''), 'time')
+        resolution = parse_resolution(request.args.get('resolution', ''))
+        flag_transient = request.args.get('flag_transient', 'false').lower() == 'true'
+        
+        data = get_train_movement_window(
+            use_uploaded=use_uploaded,
+            start_datetime=start_date,
+            end_datetime=end_date,
+            net_group_id=net_group_id,
+            offset=offset,
+            at_time=at_time,
+            limit=limit,
+            frame_format=frame_format,
+            engine=engine,
+            train_mode=train_mode,
+            route_id=route_id,
+            chain_id=chain_id,
+            resolution=resolution,
+            flag_transient=flag_transient
+        )
+        add_topology_url(data, use_uploaded)
+        
+        return frames_response(data)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error in get_frame_window: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @train_movement_bp.route('/get_routes')
 def get_routes():
-    """API endpoint to get available routes for filtering"""
+    """API endpoint to get the routes and chains available for scoping a replay"""
     try:
-        # This is a placeholder - in a real app, you would fetch actual routes
-        routes = ["101", "102", "103", "104", "105"]
-        return jsonify({"routes": routes})
+        use_uploaded = request.args.get('use_uploaded', 'false').lower() == 'true'
+        
+        dataset = get_dataset(use_uploaded=use_uploaded)
+        if dataset is None:
+            return jsonify({"routes": [], "chains": [], "error": "Failed to load data"})
+        
+        topology = get_topology(dataset)
+        if topology is None:
+            return jsonify({"routes": [], "chains": [], "error": "Failed to build graph"})
+        
+        from .filter_features import get_scope_index, sorted_scope_ids
+        scope_index = get_scope_index(dataset, topology.track_to_edge_idx, topology.edge_count)
+        
+        return jsonify({
+            "routes": sorted_scope_ids(list(scope_index['route'])),
+            "chains": sorted_scope_ids(list(scope_index['chain']))
+        })
     except Exception as e:
         current_app.logger.error(f"Error getting routes: {str(e)}")
         return jsonify({"routes": [], "error": str(e)})
 
+#######################
+# LIVE MODE           #
+#######################
+
+@train_movement_bp.route('/live/stream')
+def live_stream():
+    """
+    Server-Sent Events stream of the live datalog replay.
+    
+    The first event is a 'snapshot' with the current state in the delta
+    format's initial-frame layout; every following 'delta' event is one
+    frame delta. All clients share one tailer per datalog, station topology
+    and train mode.
+    """
+    try:
+        train_mode = request.args.get('train_mode', TRAIN_MODE_GLOBAL).lower()
+        if train_mode not in TRAIN_MODES:
+            return jsonify({"error": f"Invalid train_mode: {train_mode}"}), 400
+        
+        tailer = get_live_feed_tailer(train_mode)
+        if tailer is None:
+            station = get_request_station()
+            return jsonify({"error": f"Live mode is not configured for station '{station.key}'"}), 404
+        
+        # The stream subscribes when it starts and unsubscribes when it ends
+        from .live_feed import iter_sse_messages
+        response = current_app.response_class(
+            stream_with_context(iter_sse_messages(tailer)), mimetype='text/event-stream'
+        )
+        response.cache_control.no_cache = True
+        # Keep reverse proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in live_stream: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@train_movement_bp.route('/live/status')
+def live_status():
+    """API endpoint describing the live datalog tailer"""
+    try:
+        train_mode = request.args.get('train_mode', TRAIN_MODE_GLOBAL).lower()
+        if train_mode not in TRAIN_MODES:
+            return jsonify({"error": f"Invalid train_mode: {train_mode}"}), 400
+        
+        tailer = get_live_feed_tailer(train_mode)
+        if tailer is None:
+            return jsonify({"configured": False})
+        return jsonify({"configured": True, **tailer.status()})
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in live_status: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def get_live_feed_tailer(train_mode: str):
+    """
+    Get the shared tailer of the request station's live datalog.
+    
+    The datalog is the station's live_datalog file (STATION_<KEY>_LIVE_DATALOG
+    or the stations config). The default station also falls back to the
+    TRAIN_MOVEMENT_LIVE_DATALOG app config value or environment variable.
+    Signal names are matched against the station's nodes/edges topology.
+    
+    Returns:
+        DatalogTailer, or None if the station has no live datalog
+    """
+    from .live_feed import LIVE_DATALOG_SETTING, get_live_tailer
+    
+    station = get_request_station()
+    path = station.path(LIVE_DATALOG)
+    if not path and station.key == station_registry.default_key:
+        path = current_app.config.get(LIVE_DATALOG_SETTING) or os.environ.get(LIVE_DATALOG_SETTING)
+    if not path:
+        return None
+    
+    dataset = get_dataset(use_uploaded=False)
+    topology = get_topology(dataset) if dataset is not None else None
+    if topology is None:
+        raise RuntimeError("Failed to build graph for the live datalog")
+    
+    return get_live_tailer(path, topology, train_mode)
+
 #######################
 # FILE UPLOAD HANDLING #
 #######################
@@ -213,6 +464,107 @@ def parse_datetime_parameters() -> Tuple[Optional[datetime], Optional[datetime]]
     
     return start_date, end_date
 
+def add_topology_url(data: dict, use_uploaded: bool) -> None:
+    """Add the topology endpoint URL to a frames response that references a topology."""
+    if 'topology' in data:
+        data['topology']['url'] = url_for(
+            'train_movement.get_topology_figure', use_uploaded=str(use_uploaded).lower()
+        )
+
+def validate_replay_scope(use_uploaded: bool, route_id: str, chain_id: str) -> None:
+    """
+    Check that a requested route/chain scope exists before generating frames.
+    
+    The frame generators report their failures in the payload, so an unknown
+    route or chain is rejected here to answer it with a 400.
+    
+    Raises:
+        ValueError: If the route or chain is not in the dataset
+    """
+    if not route_id and not chain_id:
+        return
+    
+    dataset = get_dataset(use_uploaded=use_uploaded)
+    topology = get_topology(dataset) if dataset is not None else None
+    if topology is None:
+        # Load failures are reported by the frame generators
+        return
+    
+    from .train_movement import get_replay_scope
+    get_replay_scope(dataset, topology, route_id, chain_id)
+
+def parse_datetime_value(value: str, name: str) -> Optional[datetime]:
+    """
+    Parse a single ISO datetime query parameter.
+    
+    Args:
+        value: Parameter value (empty string if not provided)
+        name: Parameter name for error messages
+        
+    Returns:
+        Parsed datetime, or None if the value is empty
+    """
+    if not value:
+        return None
+    
+    try:
+        if 'Z' in value:
+            value = value.replace('Z', '+00:00')
+        return datetime.fromisoformat(value)
+    except ValueError:
+        current_app.logger.error(f"Invalid {name} datetime format: {value}")
+        raise ValueError(f"Invalid {name} datetime format: {value}")
+
+def negotiate_frame_format() -> str:
+    """
+    Pick the frame encoding of a frames response.
+    
+    An explicit 'frame_format' query parameter wins; otherwise clients that
+    prefer BINARY_FRAMES_MIMETYPE over JSON in their Accept header get the
+    binary format and everyone else gets full JSON frames.
+    """
+    frame_format = request.args.get('frame_format', '').lower()
+    if frame_format:
+        return frame_format
+    
+    best = request.accept_mimetypes.best_match(['application/json', BINARY_FRAMES_MIMETYPE])
+    return FRAME_FORMAT_BINARY if best == BINARY_FRAMES_MIMETYPE else FRAME_FORMAT_FULL
+
+def frames_response(data: dict):
+    """Serialize a frames payload as JSON, or as a packed buffer for the binary format."""
+    if data.get("frame_format") == FRAME_FORMAT_BINARY and "error" not in data:
+        response = current_app.response_class(pack_binary_frames(data), mimetype=BINARY_FRAMES_MIMETYPE)
+        response.vary.add('Accept')
+        return response
+    
+    response = jsonify(data)
+    response.vary.add('Accept')
+    return response
+
+def parse_resolution(value: str) -> Optional[pd.Timedelta]:
+    """
+    Parse the frame coalescing resolution query parameter.
+    
+    Args:
+        value: Duration such as '1s', '10s' or '1min' (empty string if not provided)
+        
+    Returns:
+        Positive Timedelta, or None if the value is empty
+    """
+    if not value:
+        return None
+    
+    try:
+        resolution = pd.Timedelta(value)
+    except ValueError:
+        resolution = None
+    
+    # pd.Timedelta('NaT') parses, but never compares as <= 0
+    if resolution is None or pd.isna(resolution) or resolution <= pd.Timedelta(0):
+        current_app.logger.error(f"Invalid resolution: {value}")
+        raise ValueError(f"Invalid resolution: {value}")
+    return resolution
+
 @train_movement_bp.route('/test')
 def test():
     """Test endpoint to verify blueprint is working"""
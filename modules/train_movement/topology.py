@@ -0,0 +1,124 @@
+"""
+Train Movement Topology Module
+
+This module caches the static part of the train movement visualization: the
+networkx graph, the edge/label/signal traces and the serialized Plotly figure.
+None of it depends on the replay filters, so it is built once per nodes/edges
+content hash and shared by every request. The hash doubles as the ETag of the
+topology endpoint, letting browsers revalidate the figure with a 304.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import networkx as nx
+import pandas as pd
+import plotly.utils
+
+from .dataset_cache import TrainMovementDataset
+from .train_movement import build_graph_and_traces, create_plotly_figure, create_signal_indicators
+
+# Maximum number of distinct topologies kept in memory
+MAX_TOPOLOGIES = 8
+
+
+def topology_content_hash(nodes_df: pd.DataFrame, edges_df: pd.DataFrame) -> str:
+    """
+    Hash the content of the nodes and edges tables.
+
+    Args:
+        nodes_df: DataFrame containing node information
+        edges_df: DataFrame containing edge information
+
+    Returns:
+        Hex digest identifying the topology
+    """
+    digest = hashlib.sha1()
+    for df in (nodes_df, edges_df):
+        digest.update(','.join(map(str, df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class Topology:
+    """Graph, traces and serialized figure for one nodes/edges pair"""
+
+    def __init__(self, content_hash: str, G: nx.DiGraph, positions: Dict, track_to_edge_idx: Dict[str, int],
+                 edge_traces: List, label_traces: List, signal_traces: List):
+        self.id = content_hash
+        self.G = G
+        self.positions = positions
+        self.track_to_edge_idx = track_to_edge_idx
+        self.edge_traces = edge_traces
+        self.label_traces = label_traces
+        self.signal_traces = signal_traces
+
+        fig = create_plotly_figure(edge_traces, label_traces, signal_traces)
+        self.figure_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+    @property
+    def etag(self) -> str:
+        """ETag of the serialized figure."""
+        return self.id
+
+    @property
+    def edge_count(self) -> int:
+        """Number of edge traces in the figure."""
+        return len(self.edge_traces)
+
+
+_topologies: "OrderedDict[str, Topology]" = OrderedDict()
+_topologies_lock = threading.Lock()
+
+
+def build_topology(nodes_df: pd.DataFrame, edges_df: pd.DataFrame) -> Optional[Topology]:
+    """
+    Get the topology for a nodes/edges pair from the content-hash cache.
+
+    Args:
+        nodes_df: DataFrame containing node information
+        edges_df: DataFrame containing edge information
+
+    Returns:
+        Topology, or None if the graph could not be built
+    """
+    content_hash = topology_content_hash(nodes_df, edges_df)
+
+    with _topologies_lock:
+        topology = _topologies.get(content_hash)
+        if topology is not None:
+            _topologies.move_to_end(content_hash)
+            return topology
+
+    G, positions, track_to_edge_idx, edge_traces, label_traces = build_graph_and_traces(nodes_df, edges_df)
+    if G is None:
+        return None
+
+    signal_traces = create_signal_indicators(G, positions)
+    topology = Topology(content_hash, G, positions, track_to_edge_idx, edge_traces, label_traces, signal_traces)
+
+    with _topologies_lock:
+        _topologies[content_hash] = topology
+        while len(_topologies) > MAX_TOPOLOGIES:
+            _topologies.popitem(last=False)
+
+    return topology
+
+
+def get_topology(dataset: TrainMovementDataset) -> Optional[Topology]:
+    """
+    Get the topology of a cached dataset.
+
+    The content hash is computed once per dataset; datasets with identical
+    nodes and edges (for example an upload of the default files) share one
+    Topology.
+
+    Args:
+        dataset: Cached train movement dataset
+
+    Returns:
+        Topology, or None if the graph could not be built
+    """
+    return dataset.get_index('topology', lambda ds: build_topology(ds.nodes_df, ds.edges_df))
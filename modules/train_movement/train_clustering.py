@@ -0,0 +1,237 @@
+"""
+Train Movement Train Clustering Module
+
+This module identifies trains by track adjacency instead of by global occupancy.
+Two track circuits are adjacent when their edges share a node in edges.csv.
+Occupied tracks are kept in an incremental union-find, so an event that occupies
+a track only touches that track's occupied neighbours: a track next to one
+train joins it, a track next to several trains merges them, and a track with
+no occupied neighbour starts a new train. When a track is released, only the
+train it belonged to is re-checked for connectivity, and each piece that broke
+off becomes a new train. Unrelated trains in a busy yard therefore stay apart.
+"""
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Set
+
+import networkx as nx
+
+from .train_movement import TRAIN_COLOR_PALETTE, ReplayState
+
+TrackAdjacency = Dict[str, FrozenSet[str]]
+
+
+def build_track_adjacency(G: nx.DiGraph) -> TrackAdjacency:
+    """
+    Build the track circuit adjacency of a layout.
+
+    Args:
+        G: NetworkX DiGraph built from edges.csv by build_graph_and_traces
+
+    Returns:
+        Dictionary mapping each track_circuit_id to the track circuits sharing a node with it
+    """
+    node_tracks = defaultdict(set)
+    for u, v, track_id in G.edges(data='track_circuit_id'):
+        if track_id is not None:
+            node_tracks[u].add(track_id)
+            node_tracks[v].add(track_id)
+
+    neighbours = defaultdict(set)
+    for tracks in node_tracks.values():
+        for track_id in tracks:
+            neighbours[track_id].update(tracks)
+
+    return {
+        track_id: frozenset(others - {track_id})
+        for track_id, others in neighbours.items()
+    }
+
+
+def get_track_adjacency(G: nx.DiGraph) -> TrackAdjacency:
+    """Return the track adjacency stored on the graph, building it on first use."""
+    adjacency = G.graph.get('track_adjacency')
+    if adjacency is None:
+        adjacency = build_track_adjacency(G)
+        G.graph['track_adjacency'] = adjacency
+    return adjacency
+
+
+class AdjacencyReplayState(ReplayState):
+    """
+    Replay state that groups occupied tracks into trains by adjacency.
+
+    active_set, train_assignments and trains have the same meaning as in
+    ReplayState, so frames and keyframes are produced by the same code.
+    """
+
+    def __init__(self, adjacency: TrackAdjacency):
+        super().__init__()
+        self.adjacency = adjacency
+        self._parent: Dict[str, str] = {}
+        self._size: Dict[str, int] = {}
+        self._root_train: Dict[str, str] = {}
+
+    #######################
+    # UNION-FIND          #
+    #######################
+
+    def _find(self, track_id: str) -> str:
+        """Return the root of a track's block, compressing the path."""
+        root = track_id
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[track_id] != root:
+            self._parent[track_id], track_id = root, self._parent[track_id]
+        return root
+
+    def _make_set(self, track_id: str, train_id: str) -> None:
+        """Start a single-track block belonging to train_id."""
+        self._parent[track_id] = track_id
+        self._size[track_id] = 1
+        self._root_train[track_id] = train_id
+
+    def _union(self, a: str, b: str) -> str:
+        """
+        Merge the blocks of a and b and return the new root.
+
+        The larger block keeps its train; tracks of the smaller train are
+        reassigned to it.
+        """
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return root_a
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+
+        kept_train = self._root_train[root_a]
+        absorbed_train = self._root_train.pop(root_b)
+        for track_id in self.trains.pop(absorbed_train)["active_tracks"]:
+            self.train_assignments[track_id] = kept_train
+            self.trains[kept_train]["active_tracks"].add(track_id)
+
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size.pop(root_b)
+        return root_a
+
+    def _new_train(self) -> str:
+        """Register a new empty train and return its ID."""
+        self.train_count += 1
+        train_id = f"Train-{self.train_count}"
+        self.trains[train_id] = {
+            "color": TRAIN_COLOR_PALETTE[(self.train_count - 1) % len(TRAIN_COLOR_PALETTE)],
+            "active_tracks": set()
+        }
+        return train_id
+
+    def _rebuild_blocks(self, train_id: str, tracks: Set[str]) -> None:
+        """Rebuild the union-find blocks of a train after one of its tracks was released."""
+        for track_id in tracks:
+            self._parent.pop(track_id, None)
+            self._size.pop(track_id, None)
+            self._root_train.pop(track_id, None)
+
+        pieces = self._connected_pieces(tracks)
+        # The largest piece keeps the train, the others become new trains
+        pieces.sort(key=len, reverse=True)
+        for piece_idx, piece in enumerate(pieces):
+            piece_train = train_id if piece_idx == 0 else self._new_train()
+            self.trains[piece_train]["active_tracks"] = set(piece)
+            root = piece[0]
+            self._make_set(root, piece_train)
+            self._size[root] = len(piece)
+            for track_id in piece:
+                self._parent[track_id] = root
+                self.train_assignments[track_id] = piece_train
+
+    def _connected_pieces(self, tracks: Set[str]) -> List[List[str]]:
+        """Split a set of occupied tracks into adjacency-connected pieces."""
+        pieces = []
+        unvisited = set(tracks)
+        for start in sorted(tracks):
+            if start not in unvisited:
+                continue
+            unvisited.discard(start)
+            piece = [start]
+            stack = [start]
+            while stack:
+                for neighbour in self.adjacency.get(stack.pop(), ()):
+                    if neighbour in unvisited:
+                        unvisited.discard(neighbour)
+                        piece.append(neighbour)
+                        stack.append(neighbour)
+            pieces.append(piece)
+        return pieces
+
+    #######################
+    # EVENTS              #
+    #######################
+
+    def apply(self, name: str, status: str, track_to_edge_idx: Dict[str, int]) -> None:
+        """Apply one signal event to the state."""
+        if status == 'down' and name in track_to_edge_idx:
+            if name in self.active_set:
+                return
+            self.active_set.add(name)
+
+            neighbours = [track_id for track_id in self.adjacency.get(name, ()) if track_id in self._parent]
+            if neighbours:
+                # Join the block of the first occupied neighbour, then merge the rest
+                root = self._find(neighbours[0])
+                train_id = self._root_train[root]
+                self._parent[name] = root
+                self._size[root] += 1
+                self.train_assignments[name] = train_id
+                self.trains[train_id]["active_tracks"].add(name)
+                for neighbour in neighbours[1:]:
+                    self._union(name, neighbour)
+            else:
+                train_id = self._new_train()
+                self._make_set(name, train_id)
+                self.train_assignments[name] = train_id
+                self.trains[train_id]["active_tracks"].add(name)
+
+        elif status == 'up' and name in self.active_set:
+            self.active_set.remove(name)
+
+            train_id = self.train_assignments.pop(name, None)
+            if train_id is None:
+                return
+            remaining = self.trains[train_id]["active_tracks"]
+            remaining.discard(name)
+            self._parent.pop(name, None)
+            self._size.pop(name, None)
+            self._root_train.pop(name, None)
+            if remaining:
+                # The released track may have been the root or the only link between two halves
+                self._rebuild_blocks(train_id, remaining)
+            else:
+                del self.trains[train_id]
+
+    #######################
+    # KEYFRAMES           #
+    #######################
+
+    def snapshot(self) -> Dict:
+        """Copy the state into a keyframe; the union-find is rebuilt from the trains on restore."""
+        snapshot = super().snapshot()
+        snapshot["adjacency"] = self.adjacency
+        return snapshot
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "AdjacencyReplayState":
+        """Create a new state from a keyframe without modifying the keyframe."""
+        base = ReplayState.from_snapshot(snapshot)
+        state = cls(snapshot["adjacency"])
+        state.active_set = base.active_set
+        state.train_assignments = base.train_assignments
+        state.trains = base.trains
+        state.train_count = base.train_count
+
+        for train_id, train in state.trains.items():
+            tracks = list(train["active_tracks"])
+            root = tracks[0]
+            state._make_set(root, train_id)
+            state._size[root] = len(tracks)
+            for track_id in tracks[1:]:
+                state._parent[track_id] = root
+        return state
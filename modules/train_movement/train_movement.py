@@ -9,22 +9,27 @@ import os
 import pandas as pd
 import networkx as nx
 import plotly.graph_objects as go
-import plotly.utils
 import json
 import math
 import numpy as np
-from typing import Dict, List, Tuple, Set, Any, Optional, Union
+from typing import Dict, Iterator, List, Tuple, Set, Any, Optional, Union
 from flask import current_app, session
 
 # Import data loading functions from the load_train_movement module
-from .load_train_movement import load_and_process_data
+from .load_train_movement import get_dataset, load_and_process_data
+from .frame_encoding import (
+    FRAME_FORMAT_BINARY, FRAME_FORMAT_DELTA, FRAME_FORMAT_FULL, encode_binary_frames, encode_delta_frames
+)
 
 def apply_datetime_filter_internal(log_df: pd.DataFrame, start_datetime=None, end_datetime=None) -> pd.DataFrame:
     """
     Apply datetime filtering to log DataFrame.
     
+    The window is cut out of the sorted log with a binary search and returned
+    as a view (see filter_features.slice_log_by_time).
+    
     Args:
-        log_df: Signal log DataFrame with 'SIGNAL TIME' column
+        log_df: Signal log DataFrame with 'SIGNAL TIME' column, sorted by time
         start_datetime: Start datetime for filtering
         end_datetime: End datetime for filtering
         
@@ -34,26 +39,11 @@ def apply_datetime_filter_internal(log_df: pd.DataFrame, start_datetime=None, en
     try:
         if log_df.empty:
             return log_df
-            
-        # Ensure SIGNAL TIME is datetime
-        if not pd.api.types.is_datetime64_any_dtype(log_df['SIGNAL TIME']):
-            log_df['SIGNAL TIME'] = pd.to_datetime(log_df['SIGNAL TIME'])
-        
-        original_count = len(log_df)
         
-        # Apply start datetime filter
-        if start_datetime is not None:
-            if isinstance(start_datetime, str):
-                start_datetime = pd.to_datetime(start_datetime)
-            log_df = log_df[log_df['SIGNAL TIME'] >= start_datetime]
-            current_app.logger.info(f"After start filter ({start_datetime}): {len(log_df)} entries")
+        from .filter_features import slice_log_by_time
         
-        # Apply end datetime filter
-        if end_datetime is not None:
-            if isinstance(end_datetime, str):
-                end_datetime = pd.to_datetime(end_datetime)
-            log_df = log_df[log_df['SIGNAL TIME'] <= end_datetime]
-            current_app.logger.info(f"After end filter ({end_datetime}): {len(log_df)} entries")
+        original_count = len(log_df)
+        log_df = slice_log_by_time(log_df, start_datetime, end_datetime)
         
         current_app.logger.info(f"Datetime filtering: {original_count} → {len(log_df)} entries")
         return log_df
@@ -62,23 +52,27 @@ def apply_datetime_filter_internal(log_df: pd.DataFrame, start_datetime=None, en
         current_app.logger.error(f"Error applying datetime filter: {str(e)}")
         return log_df
 
+def figure_title_with_dates(start_datetime=None, end_datetime=None) -> str:
+    """Build the figure title, including the date range information if filtered."""
+    base_title = 'Track Circuit Layout - Dynamic Train Movement'
+    
+    if start_datetime is None and end_datetime is None:
+        return base_title
+    
+    date_info = []
+    if start_datetime is not None:
+        start_str = start_datetime.strftime('%Y-%m-%d %H:%M') if hasattr(start_datetime, 'strftime') else str(start_datetime)
+        date_info.append(f"From: {start_str}")
+    if end_datetime is not None:
+        end_str = end_datetime.strftime('%Y-%m-%d %H:%M') if hasattr(end_datetime, 'strftime') else str(end_datetime)
+        date_info.append(f"To: {end_str}")
+    
+    return f"{base_title}<br><sub>{' | '.join(date_info)}</sub>"
+
 def update_figure_title_with_dates(fig: go.Figure, start_datetime=None, end_datetime=None) -> None:
     """Update figure title to include date range information."""
     try:
-        base_title = 'Track Circuit Layout - Dynamic Train Movement'
-        
-        if start_datetime is not None or end_datetime is not None:
-            date_info = []
-            if start_datetime is not None:
-                start_str = start_datetime.strftime('%Y-%m-%d %H:%M') if hasattr(start_datetime, 'strftime') else str(start_datetime)
-                date_info.append(f"From: {start_str}")
-            if end_datetime is not None:
-                end_str = end_datetime.strftime('%Y-%m-%d %H:%M') if hasattr(end_datetime, 'strftime') else str(end_datetime)
-                date_info.append(f"To: {end_str}")
-            
-            fig.update_layout(title=f"{base_title}<br><sub>{' | '.join(date_info)}</sub>")
-        else:
-            fig.update_layout(title=base_title)
+        fig.update_layout(title=figure_title_with_dates(start_datetime, end_datetime))
             
     except Exception as e:
         current_app.logger.error(f"Error updating figure title: {str(e)}")
@@ -145,6 +139,9 @@ def build_graph_and_traces(nodes_df: pd.DataFrame, edges_df: pd.DataFrame) -> Tu
             # Store track geometry for train animation
             data['geometry'] = {'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1}
         
+        # Precompute train anchors once per topology
+        G.graph['track_positions'] = build_track_position_index(G, positions)
+        
         return G, positions, track_to_edge_idx, edge_traces, label_traces
         
     except Exception as e:
@@ -199,49 +196,228 @@ def create_plotly_figure(edge_traces: List[go.Scatter], label_traces: List[go.Sc
 # ANIMATION GENERATION #
 #######################
 
+# Replay engines: event-by-event state machine or vectorized occupancy matrix
+ENGINE_LOOP = 'loop'
+ENGINE_NUMPY = 'numpy'
+ENGINES = (ENGINE_LOOP, ENGINE_NUMPY)
+
+# Train identification modes: 'global' joins every occupied track into the
+# current train, 'adjacency' groups connected occupied tracks (train_clustering)
+TRAIN_MODE_GLOBAL = 'global'
+TRAIN_MODE_ADJACENCY = 'adjacency'
+TRAIN_MODES = (TRAIN_MODE_GLOBAL, TRAIN_MODE_ADJACENCY)
+
+# Number of signal events between stored replay keyframes
+KEYFRAME_INTERVAL = 500
+
+# Default and maximum number of frames returned by a window request
+DEFAULT_WINDOW_LIMIT = 500
+MAX_WINDOW_LIMIT = 5000
+
+# Limited color palette cycled through as new trains appear
+TRAIN_COLOR_PALETTE = [
+    '#FF0000',  # Red
+    "#580505",  # Green
+    '#FF69B4'   # Pink
+]
+
+class ReplayState:
+    """Occupied tracks and train assignments of the replay state machine at one point in the log"""
+    
+    def __init__(self):
+        self.active_set: Set[str] = set()
+        self.train_assignments: Dict[str, str] = {}  # Maps track_circuits to train IDs
+        self.trains: Dict[str, Dict] = {}  # Information about each train
+        self.train_count = 0
+    
+    def apply(self, name: str, status: str, track_to_edge_idx: Dict[str, int]) -> None:
+        """Apply one signal event to the state."""
+        self.train_count = update_active_tracks_and_trains(
+            name, status, self.active_set, self.train_assignments,
+            self.trains, track_to_edge_idx, TRAIN_COLOR_PALETTE, self.train_count
+        )
+    
+    def snapshot(self) -> Dict:
+        """
+        Copy the state into a keyframe.
+        
+        Trains without occupied tracks can never be reassigned, so they are
+        dropped to keep keyframes proportional to the current occupancy.
+        """
+        return {
+            "active_set": set(self.active_set),
+            "train_assignments": dict(self.train_assignments),
+            "trains": {
+                train_id: {"color": train["color"], "active_tracks": set(train["active_tracks"])}
+                for train_id, train in self.trains.items()
+                if train["active_tracks"]
+            },
+            "train_count": self.train_count
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "ReplayState":
+        """Create a new state from a keyframe without modifying the keyframe."""
+        state = cls()
+        state.active_set = set(snapshot["active_set"])
+        state.train_assignments = dict(snapshot["train_assignments"])
+        state.trains = {
+            train_id: {"color": train["color"], "active_tracks": set(train["active_tracks"])}
+            for train_id, train in snapshot["trains"].items()
+        }
+        state.train_count = snapshot["train_count"]
+        return state
+
+def new_replay_state(train_mode: str = TRAIN_MODE_GLOBAL, G: Optional[nx.DiGraph] = None) -> ReplayState:
+    """
+    Create an empty replay state for a train identification mode.
+    
+    Args:
+        train_mode: 'global' or 'adjacency'
+        G: NetworkX graph, required for the adjacency mode
+        
+    Returns:
+        ReplayState (or AdjacencyReplayState) with nothing occupied
+    """
+    if train_mode == TRAIN_MODE_ADJACENCY:
+        from .train_clustering import AdjacencyReplayState, get_track_adjacency
+        return AdjacencyReplayState(get_track_adjacency(G))
+    return ReplayState()
+
+def iter_animation_frames(
+    log_df: pd.DataFrame, 
+    track_to_edge_idx: Dict[str, int], 
+    edge_traces: List[go.Scatter],
+    G: Optional[nx.DiGraph] = None, 
+    positions: Optional[Dict] = None,
+    signal_traces: Optional[List[go.Scatter]] = None,
+    state: Optional[ReplayState] = None,
+    keyframes: Optional[List[Dict]] = None,
+    keyframe_interval: int = KEYFRAME_INTERVAL,
+    resolution: Optional[pd.Timedelta] = None,
+    flag_transient: bool = False
+) -> Iterator[Tuple[Dict, str, np.datetime64]]:
+    """
+    Yield animation frames for train movement one signal event at a time.
+    
+    Frames are produced lazily so encoders can consume them without holding
+    every full frame in memory.
+    
+    Args:
+        state: Replay state to continue from (a fresh state if omitted)
+        keyframes: Optional list that receives a state snapshot before every
+            keyframe_interval-th event, for seeking with ReplayTimeline
+        resolution: Coalesce the events of each time bucket of this size into
+            one frame with the end-of-bucket state (see time_bucket_ends)
+        flag_transient: With resolution, add 'transient_tracks' to each frame
+    
+    Yields:
+        Tuple of (frame data, time label, frame time as datetime64)
+    """
+    if state is None:
+        state = ReplayState()
+    
+    signal_edge_idx = build_signal_edge_index(signal_traces, track_to_edge_idx) if signal_traces else None
+    
+    emit = None
+    buckets = None
+    if resolution is not None:
+        bucket_ends, bucket_starts = time_bucket_ends(log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]'), resolution)
+        emit = np.zeros(len(log_df), dtype=bool)
+        emit[bucket_ends] = True
+        buckets = zip(pd.DatetimeIndex(bucket_starts).strftime('%Y-%m-%d %H:%M:%S'), bucket_starts)
+    released = set() if resolution is not None and flag_transient else None
+    
+    # Process each signal log entry to create animation frames
+    events = log_df[['SIGNAL NAME', 'SIGNAL STATUS', 'SIGNAL TIME']].itertuples(index=False, name=None)
+    for event_idx, (name, status, timestamp) in enumerate(events):
+        if keyframes is not None and event_idx % keyframe_interval == 0:
+            keyframes.append(state.snapshot())
+        
+        status = status.strip().lower()
+        
+        if released is not None and status == 'up' and name in state.active_set:
+            released.add(name)
+        
+        # Update active tracks and train assignments
+        state.apply(name, status, track_to_edge_idx)
+        
+        if emit is not None and not emit[event_idx]:
+            continue
+        
+        # Create frame data
+        frame_data = create_frame_data(
+            state.active_set, state.train_assignments, edge_traces, 
+            track_to_edge_idx, G, positions, state.trains, signal_edge_idx=signal_edge_idx
+        )
+        
+        if emit is None:
+            yield frame_data, timestamp.strftime('%Y-%m-%d %H:%M:%S'), timestamp.to_datetime64()
+            continue
+        
+        if released is not None:
+            # Released during the bucket and not occupied again by its end
+            frame_data["transient_tracks"] = sorted(released - state.active_set, key=track_to_edge_idx.get)
+            released = set()
+        
+        bucket_label, bucket_start = next(buckets)
+        yield frame_data, bucket_label, bucket_start
+
+def time_bucket_ends(times: np.ndarray, resolution: pd.Timedelta) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the last event of every non-empty time bucket of a sorted time array.
+    
+    Buckets are aligned to multiples of resolution since the epoch, so the
+    number of buckets (and frames) is bounded by window length / resolution.
+    
+    Args:
+        times: Sorted datetime64[ns] array of event times
+        resolution: Bucket size
+        
+    Returns:
+        Tuple of (index of the last event in each bucket, bucket start times)
+    """
+    step = pd.Timedelta(resolution).value
+    buckets = times.astype('datetime64[ns]').view(np.int64) // step
+    ends = np.flatnonzero(np.r_[buckets[1:] != buckets[:-1], True]) if len(buckets) else np.array([], dtype=np.int64)
+    return ends, (buckets[ends] * step).astype('datetime64[ns]')
+
 def generate_animation_frames(
     log_df: pd.DataFrame, 
     track_to_edge_idx: Dict[str, int], 
     edge_traces: List[go.Scatter],
     G: Optional[nx.DiGraph] = None, 
-    positions: Optional[Dict] = None
+    positions: Optional[Dict] = None,
+    keyframes: Optional[List[Dict]] = None,
+    engine: str = ENGINE_LOOP,
+    train_mode: str = TRAIN_MODE_GLOBAL
 ) -> Tuple[List[Dict], List[str], Dict]:
-    """Generate animation frames for train movement."""
+    """
+    Generate animation frames for train movement.
+    
+    engine selects the replay implementation: 'loop' walks the events with
+    the ReplayState machine, 'numpy' uses the vectorized OccupancyMatrix.
+    train_mode selects how occupied tracks are grouped into trains: 'global'
+    or 'adjacency' (connected blocks of the layout in G). The occupancy matrix
+    only implements the global mode, so adjacency mode always uses the loop.
+    """
     try:
-        # Define a limited color palette
-        color_palette = [
-            '#FF0000',  # Red
-            "#580505",  # Green
-            '#FF69B4'   # Pink
-        ]
-        
         frames = []
         time_labels = []
-        active_set = set()
-        train_assignments = {}  # Maps track_circuits to train IDs
-        train_count = 0
-        trains = {}  # Information about each train
-        
-        # Process each signal log entry to create animation frames
-        for _, row in log_df.iterrows():
-            name = row['SIGNAL NAME']
-            status = row['SIGNAL STATUS'].strip().lower()
-            timestamp = row['SIGNAL TIME']
-            
-            # Update active tracks and train assignments
-            train_count = update_active_tracks_and_trains(
-                name, status, active_set, train_assignments, 
-                trains, track_to_edge_idx, color_palette, train_count
-            )
-            
-            # Create frame data
-            frame_data = create_frame_data(
-                active_set, train_assignments, edge_traces, 
-                track_to_edge_idx, G, positions, trains
+        
+        if engine == ENGINE_NUMPY and train_mode == TRAIN_MODE_GLOBAL:
+            from .occupancy_engine import OccupancyMatrix
+            matrix = OccupancyMatrix.from_log(log_df, track_to_edge_idx, len(edge_traces))
+            frame_iter = matrix.iter_frames(G, positions)
+        else:
+            frame_iter = iter_animation_frames(
+                log_df, track_to_edge_idx, edge_traces, G, positions,
+                state=new_replay_state(train_mode, G), keyframes=keyframes
             )
-            
+        
+        for frame_data, time_label, _ in frame_iter:
             frames.append(frame_data)
-            time_labels.append(timestamp.strftime('%Y-%m-%d %H:%M:%S'))
+            time_labels.append(time_label)
         
         # Return empty dict for train info - removed color mapping
         return frames, time_labels, {}
@@ -306,9 +482,16 @@ def create_frame_data(
     active_set: Set[str], train_assignments: Dict[str, str],
     edge_traces: List[go.Scatter], track_to_edge_idx: Dict[str, int], 
     G: Optional[nx.DiGraph], positions: Optional[Dict], trains: Dict[str, Dict],
-    signal_traces: Optional[List[go.Scatter]] = None
+    signal_traces: Optional[List[go.Scatter]] = None,
+    signal_edge_idx: Optional[np.ndarray] = None
 ) -> Dict:
-    """Create data for a single animation frame."""
+    """
+    Create data for a single animation frame.
+    
+    Signal indicator states are sent as a hex bitmask (see encode_signal_mask).
+    Pass signal_edge_idx from build_signal_edge_index to avoid rebuilding it
+    from signal_traces for every frame.
+    """
     # Default color for inactive tracks is blue (#0066cc)
     color_map = ['#0066cc'] * len(edge_traces)
     
@@ -342,8 +525,12 @@ def create_frame_data(
     
     # Update signal indicators if available
     signal_updates = None
-    if signal_traces:
-        signal_updates = update_signal_indicators(active_set, signal_traces)
+    if signal_edge_idx is None and signal_traces:
+        signal_edge_idx = build_signal_edge_index(signal_traces, track_to_edge_idx)
+    if signal_edge_idx is not None:
+        occupied = np.zeros(len(edge_traces), dtype=bool)
+        occupied[[track_to_edge_idx[track_id] for track_id in active_set if track_id in track_to_edge_idx]] = True
+        signal_updates = encode_signal_mask(compute_signal_states(occupied, signal_edge_idx))
     
     return {
         "colors": color_map,
@@ -353,6 +540,56 @@ def create_frame_data(
         "signals": signal_updates
     }
 
+def build_track_position_index(G: nx.DiGraph, positions: Dict) -> Dict[str, Dict]:
+    """
+    Precompute the train icon anchor for every track circuit.
+    
+    For each track the anchor sits at 80% of the edge length (near the head of
+    the train) and carries the edge angle and end points, so per-frame train
+    positions become dictionary lookups.
+    
+    Args:
+        G: NetworkX DiGraph object representing the railway network
+        positions: Dictionary of node positions
+        
+    Returns:
+        Dictionary mapping track_circuit_id to its anchor data
+    """
+    track_positions = {}
+    
+    for u, v, data in G.edges(data=True):
+        track_id = data.get('track_circuit_id')
+        # The first edge of a track circuit wins, matching the original edge scan
+        if track_id in track_positions or u not in positions or v not in positions:
+            continue
+        
+        x0, y0 = (float(coord) for coord in positions[u])
+        x1, y1 = (float(coord) for coord in positions[v])
+        
+        # Calculate angle of track in degrees
+        dx = x1 - x0
+        dy = y1 - y0
+        angle = math.degrees(math.atan2(dy, dx))
+        
+        track_positions[track_id] = {
+            'x': x0 + 0.8 * dx,
+            'y': y0 + 0.8 * dy,
+            'track_id': track_id,
+            'angle': angle,
+            'start': {'x': x0, 'y': y0},
+            'end': {'x': x1, 'y': y1}
+        }
+    
+    return track_positions
+
+def get_track_position_index(G: nx.DiGraph, positions: Dict) -> Dict[str, Dict]:
+    """Return the track anchor index stored on the graph, building it on first use."""
+    track_positions = G.graph.get('track_positions')
+    if track_positions is None:
+        track_positions = build_track_position_index(G, positions)
+        G.graph['track_positions'] = track_positions
+    return track_positions
+
 def calculate_train_position(
     track_id: str, train_assignments: Dict[str, str], 
     train_positions: Dict[str, List], G: nx.DiGraph, 
@@ -363,38 +600,20 @@ def calculate_train_position(
     if train_id not in train_positions:
         train_positions[train_id] = []
     
-    # Find the edge corresponding to this track
-    for u, v, data in G.edges(data=True):
-        if data.get('track_circuit_id') == track_id:
-            if u in positions and v in positions:
-                x0, y0 = positions[u]
-                x1, y1 = positions[v]
-                
-                # Calculate angle of track in degrees
-                dx = x1 - x0
-                dy = y1 - y0
-                angle = math.degrees(math.atan2(dy, dx))
-                
-                # Position train at 80% of the track length to show it near the head
-                train_x = x0 + 0.8 * dx
-                train_y = y0 + 0.8 * dy
-                
-                # Include the train's color in the position data
-                train_positions[train_id].append({
-                    'x': train_x, 
-                    'y': train_y, 
-                    'track_id': track_id,
-                    'angle': angle,
-                    'start': {'x': x0, 'y': y0},
-                    'end': {'x': x1, 'y': y1},
-                    'color': trains[train_id]["color"]
-                })
-                break
+    # Look up the precomputed anchor for this track
+    anchor = get_track_position_index(G, positions).get(track_id)
+    if anchor is not None:
+        # Include the train's color in the position data
+        train_positions[train_id].append({**anchor, 'color': trains[train_id]["color"]})
 
 #######################
 # SIGNAL INDICATORS   #
 #######################
 
+# Signal indicator colors
+SIGNAL_ACTIVE_COLOR = '#00FF00'
+SIGNAL_INACTIVE_COLOR = '#888888'
+
 def create_signal_indicators(G: nx.DiGraph, positions: Dict) -> List[go.Scatter]:
     """
     Create circular signal indicators for tracks with 'R' or 'N' prefixes.
@@ -427,7 +646,7 @@ def create_signal_indicators(G: nx.DiGraph, positions: Dict) -> List[go.Scatter]
             signal_y = y0 + 0.3 * track_vector[1] + 0.1 * unit_normal[1]
             
             # Default color is gray for inactive signals
-            signal_color = '#888888'
+            signal_color = SIGNAL_INACTIVE_COLOR
             
             # Create signal indicator trace
             signal_trace = go.Scatter(
@@ -450,6 +669,50 @@ def create_signal_indicators(G: nx.DiGraph, positions: Dict) -> List[go.Scatter]
     
     return signal_traces
 
+def build_signal_edge_index(signal_traces: List[go.Scatter], track_to_edge_idx: Dict[str, int]) -> np.ndarray:
+    """
+    Map each signal indicator to the edge whose occupancy drives it.
+    
+    Only tracks with an 'R' or 'N' prefix light their indicator; indicators
+    for other or unknown tracks get -1 and always stay inactive.
+    
+    Args:
+        signal_traces: List of signal indicator traces
+        track_to_edge_idx: Mapping of track IDs to edge indices
+        
+    Returns:
+        int64 array with one edge index per signal indicator
+    """
+    track_ids = [trace.customdata[0] for trace in signal_traces]
+    edge_idx = np.array([track_to_edge_idx.get(track_id, -1) for track_id in track_ids], dtype=np.int64)
+    prefix_mask = np.array([track_id.startswith(('R', 'N')) for track_id in track_ids], dtype=bool)
+    edge_idx[~prefix_mask] = -1
+    return edge_idx
+
+def compute_signal_states(occupied: np.ndarray, signal_edge_idx: np.ndarray) -> np.ndarray:
+    """
+    Compute signal indicator states from edge occupancy in one vectorized lookup.
+    
+    Args:
+        occupied: Boolean occupancy per edge, or a (frames x edges) matrix
+        signal_edge_idx: Edge index per signal indicator from build_signal_edge_index
+        
+    Returns:
+        Boolean state per signal indicator (per frame for a matrix)
+    """
+    known = signal_edge_idx >= 0
+    return occupied[..., np.where(known, signal_edge_idx, 0)] & known
+
+def encode_signal_mask(states: np.ndarray) -> str:
+    """
+    Pack signal indicator states into a hex bitmask.
+    
+    Indicator i is bit (7 - i % 8) of byte i // 8, i.e. numpy.packbits order.
+    Active indicators are shown in SIGNAL_ACTIVE_COLOR, the rest in
+    SIGNAL_INACTIVE_COLOR.
+    """
+    return np.packbits(states).tobytes().hex()
+
 def update_signal_indicators(active_tracks: Set[str], signal_traces: List[go.Scatter]) -> List[Dict]:
     """
     Update signal indicators based on active tracks.
@@ -468,14 +731,14 @@ def update_signal_indicators(active_tracks: Set[str], signal_traces: List[go.Sca
         track_id = signal_trace.customdata[0]
         
         # Default color (gray for inactive)
-        signal_color = '#888888'
+        signal_color = SIGNAL_INACTIVE_COLOR
         
         # Update color based on track status and prefix
         if track_id in active_tracks:
             if track_id.startswith('R'):
-                signal_color = '#00FF00'  # Blue for R tracks
+                signal_color = SIGNAL_ACTIVE_COLOR  # Blue for R tracks
             elif track_id.startswith('N'):
-                signal_color = '#00FF00'  # Green for N tracks
+                signal_color = SIGNAL_ACTIVE_COLOR  # Green for N tracks
         
         # Create updated trace data
         updated_signal = {
@@ -513,115 +776,422 @@ def convert_numpy_types(obj):
     else:
         return obj
 
-def get_train_movement_data(use_uploaded: bool = False, start_datetime=None, end_datetime=None, net_group_id=None) -> Dict:
-    """Get train movement analysis data for the Flask route."""
+def filter_replay_log(log_df: pd.DataFrame, circuit_df: pd.DataFrame, start_datetime=None,
+                      end_datetime=None, net_group_id=None, net_group_index: Optional[Dict] = None,
+                      scope_mask: Optional[np.ndarray] = None,
+                      log_edge_idx: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Apply the replay filters (datetime window, route/chain scope, then Net_Group_ID) to the signal log.
+    
+    Args:
+        log_df: Signal log DataFrame
+        circuit_df: Circuit interval DataFrame
+        start_datetime: Start datetime for filtering
+        end_datetime: End datetime for filtering
+        net_group_id: Net_Group_ID to filter by
+        net_group_index: Precomputed index from filter_features.build_net_group_index
+        scope_mask: Edge mask of the route/chain scope (see get_replay_scope)
+        log_edge_idx: Edge index per dataset log row, required with scope_mask
+        
+    Returns:
+        Filtered signal log
+    """
+    # Apply datetime filtering if specified
+    if start_datetime is not None or end_datetime is not None:
+        log_df = apply_datetime_filter_internal(log_df, start_datetime, end_datetime)
+    
+    # Keep only events of the route/chain scope if specified
+    if scope_mask is not None:
+        from .filter_features import apply_scope_filter
+        log_df = apply_scope_filter(log_df, scope_mask, log_edge_idx)
+        
+    # Apply Net_Group_ID filtering if specified
+    if net_group_id:
+        from .filter_features import apply_net_group_filter
+        log_df = apply_net_group_filter(log_df, circuit_df, net_group_id, net_group_index)
+    
+    return log_df
+
+def find_time_offset(times: np.ndarray, timestamp) -> int:
+    """
+    Return the index of the first event at or after timestamp in a sorted time array.
+    
+    Args:
+        times: Sorted datetime64 array of event times
+        timestamp: datetime or ISO string
+        
+    Returns:
+        Event offset in [0, len(times)]
+    """
+    from .filter_features import time_slice_bounds
+    return time_slice_bounds(times, timestamp)[0]
+
+def get_replay_scope(dataset, topology, route_id=None,
+                     chain_id=None) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Look up the edge mask of a route/chain scope.
+    
+    Args:
+        dataset: Cached TrainMovementDataset
+        topology: Topology of the dataset
+        route_id: Route_id to scope the replay to
+        chain_id: Chain_ID to scope the replay to
+        
+    Returns:
+        Tuple of (edge mask, edge index per dataset log row), or (None, None)
+        when no scope was requested
+        
+    Raises:
+        ValueError: If the route or chain does not exist in the dataset
+    """
+    if not route_id and not chain_id:
+        return None, None
+    
+    from .filter_features import get_log_edge_index, get_scope_index, get_scope_mask
+    scope_index = get_scope_index(dataset, topology.track_to_edge_idx, topology.edge_count)
+    scope_mask = get_scope_mask(scope_index, route_id, chain_id)
+    return scope_mask, get_log_edge_index(dataset, topology.track_to_edge_idx)
+
+def replay_filter_key(start_datetime=None, end_datetime=None, net_group_id=None,
+                      route_id=None, chain_id=None) -> Tuple:
+    """Build the key identifying a filtered replay of a dataset."""
+    return (
+        start_datetime.isoformat() if start_datetime is not None else None,
+        end_datetime.isoformat() if end_datetime is not None else None,
+        str(net_group_id) if net_group_id else None,
+        str(route_id) if route_id else None,
+        str(chain_id) if chain_id else None
+    )
+
+def replay_filter_info(start_datetime=None, end_datetime=None, net_group_id=None,
+                       net_group_index: Optional[Dict] = None, route_id=None, chain_id=None) -> Dict:
+    """
+    Describe the replay filters for UI feedback.
+    
+    With a Net_Group_ID the interval IDs, their track IDs and interval status
+    records of the net group are included.
+    """
+    filter_info = {}
+    if start_datetime is not None:
+        filter_info['start'] = start_datetime.isoformat()
+    if end_datetime is not None:
+        filter_info['end'] = end_datetime.isoformat()
+    if net_group_id:
+        net_group = (net_group_index or {}).get(str(net_group_id)) or {}
+        filter_info['net_group_id'] = net_group_id
+        filter_info['interval_ids'] = list(net_group.get('interval_ids', []))
+        filter_info['filtered_track_ids'] = list(net_group.get('track_ids', []))  # Track IDs for focusing
+        # Convert numpy types to native Python types for JSON serialization
+        filter_info['interval_statuses'] = convert_numpy_types(net_group.get('interval_statuses', {}))
+    if route_id:
+        filter_info['route_id'] = route_id
+    if chain_id:
+        filter_info['chain_id'] = chain_id
+    return filter_info
+
+def encode_frames(frame_iter: Iterator[Tuple[Dict, str, np.datetime64]], track_to_edge_idx: Dict[str, int],
+                  frame_format: str = FRAME_FORMAT_FULL) -> Tuple[Dict, List[str]]:
+    """
+    Encode generated frames for the response.
+    
+    Args:
+        frame_iter: Iterator of (frame data, time label, frame time) triples with signals computed inline
+        track_to_edge_idx: Mapping of track IDs to edge indices
+        frame_format: 'full', 'delta' or 'binary'
+        
+    Returns:
+        Tuple of (frame payload dictionary, time labels)
+    """
+    if frame_format == FRAME_FORMAT_BINARY:
+        sections, header, time_labels = encode_binary_frames(frame_iter, track_to_edge_idx)
+        return {
+            "frame_format": FRAME_FORMAT_BINARY,
+            "frame_sections": sections,
+            **header
+        }, time_labels
+    
+    if frame_format == FRAME_FORMAT_DELTA:
+        initial_frame, frame_deltas, time_labels, track_anchors = encode_delta_frames(frame_iter, track_to_edge_idx)
+        return {
+            "frame_format": FRAME_FORMAT_DELTA,
+            "initial_frame": initial_frame,
+            "frame_deltas": frame_deltas,
+            "track_anchors": convert_numpy_types(track_anchors)
+        }, time_labels
+    
+    frames = []
+    time_labels = []
+    for frame, time_label, _ in frame_iter:
+        frames.append(frame)
+        time_labels.append(time_label)
+    return {
+        "frame_format": FRAME_FORMAT_FULL,
+        "frames": frames
+    }, time_labels
+
+def signal_info(signal_traces: List[go.Scatter]) -> Dict:
+    """Describe how to decode the signal bitmasks of a frames response."""
+    return {
+        "signal_count": len(signal_traces),
+        "signal_colors": {"active": SIGNAL_ACTIVE_COLOR, "inactive": SIGNAL_INACTIVE_COLOR}
+    }
+
+def get_train_movement_data(use_uploaded: bool = False, start_datetime=None, end_datetime=None, net_group_id=None,
+                            frame_format: str = FRAME_FORMAT_FULL, engine: str = ENGINE_LOOP,
+                            include_figure: bool = False, train_mode: str = TRAIN_MODE_GLOBAL,
+                            resolution: Optional[pd.Timedelta] = None, flag_transient: bool = False,
+                            route_id=None, chain_id=None) -> Dict:
+    """
+    Get train movement analysis data for the Flask route.
+    
+    The static figure is not part of the response by default: 'topology'
+    references the cached figure (see topology module) and 'figure_title'
+    carries the filter-specific title. Pass include_figure=True to embed the
+    figure as 'plotly_data' as well.
+    
+    With frame_format='delta' the response carries 'initial_frame' and
+    'frame_deltas' (see frame_encoding) instead of one full 'frames' entry
+    per signal event; with 'binary' it carries 'frame_sections', numpy arrays
+    that the route packs with frame_encoding.pack_binary_frames. engine='numpy' generates the frames from the
+    vectorized occupancy matrix instead of the event loop.
+    train_mode='adjacency' groups trains by connected occupied tracks (see
+    generate_animation_frames).
+    
+    With a resolution, all events inside each time bucket are coalesced into
+    one frame showing the end-of-bucket state, labelled with the bucket start.
+    flag_transient adds 'transient_tracks' to each such frame: tracks occupied
+    at some point during the bucket but free at its end.
+    
+    route_id and chain_id scope the replay to the circuits of a route and/or
+    chain; only events on those circuits are replayed.
+    """
     try:
         # Load and process data
-        nodes_df, edges_df, log_df, circuit_df = load_and_process_data(use_uploaded=use_uploaded)
+        dataset = get_dataset(use_uploaded=use_uploaded)
         
-        if nodes_df is None or edges_df is None or log_df is None:
+        if dataset is None:
             return {"error": "Failed to load data files"}
         
-        # Track filtered interval IDs and their status to display in UI
-        filtered_interval_ids = []
-        interval_statuses = {}
-        filtered_track_ids = []  # Track IDs belonging to filtered intervals
-            
-        # Apply datetime filtering if specified
-        if start_datetime is not None or end_datetime is not None:
-            log_df = apply_datetime_filter_internal(log_df, start_datetime, end_datetime)
-            
-        # Apply Net_Group_ID filtering if specified
+        nodes_df, edges_df, log_df, circuit_df = dataset.as_tuple()
+        
+        # Get the cached graph, traces and signal indicators
+        from .topology import get_topology
+        topology = get_topology(dataset)
+        
+        if topology is None:
+            return {"error": "Failed to build graph"}
+        
+        net_group_index = None
         if net_group_id:
-            from .filter_features import get_interval_ids_by_net_group, apply_net_group_filter
-            # Get the interval IDs before filtering
-            filtered_interval_ids = get_interval_ids_by_net_group(circuit_df, net_group_id)
-            log_df = apply_net_group_filter(log_df, circuit_df, net_group_id)
-            
-            # Get status information for each interval ID and collect track IDs
-            filtered_track_ids = []
-            for interval_id in filtered_interval_ids:
-                interval_data = circuit_df[circuit_df['Interval_id'] == interval_id]
-                
-                if not interval_data.empty:
-                    interval_data = interval_data.iloc[0]
-                    circuit_name = interval_data['Circuit_Name']
-                    
-                    # Track the circuit names for visualization focus
-                    if circuit_name not in filtered_track_ids:
-                        filtered_track_ids.append(circuit_name)
-                    
-                    # Extract useful information
-                    interval_statuses[interval_id] = {
-                        'circuit_name': circuit_name,
-                        'down_time': interval_data['Down_timestamp'],
-                        'up_time': interval_data['Up_timestamp'],
-                        'duration': interval_data['Duration'],
-                        'switch_name': interval_data['switch_name'],
-                        'switch_status': interval_data['switch_status'],
-                        'chain_id': interval_data['Chain_ID']
-                    }
-                    
-                    # Add route information if available
-                    if 'Route_id' in interval_data and interval_data['Route_id'] != "Not_matched":
-                        interval_statuses[interval_id]['route_id'] = interval_data['Route_id']
-                        interval_statuses[interval_id]['route_name'] = interval_data.get('Route_name', '')
+            from .filter_features import get_net_group_index
+            net_group_index = get_net_group_index(dataset)
+        
+        scope_mask, log_edge_idx = get_replay_scope(dataset, topology, route_id, chain_id)
+        
+        # Apply datetime, route/chain and Net_Group_ID filtering if specified
+        log_df = filter_replay_log(
+            log_df, circuit_df, start_datetime, end_datetime, net_group_id, net_group_index,
+            scope_mask, log_edge_idx
+        )
             
         # Check if we still have data after filtering
         if log_df.empty:
             return {"error": "No data available for the selected filters"}
         
-        # Build graph and create traces
-        G, positions, track_to_edge_idx, edge_traces, label_traces = build_graph_and_traces(nodes_df, edges_df)
+        G, positions, track_to_edge_idx = topology.G, topology.positions, topology.track_to_edge_idx
+        edge_traces, signal_traces = topology.edge_traces, topology.signal_traces
         
-        if G is None:
-            return {"error": "Failed to build graph"}
+        filter_key = replay_filter_key(start_datetime, end_datetime, net_group_id, route_id, chain_id)
         
-        # Create signal indicators for tracks with R/N prefixes
-        signal_traces = create_signal_indicators(G, positions)
+        if engine == ENGINE_NUMPY and train_mode == TRAIN_MODE_GLOBAL:
+            from .occupancy_engine import get_occupancy_matrix
+            matrix = get_occupancy_matrix(dataset, filter_key, log_df, track_to_edge_idx, len(edge_traces))
+            frame_iter = matrix.iter_frames(
+                G, positions, signal_traces, resolution=resolution, flag_transient=flag_transient
+            )
+            keyframes = None
+        else:
+            # Generate animation frames, collecting keyframes for later window requests
+            keyframes = []
+            initial_state = new_replay_state(train_mode, G)
+            frame_iter = iter_animation_frames(
+                log_df, track_to_edge_idx, edge_traces, G, positions, signal_traces,
+                state=initial_state, keyframes=keyframes, resolution=resolution, flag_transient=flag_transient
+            )
         
-        # Generate animation frames
-        frames, time_labels, _ = generate_animation_frames(log_df, track_to_edge_idx, edge_traces, G, positions)
+        frame_payload, time_labels = encode_frames(frame_iter, track_to_edge_idx, frame_format)
         
-        if not frames:
+        if not time_labels:
             return {"error": "Failed to generate animation frames"}
         
-        # Update frames with signal indicator data
-        for frame in frames:
-            signal_updates = update_signal_indicators(set(frame["active_tracks"]), signal_traces)
-            frame["signals"] = signal_updates
+        frame_payload["frame_count"] = len(time_labels)
+        if resolution is not None:
+            frame_payload["resolution"] = pd.Timedelta(resolution).total_seconds()
         
-        # Create the figure
-        fig = create_plotly_figure(edge_traces, label_traces, signal_traces)
+        if keyframes is not None:
+            from .replay_timeline import get_replay_timeline
+            get_replay_timeline(
+                dataset, (filter_key, train_mode), log_df, track_to_edge_idx,
+                keyframes=keyframes, state_class=type(initial_state)
+            )
         
-        # Add filter info to the figure title if filters are applied
-        if start_datetime is not None or end_datetime is not None:
-            update_figure_title_with_dates(fig, start_datetime, end_datetime)
+        figure_title = figure_title_with_dates(start_datetime, end_datetime)
         
-        # Prepare data for JavaScript
-        plot_json = json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+        figure_payload = {}
+        if include_figure:
+            plot_json = json.loads(topology.figure_json)
+            plot_json['layout']['title']['text'] = figure_title
+            figure_payload["plotly_data"] = plot_json
         
-        # Include date range in response for UI feedback
-        filter_info = {}
-        if start_datetime is not None:
-            filter_info['start'] = start_datetime.isoformat()
-        if end_datetime is not None:
-            filter_info['end'] = end_datetime.isoformat()
-        if net_group_id:
-            filter_info['net_group_id'] = net_group_id
-            filter_info['interval_ids'] = filtered_interval_ids
-            filter_info['filtered_track_ids'] = filtered_track_ids  # Add track IDs for focusing
-            # Convert numpy types to native Python types for JSON serialization
-            filter_info['interval_statuses'] = convert_numpy_types(interval_statuses)
+        # Include date range and net group details in response for UI feedback
+        filter_info = replay_filter_info(
+            start_datetime, end_datetime, net_group_id, net_group_index, route_id, chain_id
+        )
         
         return {
-            "plotly_data": plot_json,
-            "frames": frames,
+            "topology": {"id": topology.id},
+            "figure_title": figure_title,
+            **figure_payload,
+            **frame_payload,
             "time_labels": time_labels,
             "filter_info": filter_info,
-            "has_signals": len(signal_traces) > 0
+            "has_signals": len(signal_traces) > 0,
+            **signal_info(signal_traces)
         }
         
     except Exception as e:
         current_app.logger.error(f"Error generating visualization data: {str(e)}")
         return {"error": str(e)}
+
+def get_train_movement_window(use_uploaded: bool = False, start_datetime=None, end_datetime=None, net_group_id=None,
+                              offset: Optional[int] = None, at_time=None, limit: int = DEFAULT_WINDOW_LIMIT,
+                              frame_format: str = FRAME_FORMAT_FULL, engine: str = ENGINE_LOOP,
+                              train_mode: str = TRAIN_MODE_GLOBAL, route_id=None, chain_id=None,
+                              resolution: Optional[pd.Timedelta] = None, flag_transient: bool = False) -> Dict:
+    """
+    Get a slice of replay frames without generating the frames before it.
+    
+    The window starts at a frame offset or at the first event at or after
+    at_time. Its state is restored from the nearest keyframe of the replay
+    timeline (or read directly from the occupancy matrix with
+    engine='numpy'), so the cost is proportional to the window, not the history.
+    
+    With a resolution, frames are the coalesced time buckets of
+    get_train_movement_data: offsets, limit and frame_count count buckets,
+    and the window replays the events of its buckets only.
+    
+    Args:
+        use_uploaded: Flag to use uploaded files instead of default files
+        start_datetime: Start datetime of the replay filter
+        end_datetime: End datetime of the replay filter
+        net_group_id: Net_Group_ID of the replay filter
+        offset: First frame index of the window
+        at_time: Time to start the window at (used when offset is None)
+        limit: Maximum number of frames in the window
+        frame_format: 'full', 'delta' or 'binary'
+        engine: 'loop' or 'numpy'
+        train_mode: 'global' or 'adjacency'
+        route_id: Route_id of the replay scope
+        chain_id: Chain_ID of the replay scope
+        resolution: Coalesce the events of each time bucket of this size into one frame
+        flag_transient: With resolution, add 'transient_tracks' to each frame
+        
+    Returns:
+        Dictionary with the window frames, their time labels, the window
+        offset and the total frame count of the replay
+    """
+    try:
+        dataset = get_dataset(use_uploaded=use_uploaded)
+        
+        if dataset is None:
+            return {"error": "Failed to load data files"}
+        
+        _, _, log_df, circuit_df = dataset.as_tuple()
+        
+        from .topology import get_topology
+        topology = get_topology(dataset)
+        
+        if topology is None:
+            return {"error": "Failed to build graph"}
+        
+        G, positions, track_to_edge_idx = topology.G, topology.positions, topology.track_to_edge_idx
+        edge_traces, signal_traces = topology.edge_traces, topology.signal_traces
+        
+        filter_key = replay_filter_key(start_datetime, end_datetime, net_group_id, route_id, chain_id)
+        net_group_index = None
+        if net_group_id:
+            from .filter_features import get_net_group_index
+            net_group_index = get_net_group_index(dataset)
+        scope_mask, log_edge_idx = get_replay_scope(dataset, topology, route_id, chain_id)
+        log_df = filter_replay_log(
+            log_df, circuit_df, start_datetime, end_datetime, net_group_id, net_group_index,
+            scope_mask, log_edge_idx
+        )
+        times = log_df['SIGNAL TIME'].to_numpy(dtype='datetime64[ns]')
+        frame_count = len(log_df)
+        
+        bucket_ends = None
+        if resolution is not None:
+            bucket_ends, _ = time_bucket_ends(times, resolution)
+            frame_count = len(bucket_ends)
+        
+        if offset is None:
+            offset = find_time_offset(times, at_time) if at_time is not None else 0
+            if bucket_ends is not None:
+                # The bucket holding that event
+                offset = int(np.searchsorted(bucket_ends, offset))
+        offset = max(0, min(offset, frame_count))
+        limit = max(1, min(limit, MAX_WINDOW_LIMIT))
+        
+        # Event range replayed for the window
+        event_start, event_stop = offset, offset + limit
+        if bucket_ends is not None:
+            event_start = int(bucket_ends[offset - 1]) + 1 if offset > 0 else 0
+            last_bucket = min(offset + limit, frame_count) - 1
+            event_stop = int(bucket_ends[last_bucket]) + 1 if last_bucket >= offset else event_start
+        
+        window_info = {}
+        if resolution is not None:
+            window_info["resolution"] = pd.Timedelta(resolution).total_seconds()
+        
+        if engine == ENGINE_NUMPY and train_mode == TRAIN_MODE_GLOBAL:
+            from .occupancy_engine import get_occupancy_matrix
+            matrix = get_occupancy_matrix(dataset, filter_key, log_df, track_to_edge_idx, len(edge_traces))
+            frame_iter = matrix.iter_frames(
+                G, positions, signal_traces, start=event_start, stop=event_stop,
+                resolution=resolution, flag_transient=flag_transient
+            )
+        else:
+            from .replay_timeline import get_replay_timeline
+            timeline = get_replay_timeline(
+                dataset, (filter_key, train_mode), log_df, track_to_edge_idx,
+                initial_state=new_replay_state(train_mode, G)
+            )
+            frame_iter = timeline.iter_window(
+                event_start, event_stop - event_start, track_to_edge_idx, edge_traces, G, positions, signal_traces,
+                resolution=resolution, flag_transient=flag_transient
+            )
+            window_info["keyframe_interval"] = timeline.keyframe_interval
+        
+        frame_payload, time_labels = encode_frames(frame_iter, track_to_edge_idx, frame_format)
+        
+        return {
+            "topology": {"id": topology.id},
+            "figure_title": figure_title_with_dates(start_datetime, end_datetime),
+            **frame_payload,
+            "time_labels": time_labels,
+            "filter_info": replay_filter_info(
+                start_datetime, end_datetime, net_group_id, net_group_index, route_id, chain_id
+            ),
+            "offset": offset,
+            "limit": limit,
+            "window_size": len(time_labels),
+            "frame_count": frame_count,
+            **window_info,
+            "has_signals": len(signal_traces) > 0,
+            **signal_info(signal_traces)
+        }
+        
+    except Exception as e:
+        current_app.logger.error(f"Error generating frame window: {str(e)}")
+        return {"error": str(e)}
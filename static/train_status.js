@@ -8,7 +8,13 @@ document.addEventListener('DOMContentLoaded', function() {
     let playing = false;
     let currentFrame = 0;
     let frames = [];
+    let frameCount = 0;
+    let framePlayer = null;  // Rebuilds frames for delta and binary responses
     let timeLabels = [];
+    
+    // Static layout figure, cached per topology id
+    let topologyId = null;
+    let topologyFigure = null;
     let interval;
     let animationSpeed = 1000;
     let speedMultiplier = 1;
@@ -27,9 +33,31 @@ document.addEventListener('DOMContentLoaded', function() {
     let lastSliderValue = 0;
     let lastUpdateTime = 0;
     
+    // Frames are requested in the packed binary layout, with JSON as fallback
+    const BINARY_FRAMES_MIMETYPE = 'application/vnd.train-movement.frames';
+    const FRAME_REQUEST_ACCEPT = `${BINARY_FRAMES_MIMETYPE}, application/json;q=0.9`;
+    
+    // Recorded replays are fetched one window of frames at a time
+    const FRAME_WINDOW_SIZE = 500;      // Frames per get_frame_window request
+    const FRAME_WINDOW_LEAD = 50;       // Frames before a seek target included in its window
+    const FRAME_WINDOW_PREFETCH = 150;  // Frames left in a window when the next one is requested
+    
     // Signal indicator state
     let hasSignalIndicators = false;
     let signalIndicatorsCount = 0;
+    let signalColors = { active: '#00FF00', inactive: '#888888' };
+    
+    // Edge and signal styles currently drawn, so each frame only restyles what changed
+    const SIGNAL_UPDATE_INTERVAL_MS = 100;  // Minimum time between signal redraws while playing
+    let renderedColors = [];
+    let renderedWidths = [];
+    let renderedSignals = [];
+    let signalTraceStart = -1;
+    let lastSignalUpdate = 0;
+    
+    // Live datalog feed: the snapshot starts a delta player whose delta list grows
+    let liveSource = null;
+    let liveData = null;
     
     // ===== DOM ELEMENTS =====
     // Control elements
@@ -41,6 +69,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const speedDecreaseBtn = document.getElementById('speed-decrease-btn');
     const speedIncreaseBtn = document.getElementById('speed-increase-btn');
     const speedDisplay = document.getElementById('speed-display');
+    const liveBtn = document.getElementById('live-btn');
     
     // Visualization elements
     const graphContainer = document.getElementById('graph-container');
@@ -81,7 +110,7 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('=== DateTime Filter Debug ===');
         console.log('Start DateTime:', startDateTime);
         console.log('End DateTime:', endDateTime);
-        console.log('Total Frames:', frames.length);
+        console.log('Total Frames:', frameCount);
         
         if (timeLabels.length > 0) {
             console.log('First Frame Time:', timeLabels[0]);
@@ -158,8 +187,15 @@ document.addEventListener('DOMContentLoaded', function() {
      * Load visualization data from server
      */
     function loadVisualizationData() {
+        // Recorded replays replace the live feed
+        if (liveSource) {
+            stopLiveFeed();
+        }
+        
         // Reset data
         frames = [];
+        frameCount = 0;
+        framePlayer = null;
         timeLabels = [];
         hasSignalIndicators = false;
         
@@ -169,7 +205,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 <i class="fas fa-spinner fa-spin mr-2"></i> Loading train movement visualization...
             </div>`;
         
-        // Build API endpoint with filters
+        // Build API endpoint with filters (frames are negotiated as packed binary)
         let endpoint = useDefaultData ? 
             '/train-movement/get_track_data' : 
             '/train-movement/get_track_data?use_uploaded=true';
@@ -190,8 +226,8 @@ document.addEventListener('DOMContentLoaded', function() {
             endpoint += (endpoint.includes('?') ? '&' : '?') + `end_datetime=${encodeURIComponent(endDateTime)}`;
         }
             
-        fetch(endpoint)
-            .then(response => response.json())
+        fetch(endpoint, { headers: { 'Accept': FRAME_REQUEST_ACCEPT } })
+            .then(readFramesResponse)
             .then(data => {
                 if (data.error) {
                     graphContainer.innerHTML = `<div class="alert alert-danger">Error: ${data.error}</div>`;
@@ -199,9 +235,23 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Store animation data
-                frames = data.frames;
+                if (data.frame_format === 'binary') {
+                    framePlayer = createBinaryFramePlayer(data);
+                    frames = [];
+                    frameCount = data.frame_count;
+                } else if (data.frame_format === 'delta') {
+                    framePlayer = createDeltaFramePlayer(data);
+                    frames = [];
+                    frameCount = data.frame_count;
+                } else {
+                    framePlayer = null;
+                    frames = data.frames;
+                    frameCount = frames.length;
+                }
                 timeLabels = data.time_labels;
                 hasSignalIndicators = data.has_signals || false;
+                signalIndicatorsCount = data.signal_count || 0;
+                signalColors = data.signal_colors || signalColors;
                 
                 // Store filtered track IDs if provided but don't automatically focus on them
                 filteredTrackIds = [];
@@ -233,7 +283,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Check if we got any frames
-                if (!frames.length) {
+                if (!frameCount) {
                     graphContainer.innerHTML = `<div class="alert alert-warning">
                         <i class="fas fa-exclamation-circle"></i> 
                         No data found for the selected time range. Please try a different time period.
@@ -242,35 +292,39 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Configure slider
-                slider.max = frames.length - 1;
-                slider.step = frames.length > 500 ? 0.5 : 0.01;
+                slider.max = frameCount - 1;
+                slider.step = frameCount > 500 ? 0.5 : 0.01;
                 
-                // Create plot from Plotly JSON
-                graphContainer.innerHTML = '';
-                Plotly.newPlot(graphContainer, data.plotly_data.data, data.plotly_data.layout);
+                // Get the static figure (cached per topology) and create the plot
+                return loadTopologyFigure(data).then(figure => {
+                    graphContainer.innerHTML = '';
+                    const layout = Object.assign({}, figure.layout, {
+                        title: Object.assign({}, figure.layout.title, { text: data.figure_title })
+                    });
+                    Plotly.newPlot(graphContainer, figure.data, layout);
+                    resetRenderedStyles(plotDivEdgeStyles(graphContainer));
                 
-                // Store the count of signal indicators for reference during updates
-                if (hasSignalIndicators) {
-                    signalIndicatorsCount = frames[0].signals ? frames[0].signals.length : 0;
-                    console.log(`Found ${signalIndicatorsCount} signal indicators`);
-                }
+                    if (hasSignalIndicators) {
+                        console.log(`Found ${signalIndicatorsCount} signal indicators`);
+                    }
                 
-                // Create container for train icons
-                createTrainContainer();
+                    // Create container for train icons
+                    createTrainContainer();
                 
-                // Enhance track labels
-                enhanceTrackLabels();
+                    // Enhance track labels
+                    enhanceTrackLabels();
                 
-                // REMOVED: Automatic focus on filtered tracks
-                // Instead, always show all tracks
-                setTimeout(() => {
-                    showAllTracks();
-                }, 500);
+                    // REMOVED: Automatic focus on filtered tracks
+                    // Instead, always show all tracks
+                    setTimeout(() => {
+                        showAllTracks();
+                    }, 500);
                 
-                // Update to first frame
-                if (frames.length > 0) {
-                    updateFrame(0);
-                }
+                    // Update to first frame
+                    if (frameCount > 0) {
+                        updateFrame(0);
+                    }
+                });
             })
             .catch(error => {
                 console.error('Error fetching track data:', error);
@@ -467,8 +521,15 @@ document.addEventListener('DOMContentLoaded', function() {
      * Load visualization data from server
      */
     function loadVisualizationData() {
+        // Recorded replays replace the live feed
+        if (liveSource) {
+            stopLiveFeed();
+        }
+        
         // Reset data
         frames = [];
+        frameCount = 0;
+        framePlayer = null;
         timeLabels = [];
         hasSignalIndicators = false;
         
@@ -478,29 +539,34 @@ document.addEventListener('DOMContentLoaded', function() {
                 <i class="fas fa-spinner fa-spin mr-2"></i> Loading train movement visualization...
             </div>`;
         
-        // Build API endpoint with filters
-        let endpoint = useDefaultData ? 
-            '/train-movement/get_track_data' : 
-            '/train-movement/get_track_data?use_uploaded=true';
-            
+        // Build the filter query; frames are negotiated as packed binary
+        const query = new URLSearchParams();
+        if (!useDefaultData) {
+            query.set('use_uploaded', 'true');
+        }
         if (selectedRoute) {
-            endpoint += (endpoint.includes('?') ? '&' : '?') + `route=${selectedRoute}`;
+            query.set('route', selectedRoute);
         }
-        
         if (selectedNetGroup) {
-            endpoint += (endpoint.includes('?') ? '&' : '?') + `net_group=${selectedNetGroup}`;
+            query.set('net_group', selectedNetGroup);
         }
-        
         if (startDateTime) {
-            endpoint += (endpoint.includes('?') ? '&' : '?') + `start_datetime=${encodeURIComponent(startDateTime)}`;
+            query.set('start_datetime', startDateTime);
         }
-        
         if (endDateTime) {
-            endpoint += (endpoint.includes('?') ? '&' : '?') + `end_datetime=${encodeURIComponent(endDateTime)}`;
+            query.set('end_datetime', endDateTime);
         }
-            
-        fetch(endpoint)
-            .then(response => response.json())
+        
+        // Frame coalescing options are passed through from the page URL (e.g. ?resolution=10s)
+        const pageParams = new URLSearchParams(window.location.search);
+        ['resolution', 'flag_transient'].forEach(name => {
+            if (pageParams.get(name)) {
+                query.set(name, pageParams.get(name));
+            }
+        });
+        
+        // Only the first window is downloaded up front; the rest is fetched on demand
+        fetchFrameWindow(query, 0)
             .then(data => {
                 if (data.error) {
                     graphContainer.innerHTML = `<div class="alert alert-danger">Error: ${data.error}</div>`;
@@ -508,9 +574,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Store animation data
-                frames = data.frames;
-                timeLabels = data.time_labels;
+                frames = [];
+                frameCount = data.frame_count;
+                timeLabels = new Array(frameCount);
+                framePlayer = createWindowedFramePlayer(query, data);
                 hasSignalIndicators = data.has_signals || false;
+                signalIndicatorsCount = data.signal_count || 0;
+                signalColors = data.signal_colors || signalColors;
                 
                 // Store filtered track IDs if provided but don't automatically focus on them
                 filteredTrackIds = [];
@@ -542,7 +612,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Check if we got any frames
-                if (!frames.length) {
+                if (!frameCount) {
                     graphContainer.innerHTML = `<div class="alert alert-warning">
                         <i class="fas fa-exclamation-circle"></i> 
                         No data found for the selected time range. Please try a different time period.
@@ -551,35 +621,39 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Configure slider
-                slider.max = frames.length - 1;
-                slider.step = frames.length > 500 ? 0.5 : 0.01;
+                slider.max = frameCount - 1;
+                slider.step = frameCount > 500 ? 0.5 : 0.01;
                 
-                // Create plot from Plotly JSON
-                graphContainer.innerHTML = '';
-                Plotly.newPlot(graphContainer, data.plotly_data.data, data.plotly_data.layout);
+                // Get the static figure (cached per topology) and create the plot
+                return loadTopologyFigure(data).then(figure => {
+                    graphContainer.innerHTML = '';
+                    const layout = Object.assign({}, figure.layout, {
+                        title: Object.assign({}, figure.layout.title, { text: data.figure_title })
+                    });
+                    Plotly.newPlot(graphContainer, figure.data, layout);
+                    resetRenderedStyles(plotDivEdgeStyles(graphContainer));
                 
-                // Store the count of signal indicators for reference during updates
-                if (hasSignalIndicators) {
-                    signalIndicatorsCount = frames[0].signals ? frames[0].signals.length : 0;
-                    console.log(`Found ${signalIndicatorsCount} signal indicators`);
-                }
+                    if (hasSignalIndicators) {
+                        console.log(`Found ${signalIndicatorsCount} signal indicators`);
+                    }
                 
-                // Create container for train icons
-                createTrainContainer();
+                    // Create container for train icons
+                    createTrainContainer();
                 
-                // Enhance track labels
-                enhanceTrackLabels();
+                    // Enhance track labels
+                    enhanceTrackLabels();
                 
-                // REMOVED: Automatic focus on filtered tracks
-                // Instead, always show all tracks
-                setTimeout(() => {
-                    showAllTracks();
-                }, 500);
+                    // REMOVED: Automatic focus on filtered tracks
+                    // Instead, always show all tracks
+                    setTimeout(() => {
+                        showAllTracks();
+                    }, 500);
                 
-                // Update to first frame
-                if (frames.length > 0) {
-                    updateFrame(0);
-                }
+                    // Update to first frame
+                    if (frameCount > 0) {
+                        updateFrame(0);
+                    }
+                });
             })
             .catch(error => {
                 console.error('Error fetching track data:', error);
@@ -722,6 +796,380 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // ===== TOPOLOGY =====
+    /**
+     * Get the static track layout figure for a frames response.
+     * 
+     * The figure is kept in memory per topology id and fetched from the
+     * topology endpoint otherwise; the browser revalidates it with its ETag.
+     */
+    function loadTopologyFigure(data) {
+        if (data.plotly_data) {
+            return Promise.resolve(data.plotly_data);
+        }
+        if (topologyFigure && topologyId === data.topology.id) {
+            return Promise.resolve(topologyFigure);
+        }
+        return fetch(data.topology.url)
+            .then(response => response.json())
+            .then(figure => {
+                topologyId = data.topology.id;
+                topologyFigure = figure;
+                return figure;
+            });
+    }
+    
+    // ===== FRAME DECODING =====
+    /**
+     * Get the frame at the given index from whichever format was loaded.
+     * Returns null while a windowed player is fetching the frame's window.
+     */
+    function getFrame(index) {
+        return framePlayer ? framePlayer.getFrame(index) : frames[index];
+    }
+    
+    /**
+     * Fetch a window of replay frames starting at a frame offset
+     */
+    function fetchFrameWindow(query, offset) {
+        const params = new URLSearchParams(query);
+        params.set('offset', offset);
+        params.set('limit', FRAME_WINDOW_SIZE);
+        return fetch(`/train-movement/get_frame_window?${params}`, { headers: { 'Accept': FRAME_REQUEST_ACCEPT } })
+            .then(readFramesResponse);
+    }
+    
+    /**
+     * Create a player for the frames of one response in any frame format
+     */
+    function createFramePlayer(data) {
+        if (data.frame_format === 'binary') {
+            return createBinaryFramePlayer(data);
+        }
+        if (data.frame_format === 'delta') {
+            return createDeltaFramePlayer(data);
+        }
+        return { getFrame: index => data.frames[index] };
+    }
+    
+    /**
+     * Create a player that fetches frames one window at a time.
+     * 
+     * The server restores each window from its nearest keyframe, so seeking
+     * anywhere costs one window instead of downloading every frame first.
+     * While a seek target's window is being fetched getFrame returns null and
+     * the frame is drawn once it arrives; only the latest target of a fast
+     * scrub is fetched. The window after the current one is prefetched when
+     * playback gets close to its end.
+     */
+    function createWindowedFramePlayer(query, firstWindow) {
+        let current = null;
+        let next = null;
+        let seekTarget = -1;
+        let seeking = false;
+        let prefetching = false;
+        
+        function toWindow(data) {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            // Keep the time labels of every fetched window for the slider tooltip
+            data.time_labels.forEach((label, i) => {
+                timeLabels[data.offset + i] = label;
+            });
+            return { offset: data.offset, size: data.window_size, player: createFramePlayer(data) };
+        }
+        
+        function covers(win, index) {
+            return win !== null && index >= win.offset && index < win.offset + win.size;
+        }
+        
+        function seek(index) {
+            seekTarget = index;
+            if (seeking) return;
+            seeking = true;
+            fetchFrameWindow(query, Math.max(0, index - FRAME_WINDOW_LEAD))
+                .then(data => {
+                    seeking = false;
+                    if (framePlayer !== player) return;
+                    current = toWindow(data);
+                    if (!covers(current, seekTarget)) {
+                        seek(seekTarget);
+                    } else if (currentFrame === seekTarget) {
+                        updateFrame(seekTarget);
+                    }
+                })
+                .catch(error => {
+                    seeking = false;
+                    console.error('Error fetching frame window:', error);
+                });
+        }
+        
+        function prefetch(offset) {
+            prefetching = true;
+            fetchFrameWindow(query, offset)
+                .then(data => {
+                    prefetching = false;
+                    if (framePlayer === player) {
+                        next = toWindow(data);
+                    }
+                })
+                .catch(error => {
+                    prefetching = false;
+                    console.error('Error prefetching frame window:', error);
+                });
+        }
+        
+        const player = {
+            isLoaded(index) {
+                return covers(current, index) || covers(next, index);
+            },
+            getFrame(index) {
+                if (!covers(current, index) && covers(next, index)) {
+                    current = next;
+                    next = null;
+                }
+                if (!covers(current, index)) {
+                    seek(index);
+                    return null;
+                }
+                const end = current.offset + current.size;
+                if (end < frameCount && end - index <= FRAME_WINDOW_PREFETCH && !prefetching && !covers(next, end)) {
+                    prefetch(end);
+                }
+                return current.player.getFrame(index - current.offset);
+            }
+        };
+        
+        current = toWindow(firstWindow);
+        return player;
+    }
+    
+    /**
+     * Parse a frames response as packed binary or JSON depending on its content type
+     */
+    function readFramesResponse(response) {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.startsWith(BINARY_FRAMES_MIMETYPE)) {
+            return response.arrayBuffer().then(decodeBinaryFrames);
+        }
+        return response.json();
+    }
+    
+    /**
+     * Decode the packed binary frames layout (see frame_encoding.py).
+     * 
+     * Returns the JSON header with typed-array views of every section under
+     * 'sections' and the time labels rebuilt from the epoch-millisecond times.
+     */
+    function decodeBinaryFrames(buffer) {
+        const TYPED_ARRAYS = {
+            uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array,
+            int32: Int32Array, int64: BigInt64Array, float32: Float32Array
+        };
+        
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'TMF1') {
+            throw new Error(`Unexpected frame buffer magic: ${magic}`);
+        }
+        const headerLength = view.getUint32(4, true);
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+        
+        const sections = {};
+        for (const name in header.sections) {
+            const { offset, dtype, shape } = header.sections[name];
+            const length = shape.reduce((product, size) => product * size, 1);
+            sections[name] = { data: new TYPED_ARRAYS[dtype](buffer, offset, length), shape: shape };
+        }
+        header.sections = sections;
+        
+        const times = sections.times.data;
+        header.time_labels = new Array(times.length);
+        for (let i = 0; i < times.length; i++) {
+            header.time_labels[i] = new Date(Number(times[i])).toISOString().slice(0, 19).replace('T', ' ');
+        }
+        return header;
+    }
+    
+    /**
+     * Create a player that reads frames straight out of the binary sections.
+     * 
+     * Every frame is a fixed-size row, so seeking is a constant-time lookup.
+     */
+    function createBinaryFramePlayer(data) {
+        const sections = data.sections;
+        const edgeCount = sections.edge_states.shape[1];
+        const palette = data.edge_palette;
+        const signalBytes = sections.signals.shape[1];
+        const transientBytes = sections.transient ? sections.transient.shape[1] : 0;
+        
+        function readBits(bytes, offset, count) {
+            const bits = new Array(count);
+            for (let i = 0; i < count; i++) {
+                bits[i] = (bytes[offset + (i >> 3)] & (0x80 >> (i & 7))) !== 0;
+            }
+            return bits;
+        }
+        
+        return {
+            getFrame(index) {
+                const colors = new Array(edgeCount);
+                const widths = new Array(edgeCount);
+                const rowStart = index * edgeCount;
+                for (let i = 0; i < edgeCount; i++) {
+                    const style = palette[sections.edge_states.data[rowStart + i]];
+                    colors[i] = style[0];
+                    widths[i] = style[1];
+                }
+                
+                const trains = {};
+                const offsets = sections.train_offsets.data;
+                for (let row = offsets[index]; row < offsets[index + 1]; row++) {
+                    const trainIdx = sections.train_index.data[row];
+                    const trainId = data.train_ids[trainIdx];
+                    (trains[trainId] = trains[trainId] || []).push({
+                        x: sections.train_xya.data[row * 3],
+                        y: sections.train_xya.data[row * 3 + 1],
+                        angle: sections.train_xya.data[row * 3 + 2],
+                        track_id: data.edge_tracks[sections.train_edges.data[row]],
+                        color: data.train_colors[trainIdx]
+                    });
+                }
+                
+                const frame = {
+                    colors: colors,
+                    widths: widths,
+                    trains: trains,
+                    signals: readBits(sections.signals.data, index * signalBytes, data.signal_count || 0)
+                };
+                if (sections.transient) {
+                    const flags = readBits(sections.transient.data, index * transientBytes, edgeCount);
+                    frame.transient_tracks = data.edge_tracks.filter((trackId, i) => flags[i]);
+                }
+                return frame;
+            }
+        };
+    }
+    
+    /**
+     * Create a player that rebuilds frames from a delta-encoded response.
+     * 
+     * The player keeps one mutable frame and applies deltas forward from the
+     * closest checkpoint, so sequential playback costs one delta per frame and
+     * seeking backwards never replays more than CHECKPOINT_INTERVAL deltas.
+     */
+    function createDeltaFramePlayer(data) {
+        const CHECKPOINT_INTERVAL = 250;
+        const initial = data.initial_frame;
+        const deltas = data.frame_deltas || [];
+        const anchors = data.track_anchors || {};
+        const checkpoints = [];
+        
+        let state = null;
+        let position = -1;
+        
+        function cloneState(source) {
+            const trains = {};
+            for (const trainId in source.trains) {
+                trains[trainId] = source.trains[trainId].slice();
+            }
+            return {
+                colors: source.colors.slice(),
+                widths: source.widths.slice(),
+                signals: source.signals.slice(),
+                trains: trains,
+                trainColors: Object.assign({}, source.trainColors)
+            };
+        }
+        
+        function applyDelta(delta) {
+            (delta.e || []).forEach(([idx, color, width]) => {
+                state.colors[idx] = color;
+                state.widths[idx] = width;
+            });
+            Object.assign(state.trainColors, delta.c || {});
+            Object.assign(state.trains, delta.t || {});
+            (delta.r || []).forEach(trainId => {
+                delete state.trains[trainId];
+            });
+            (delta.s || []).forEach(idx => {
+                state.signals[idx] = !state.signals[idx];
+            });
+        }
+        
+        function seek(index) {
+            if (index < position || state === null) {
+                // Restart from the nearest checkpoint at or before the target
+                const checkpointIdx = Math.min(Math.floor(index / CHECKPOINT_INTERVAL), checkpoints.length - 1);
+                state = cloneState(checkpoints[checkpointIdx]);
+                position = checkpointIdx * CHECKPOINT_INTERVAL;
+            }
+            while (position < index) {
+                applyDelta(deltas[position]);
+                position++;
+                if (position % CHECKPOINT_INTERVAL === 0 && checkpoints.length === position / CHECKPOINT_INTERVAL) {
+                    checkpoints.push(cloneState(state));
+                }
+            }
+        }
+        
+        function toFrame() {
+            const trains = {};
+            for (const trainId in state.trains) {
+                const color = state.trainColors[trainId];
+                trains[trainId] = state.trains[trainId].map(edgeIdx => 
+                    Object.assign({}, anchors[edgeIdx], { color: color })
+                );
+            }
+            return {
+                colors: state.colors,
+                widths: state.widths,
+                trains: trains,
+                signals: state.signals
+            };
+        }
+        
+        checkpoints.push({
+            colors: initial.colors,
+            widths: initial.widths,
+            signals: decodeSignalMask(initial.signals, data.signal_count || 0),
+            trains: initial.trains || {},
+            trainColors: initial.train_colors || {}
+        });
+        
+        return {
+            getFrame(index) {
+                seek(index);
+                return toFrame();
+            }
+        };
+    }
+    
+    /**
+     * Decode a hex signal bitmask into one boolean per signal indicator.
+     * Indicator i is bit (7 - i % 8) of byte i / 8.
+     */
+    function decodeSignalMask(mask, count) {
+        const states = new Array(count).fill(false);
+        if (typeof mask !== 'string') return states;
+        for (let i = 0; i < count; i++) {
+            const byte = parseInt(mask.substr(Math.floor(i / 8) * 2, 2), 16) || 0;
+            states[i] = (byte & (0x80 >> (i % 8))) !== 0;
+        }
+        return states;
+    }
+    
+    /**
+     * Return the signal states of a frame as a boolean array
+     */
+    function getSignalStates(frame) {
+        if (typeof frame.signals === 'string') {
+            return decodeSignalMask(frame.signals, signalIndicatorsCount);
+        }
+        return Array.isArray(frame.signals) ? frame.signals : null;
+    }
+    
     // ===== VISUALIZATION FUNCTIONS =====
     /**
      * Update frame to show track and train positions at specified index
@@ -729,13 +1177,18 @@ document.addEventListener('DOMContentLoaded', function() {
     function updateFrame(index) {
         try {
             // Ensure index is within bounds
-            index = Math.min(Math.max(0, parseFloat(index)), frames.length - 1);
+            index = Math.min(Math.max(0, parseFloat(index)), frameCount - 1);
             const frameIndex = Math.round(index);
             
             currentFrame = frameIndex;
-            if (!frames.length) return;
+            if (!frameCount) return;
             
-            const frame = frames[frameIndex];
+            const frame = getFrame(frameIndex);
+            if (!frame) {
+                // The frame's window is being fetched; it is drawn when it arrives
+                timeDisplay.textContent = timeLabels[frameIndex] || `Loading frame ${frameIndex + 1}...`;
+                return;
+            }
             
             // Update plot colors
             const plotDiv = document.getElementById('graph-container');
@@ -745,19 +1198,18 @@ document.addEventListener('DOMContentLoaded', function() {
             const colors = frame.colors || frame;
             const widths = frame.widths || Array(colors.length).fill(3);
             
-            // Update track visualization
-            for (let i = 0; i < colors.length; i++) {
-                if (plotDiv.data[i] && plotDiv.data[i].line) {
-                    Plotly.restyle(plotDiv, {
-                        'line.color': [colors[i]],
-                        'line.width': [widths[i]]
-                    }, [i]);
-                }
-            }
+            // Update track visualization (one restyle for all edges that changed)
+            updateEdgeStyles(colors, widths, plotDiv);
             
-            // Update signal indicators if they exist
-            if (hasSignalIndicators && frame.signals && Array.isArray(frame.signals)) {
-                updateSignalIndicators(frame.signals, plotDiv);
+            // Update signal indicators if they exist, at most every
+            // SIGNAL_UPDATE_INTERVAL_MS while playing
+            const now = performance.now();
+            if (hasSignalIndicators && (!playing || now - lastSignalUpdate >= SIGNAL_UPDATE_INTERVAL_MS)) {
+                const signalStates = getSignalStates(frame);
+                if (signalStates) {
+                    updateSignalIndicators(signalStates, plotDiv);
+                    lastSignalUpdate = now;
+                }
             }
             
             // Update train positions if plot is initialized
@@ -772,7 +1224,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (parseFloat(slider.value) !== index) {
                 slider.value = index;
                 // Update progress indicator
-                const progress = (index / (frames.length - 1)) * 100;
+                const progress = (index / (frameCount - 1)) * 100;
                 slider.style.setProperty('--progress', `${progress}%`);
             }
             
@@ -783,37 +1235,91 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    /**
+     * Read the edge styles of a freshly created plot
+     */
+    function plotDivEdgeStyles(plotDiv) {
+        const colors = [];
+        const widths = [];
+        for (let i = 0; i < plotDiv.data.length && plotDiv.data[i].line; i++) {
+            colors.push(plotDiv.data[i].line.color);
+            widths.push(plotDiv.data[i].line.width);
+        }
+        return { colors: colors, widths: widths };
+    }
+    
+    /**
+     * Forget what is drawn after the plot was recreated
+     */
+    function resetRenderedStyles(edgeStyles) {
+        renderedColors = edgeStyles.colors;
+        renderedWidths = edgeStyles.widths;
+        renderedSignals = [];
+        signalTraceStart = -1;
+        lastSignalUpdate = 0;
+    }
+    
+    /**
+     * Restyle the edges whose color or width differs from what is drawn,
+     * in a single Plotly.restyle call
+     */
+    function updateEdgeStyles(colors, widths, plotDiv) {
+        const traceIndices = [];
+        const changedColors = [];
+        const changedWidths = [];
+        
+        for (let i = 0; i < colors.length; i++) {
+            if (colors[i] === renderedColors[i] && widths[i] === renderedWidths[i]) continue;
+            if (!plotDiv.data[i] || !plotDiv.data[i].line) continue;
+            traceIndices.push(i);
+            changedColors.push(colors[i]);
+            changedWidths.push(widths[i]);
+            renderedColors[i] = colors[i];
+            renderedWidths[i] = widths[i];
+        }
+        
+        if (traceIndices.length) {
+            Plotly.restyle(plotDiv, {
+                'line.color': changedColors,
+                'line.width': changedWidths
+            }, traceIndices);
+        }
+    }
+    
     /**
      * Update signal indicators based on frame data
      */
-    function updateSignalIndicators(signalUpdates, plotDiv) {
+    function updateSignalIndicators(signalStates, plotDiv) {
         try {
-            // Calculate the index offset where signal indicators start
-            // They come after edge traces and label traces
-            let startIndex = 0;
-            
-            // Find where signal traces start in the data array
-            for (let i = 0; i < plotDiv.data.length; i++) {
-                if (plotDiv.data[i].mode === 'markers' && 
-                    plotDiv.data[i].marker && 
-                    plotDiv.data[i].marker.symbol === 'circle') {
-                    startIndex = i;
-                    break;
+            // Signal traces come after edge traces and label traces; find
+            // where they start once per plot
+            if (signalTraceStart < 0) {
+                signalTraceStart = 0;
+                for (let i = 0; i < plotDiv.data.length; i++) {
+                    if (plotDiv.data[i].mode === 'markers' && 
+                        plotDiv.data[i].marker && 
+                        plotDiv.data[i].marker.symbol === 'circle') {
+                        signalTraceStart = i;
+                        break;
+                    }
                 }
             }
             
-            // Apply updates to each signal indicator
-            signalUpdates.forEach((update, index) => {
-                const traceIndex = startIndex + index;
-                if (traceIndex < plotDiv.data.length && update) {
-                    // Update marker color
-                    if (update['marker.color']) {
-                        Plotly.restyle(plotDiv, {
-                            'marker.color': update['marker.color']
-                        }, [traceIndex]);
-                    }
+            // Restyle the indicators whose state changed in one call
+            const traceIndices = [];
+            const markerColors = [];
+            signalStates.forEach((active, index) => {
+                const traceIndex = signalTraceStart + index;
+                if (traceIndex < plotDiv.data.length && renderedSignals[index] !== active) {
+                    traceIndices.push(traceIndex);
+                    markerColors.push(active ? signalColors.active : signalColors.inactive);
+                    renderedSignals[index] = active;
                 }
             });
+            
+            if (traceIndices.length) {
+                Plotly.restyle(plotDiv, { 'marker.color': markerColors }, traceIndices);
+            }
         } catch (error) {
             console.error('Error updating signal indicators:', error);
         }
@@ -974,11 +1480,9 @@ document.addEventListener('DOMContentLoaded', function() {
         if (activeTrainsEl) activeTrainsEl.textContent = activeTrains;
         
         // Count active signals if available
-        if (frame.signals && hasSignalIndicators) {
-            const activeSignals = frame.signals.filter(signal => 
-                signal['marker.color'] && 
-                signal['marker.color'][0] !== '#888888'
-            ).length;
+        const signalStates = hasSignalIndicators ? getSignalStates(frame) : null;
+        if (signalStates) {
+            const activeSignals = signalStates.filter(Boolean).length;
             
             // If you have signal statistics elements, update them here
             // Example: if (activeSignalsEl) activeSignalsEl.textContent = activeSignals;
@@ -1025,9 +1529,14 @@ document.addEventListener('DOMContentLoaded', function() {
                 const framesToAdvance = Math.floor(accumulatedTime / frameDuration);
                 accumulatedTime %= frameDuration;
                 
-                // Advance frames smoothly
-                currentFrame = (currentFrame + framesToAdvance) % frames.length;
-                updateFrame(currentFrame);
+                // Advance frames smoothly, holding while the next frame's window is fetched
+                const nextFrame = (currentFrame + framesToAdvance) % frameCount;
+                if (!framePlayer || !framePlayer.isLoaded || framePlayer.isLoaded(nextFrame)) {
+                    currentFrame = nextFrame;
+                    updateFrame(currentFrame);
+                } else {
+                    getFrame(nextFrame);
+                }
             }
             
             requestAnimationFrame(animateFrame);
@@ -1048,9 +1557,82 @@ document.addEventListener('DOMContentLoaded', function() {
         } else {
             playPauseBtn.innerHTML = '<i class="fas fa-play"></i> Play';
             clearInterval(interval);
+            // Draw any signal changes the playback throttle skipped
+            updateFrame(currentFrame);
         }
     }
     
+    /**
+     * Switch between the recorded replay and the live datalog feed
+     */
+    function toggleLiveFeed() {
+        if (liveSource) {
+            stopLiveFeed();
+            loadVisualizationData();
+            return;
+        }
+        
+        if (playing) {
+            togglePlayPause();
+        }
+        liveSource = new EventSource('/train-movement/live/stream');
+        liveBtn.innerHTML = '<i class="fas fa-stop"></i> Stop Live';
+        
+        // The first event (and the first after every reconnect) is the full current state
+        liveSource.addEventListener('snapshot', event => {
+            liveData = JSON.parse(event.data);
+            liveData.frame_deltas = [];
+            signalIndicatorsCount = liveData.signal_count;
+            signalColors = liveData.signal_colors || signalColors;
+            hasSignalIndicators = liveData.signal_count > 0;
+            
+            framePlayer = createDeltaFramePlayer(liveData);
+            frames = [];
+            frameCount = 1;
+            timeLabels = [liveData.time_label];
+            slider.max = 0;
+            updateFrame(0);
+        });
+        
+        liveSource.addEventListener('delta', event => {
+            if (!liveData) return;
+            const message = JSON.parse(event.data);
+            const following = currentFrame === frameCount - 1;
+            
+            liveData.frame_deltas.push(message.delta);
+            timeLabels.push(message.time_label);
+            frameCount++;
+            slider.max = frameCount - 1;
+            
+            // Stay on the newest frame unless the user moved back in time
+            if (following) {
+                updateFrame(frameCount - 1);
+            }
+        });
+        
+        liveSource.onerror = () => {
+            if (liveSource && liveSource.readyState === EventSource.CLOSED) {
+                // Not configured or the server refused the stream; EventSource will not retry
+                console.error('Live feed is not available');
+                stopLiveFeed();
+            } else {
+                console.warn('Live feed connection lost, reconnecting...');
+            }
+        };
+    }
+    
+    /**
+     * Close the live feed connection
+     */
+    function stopLiveFeed() {
+        if (liveSource) {
+            liveSource.close();
+        }
+        liveSource = null;
+        liveData = null;
+        liveBtn.innerHTML = '<i class="fas fa-broadcast-tower"></i> Live';
+    }
+    
     /**
      * Reset animation to first frame
      */
@@ -1316,6 +1898,9 @@ document.addEventListener('DOMContentLoaded', function() {
     resetBtn.addEventListener('click', resetAnimation);
     speedIncreaseBtn.addEventListener('click', increaseSpeed);
     speedDecreaseBtn.addEventListener('click', decreaseSpeed);
+    if (liveBtn) {
+        liveBtn.addEventListener('click', toggleLiveFeed);
+    }
     
     // Add smooth slider change event for better performance
     slider.addEventListener('change', function() {
@@ -1337,7 +1922,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Update the tooltip position and content
         const sliderWidth = slider.offsetWidth;
-        const thumbPosition = (value / (frames.length - 1)) * sliderWidth;
+        const thumbPosition = (value / (frameCount - 1)) * sliderWidth;
         sliderTooltip.style.left = `${thumbPosition}px`;
         
         // Show the frame time in the tooltip
@@ -1358,13 +1943,13 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Slider tooltip mouse events
     slider.addEventListener('mousemove', function(e) {
-        if (frames.length === 0) return;
+        if (frameCount === 0) return;
         
         // Calculate position
         const sliderRect = slider.getBoundingClientRect();
         const position = (e.clientX - sliderRect.left) / sliderRect.width;
-        const framePosition = position * (frames.length - 1);
-        const frameIndex = Math.min(Math.max(0, Math.round(framePosition)), frames.length - 1);
+        const framePosition = position * (frameCount - 1);
+        const frameIndex = Math.min(Math.max(0, Math.round(framePosition)), frameCount - 1);
         
         // Position the tooltip
         sliderTooltip.style.left = `${(e.clientX - sliderRect.left)}px`;
@@ -1377,7 +1962,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     slider.addEventListener('mouseenter', function() {
-        if (frames.length > 0) {
+        if (frameCount > 0) {
             sliderTooltip.style.display = 'block';
         }
     });
@@ -1388,7 +1973,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Touch events for mobile
     slider.addEventListener('touchstart', function(e) {
-        if (frames.length === 0) return;
+        if (frameCount === 0) return;
         sliderTooltip.style.display = 'block';
         
         // If playing, pause
@@ -1406,7 +1991,7 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        if (frames.length === 0) return;
+        if (frameCount === 0) return;
         
         let currentValue = parseFloat(slider.value);
         let newValue = currentValue;
@@ -1420,7 +2005,7 @@ document.addEventListener('DOMContentLoaded', function() {
             case 'ArrowRight':
                 e.preventDefault();
                 // Hold Shift for faster navigation (jump by 10 frames)
-                newValue = Math.min(frames.length - 1, currentValue + (e.shiftKey ? 10 : 1));
+                newValue = Math.min(frameCount - 1, currentValue + (e.shiftKey ? 10 : 1));
                 break;
             case 'Home':
                 e.preventDefault();
@@ -1428,7 +2013,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 break;
             case 'End':
                 e.preventDefault();
-                newValue = frames.length - 1; // Go to end
+                newValue = frameCount - 1; // Go to end
                 break;
             case ' ': // Spacebar for play/pause
                 e.preventDefault();
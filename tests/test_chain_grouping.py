@@ -0,0 +1,41 @@
+"""Tests for the chain and net builder."""
+import pandas as pd
+
+from modules.interval_pipeline.chain_grouping import assign_chain_ids, build_chain_table
+
+
+def successor_table(links):
+    """Build a successor table from (interval, down time, successor, down time) links."""
+    return pd.DataFrame(
+        [(src, dst, f'2025-05-15 {src_time}', f'2025-05-15 {dst_time}') for src, src_time, dst, dst_time in links],
+        columns=['Interval_id', 'Successor_ID', 'Current_Dntime', 'Successor_Dntime']
+    )
+
+
+def test_intervals_without_links_are_not_chained():
+    successors = successor_table([('T1', '10:00:00', 'T2', '10:00:05'), ('T2', '10:00:05', 'T3', '10:00:09')])
+    interval_df = pd.DataFrame({
+        'Interval_id': ['T9', 'T3', 'T1', 'T2'],
+        'Circuit_name': ['X', 'C', 'A', 'B']
+    })
+
+    chain_table = build_chain_table(successors)
+    labelled = assign_chain_ids(interval_df, chain_table)
+
+    assert chain_table['Chain_intervals'].tolist() == [['T1', 'T2', 'T3']]
+    assert labelled['Interval_id'].tolist() == ['T1', 'T2', 'T3']
+    assert labelled[['Net_Group_ID', 'Chain_ID']].drop_duplicates().values.tolist() == [[1, 1]]
+
+
+def test_cycle_of_pass_through_intervals_is_kept_as_one_chain():
+    successors = successor_table([
+        ('T1', '10:00:00', 'T2', '10:00:00'),
+        ('T2', '10:00:00', 'T3', '10:00:00'),
+        ('T3', '10:00:00', 'T1', '10:00:00'),
+        ('T4', '09:00:00', 'T5', '09:00:05')
+    ])
+
+    chain_table = build_chain_table(successors)
+
+    assert chain_table['Chain_intervals'].tolist() == [['T4', 'T5'], ['T1', 'T2', 'T3']]
+    assert chain_table['Net_id'].tolist() == [1, 2]
@@ -0,0 +1,47 @@
+"""Tests for the datalog interval builder against the existing Karimnagar tables."""
+import os
+
+import pandas as pd
+import pytest
+
+from modules.interval_pipeline.datalog_intervals import build_interval_tables
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATALOG = os.path.join(ROOT, 'uploads', 'railway_data_visuals', 'karimnagar_datalog.csv')
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return build_interval_tables(DATALOG, min_duration=pd.Timedelta(seconds=11))
+
+
+def read_reference(name):
+    return pd.read_csv(os.path.join(ROOT, 'Data', name), dtype=str)
+
+
+def test_switch_intervals_match_reference(tables):
+    _, switch_df = tables
+    reference = read_reference('switch_intervals_karimnagar.csv')
+    columns = list(reference.columns)
+
+    built = switch_df[columns].sort_values(columns).reset_index(drop=True)
+    expected = reference.sort_values(columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(built, expected)
+
+
+def test_switch_times_are_truncated(tables):
+    _, switch_df = tables
+    # 102NDKR picks up at 09:23:06.984
+    row = switch_df[(switch_df['Switch_name'] == '102_NWKR') & (switch_df['Up_date'] == '2025-05-15')
+                    & (switch_df['Up_time'].str.startswith('09:23'))]
+    assert list(row['Up_time']) == ['09:23:06']
+
+
+def test_circuit_intervals_match_reference_rows(tables):
+    circuit_df, _ = tables
+    reference = read_reference('circuit_intervals_karimnagar.csv')
+
+    matched = circuit_df.merge(reference, on=list(reference.columns[1:]), suffixes=('', '_reference'))
+    # The remaining rows differ by design (see the module docstring)
+    assert len(matched) >= 0.98 * len(reference)
+    assert (matched['Interval_id'] == matched['Interval_id_reference']).all()
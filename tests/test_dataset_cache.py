@@ -0,0 +1,92 @@
+"""Tests for the train movement dataset cache."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.train_movement.dataset_cache import DatasetCache, TrainMovementDataset
+
+
+def empty_dataset():
+    return TrainMovementDataset(pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+
+
+def test_keyed_index_survives_concurrent_eviction():
+    dataset = empty_dataset()
+    errors = []
+
+    def worker(thread_idx):
+        try:
+            for i in range(2000):
+                key = (thread_idx + i) % 7
+                assert dataset.get_keyed_index('entries', key, lambda: object(), max_entries=2) is not None
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(dataset.indexes['entries']) <= 2
+
+
+def test_keyed_index_reuses_entries():
+    dataset = empty_dataset()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {'built': len(calls)}
+
+    first = dataset.get_keyed_index('entries', 'a', build, max_entries=2)
+    assert dataset.get_keyed_index('entries', 'a', build, max_entries=2) is first
+    assert len(calls) == 1
+
+
+def test_get_or_load_parses_once_for_concurrent_misses(tmp_path):
+    path = tmp_path / 'intervals.csv'
+    path.write_text('a\n1\n')
+    cache = DatasetCache()
+    calls = []
+
+    def loader(*paths):
+        calls.append(paths)
+        time.sleep(0.2)
+        return empty_dataset()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load((str(path),), loader)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+
+
+def test_derived_indexes_count_towards_memory_cap(tmp_path):
+    paths = []
+    for name in ('first.csv', 'second.csv'):
+        paths.append(tmp_path / name)
+        paths[-1].write_text('a\n1\n')
+    cache = DatasetCache(max_bytes=1024 * 1024)
+
+    first = cache.get_or_load((str(paths[0]),), lambda *_: empty_dataset())
+    cache.get_or_load((str(paths[1]),), lambda *_: empty_dataset())
+    first.get_keyed_index('masks', 'big', lambda: np.zeros(2 * 1024 * 1024, dtype=bool), max_entries=2)
+    assert first.nbytes >= 2 * 1024 * 1024
+
+    # Using the grown dataset re-applies the cap and evicts the other one
+    cache.get_or_load((str(paths[0]),), lambda *_: empty_dataset())
+    assert cache.stats()['entries'] == 1
+
+    first.get_keyed_index('masks', 'small', lambda: np.zeros(8, dtype=bool), max_entries=1)
+    assert first.nbytes < 1024 * 1024
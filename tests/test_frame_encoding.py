@@ -0,0 +1,36 @@
+"""Tests for the train movement binary frame encoding."""
+import numpy as np
+
+from modules.train_movement.frame_encoding import encode_binary_frames
+
+
+def make_frame(colors, widths):
+    return {"colors": colors, "widths": widths, "trains": {}, "signals": None}
+
+
+def test_binary_encoding_widens_edge_states_past_256_styles():
+    track_to_edge_idx = {'T1': 0, 'T2': 1}
+    start = np.datetime64('2025-05-15T09:23:06.984', 'ns')
+    frames = [
+        (make_frame([f'#{idx:06x}', '#0066cc'], [idx % 7, 3]), '', start + np.timedelta64(idx, 's'))
+        for idx in range(300)
+    ]
+
+    sections, header, _ = encode_binary_frames(frames, track_to_edge_idx)
+
+    assert sections["edge_states"].dtype == np.uint16
+    assert sections["edge_states"].shape == (300, 2)
+    palette = header["edge_palette"]
+    assert len(palette) > 256
+    assert palette[sections["edge_states"][299, 0]] == ['#00012b', 299 % 7]
+    assert sections["edge_states"][299, 1] == 0
+
+
+def test_binary_encoding_writes_frame_times_in_milliseconds():
+    frames = [(make_frame(['#0066cc'], [3]), '2025-05-15 09:23:06', np.datetime64('2025-05-15T09:23:06.984'))]
+
+    sections, _, time_labels = encode_binary_frames(frames, {'T1': 0})
+
+    assert sections["edge_states"].dtype == np.uint8
+    assert sections["times"][0] == np.datetime64('2025-05-15T09:23:06.984', 'ms').astype(np.int64)
+    assert time_labels == ['2025-05-15 09:23:06']
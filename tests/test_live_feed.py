@@ -0,0 +1,83 @@
+"""Tests for the live datalog tailer."""
+import os
+
+import pandas as pd
+import pytest
+
+from modules.train_movement.live_feed import DatalogTailer, iter_sse_messages
+from modules.train_movement.topology import build_topology
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Data')
+HEADER = 'SlNo,SIGNAL_NAME,SIGNAL_STATUS,SIGNAL_TIME'
+
+
+@pytest.fixture(scope='module')
+def topology():
+    nodes_df = pd.read_csv(os.path.join(DATA_DIR, 'nodes.csv'))
+    edges_df = pd.read_csv(os.path.join(DATA_DIR, 'edges.csv'))
+    return build_topology(nodes_df, edges_df)
+
+
+def write_lines(path, lines):
+    with open(path, 'a') as datalog:
+        for line in lines:
+            datalog.write(line + '\n')
+
+
+def occupied_edges(tailer):
+    index = tailer.topology.track_to_edge_idx
+    return {track for track in tailer.state.active_set if track in index}
+
+
+def test_point_zone_circuits_follow_detection_relays(tmp_path, topology):
+    path = str(tmp_path / 'datalog.csv')
+    write_lines(path, [
+        HEADER,
+        '1,101ATPR,Down,05/15/2025 02:23:18:100',
+        '2,101RDKR,Up,05/15/2025 02:24:00:000',
+        '3,101NDKR,Down,05/15/2025 02:24:00:010',
+        '4,101BTPR,Down,05/15/2025 02:24:05:000',
+    ])
+    tailer = DatalogTailer(path, topology)
+
+    assert tailer.poll()
+    # Before any relay pick-up a switch is in N; afterwards it follows the relay
+    assert occupied_edges(tailer) == {'N101ATPR', 'R101BTPR'}
+
+    write_lines(path, [
+        '5,101ATPR,Up,05/15/2025 02:24:21:000',
+        '6,101BTPR,Up,05/15/2025 02:24:30:000',
+        '7,01ATPR,Down,05/15/2025 02:24:31:000',
+    ])
+    assert tailer.poll()
+    # Up releases the track its Down occupied even though the switch moved
+    assert occupied_edges(tailer) == {'01ATPR'}
+    assert tailer.state.active_set == {'01ATPR'}
+
+
+def test_point_zone_edge_is_drawn_occupied(tmp_path, topology):
+    path = str(tmp_path / 'datalog.csv')
+    write_lines(path, [HEADER, '1,103NDKR,Up,05/15/2025 02:23:00:000'])
+    tailer = DatalogTailer(path, topology)
+    assert not tailer.poll()
+
+    write_lines(path, ['2,103BTPR,Down,05/15/2025 02:23:29:000'])
+    assert tailer.poll()
+    colors = tailer.frame['colors']
+    assert colors[topology.track_to_edge_idx['N103BTPR']] != '#0066cc'
+    assert colors[topology.track_to_edge_idx['R103BTPR']] == '#0066cc'
+
+
+def test_sse_stream_subscribes_only_while_streaming(tmp_path, topology):
+    path = str(tmp_path / 'datalog.csv')
+    write_lines(path, [HEADER])
+    tailer = DatalogTailer(path, topology, poll_interval=60)
+
+    stream = iter_sse_messages(tailer, keepalive=0.01)
+    assert tailer.subscriber_count == 0
+
+    assert next(stream).startswith('event: snapshot')
+    assert tailer.subscriber_count == 1
+
+    stream.close()
+    assert tailer.subscriber_count == 0
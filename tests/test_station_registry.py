@@ -0,0 +1,69 @@
+"""Tests for the station registry."""
+import os
+import threading
+import time
+
+import pytest
+
+from modules.stations.registry import Station, StationRegistry
+
+
+def make_registry(tmp_path):
+    (tmp_path / 'nodes.csv').write_text('id\n1\n')
+    stations = {
+        'full': Station('full', 'Full', {'nodes': 'nodes.csv'}, data_directories=[str(tmp_path)]),
+        'empty': Station('empty', 'Empty', {}, data_directories=[str(tmp_path)])
+    }
+    return StationRegistry(stations, 'full', max_workers=2)
+
+
+def test_get_data_refuses_station_without_files(tmp_path):
+    registry = make_registry(tmp_path)
+    calls = []
+    registry.register_loader('feature', lambda station: calls.append(station.key), roles=('nodes',))
+
+    assert not registry.has_data(registry.get('empty'), 'feature')
+    with pytest.raises(FileNotFoundError, match="has no nodes file"):
+        registry.get_data(registry.get('empty'), 'feature')
+    assert calls == []
+    assert registry.status()['loads'] == {}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork")
+def test_forked_child_does_not_wait_for_parent_loads(tmp_path):
+    registry = make_registry(tmp_path)
+    parent_pid = os.getpid()
+    release = threading.Event()
+
+    def loader(station):
+        # Loads started by the parent block until the test releases them
+        if os.getpid() == parent_pid:
+            release.wait(10)
+        return os.getpid()
+
+    registry.register_loader('feature', loader, roles=('nodes',))
+    registry.warm()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            result = registry.get_data(registry.get('full'), 'feature')
+            os._exit(0 if result == os.getpid() else 1)
+        except BaseException:
+            os._exit(2)
+
+    try:
+        deadline = time.monotonic() + 10
+        status = None
+        while time.monotonic() < deadline:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail("forked child blocked on the parent's load")
+        assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        release.set()